@@ -3,9 +3,26 @@ import re
 from typing import Optional
 
 from src.utils.llm_client import call_gemini_api
-import src.utils.llm_client as llm
+from src.utils.prompts import PromptTemplate
 
-print("LLM CLIENT FILE PATH:", llm.__file__)
+EXTRACTOR_PROMPT = PromptTemplate("extractor", """
+You are an information extraction agent.
+
+TASK:
+Extract the key educational concepts from the text below.
+
+RULES:
+- Return ONLY valid JSON
+- Do NOT include explanations
+- Do NOT include markdown
+- Each concept must be an object with:
+  - concept (string)
+  - type (definition | process | principle | term)
+  - importance (float between 0 and 1)
+
+OUTPUT FORMAT:
+[{"concept":"Photosynthesis","type":"process","importance":0.95}]
+""", sections=[("TEXT", "text")])
 
 
 def _extract_json_array(text: str) -> Optional[str]:
@@ -24,34 +41,8 @@ def extract_concepts(text: str) -> list:
     Returns a validated list of structured concepts.
     """
 
-    prompt = f"""
-You are an information extraction agent.
-
-TASK:
-Extract the key educational concepts from the text below.
-
-RULES:
-- Return ONLY valid JSON
-- Do NOT include explanations
-- Do NOT include markdown
-- Each concept must be an object with:
-  - concept (string)
-  - type (definition | process | principle | term)
-  - importance (float between 0 and 1)
-
-OUTPUT FORMAT:
-[
-  {{
-    "concept": "Photosynthesis",
-    "type": "process",
-    "importance": 0.95
-  }}
-]
-
-TEXT:
-{text}
-"""
-    raw_text = call_gemini_api(prompt)
+    prompt = EXTRACTOR_PROMPT.render(text=text)
+    raw_text = call_gemini_api(prompt, agent="extractor")
 
     if not raw_text:
         print("Failed to get a response from the API.")
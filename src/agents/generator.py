@@ -1,11 +1,34 @@
 import json
 import re
 import random
-import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
 from typing import Optional
+from src.utils import db_manager
+from src.utils.cooccurrence import concept_passage
+from src.utils.fan_out import MAX_PARALLEL_CALLS, submit_in_context
 from src.utils.llm_client import call_gemini_api
+from src.utils.prompts import PromptTemplate
 
-API_CALL_DELAY_SECONDS = 2
+# In "reuse" mode a banked question is used only if at least this share of
+# its source passage's words also occur in the current document.
+PASSAGE_SUPPORT_THRESHOLD = 0.6
+
+# The source text comes before the concept so every question of a run shares
+# the same prompt prefix.
+GENERATOR_PROMPT = PromptTemplate("generator", """
+You are an expert Quiz Designer.
+
+Create ONE multiple-choice question for the CONCEPT given at the end.
+
+RULES:
+- Use ONLY the source text
+- Generate 4 options
+- 1 correct answer
+- Output ONLY valid JSON
+
+FORMAT:
+{"concept":"<the concept>","question":"...","options":["A","B","C","D"],"correct_answer":"A"}
+""", sections=[("SOURCE TEXT", "source_text"), ("CONCEPT", "concept")])
 
 def _extract_json_object(text: str) -> Optional[str]:
     """
@@ -16,9 +39,38 @@ def _extract_json_object(text: str) -> Optional[str]:
         return match.group(0)
     return None
 
-def generate_quiz_questions(concepts: list, source_text: str, num_questions: int = 10) -> list:
+def _words(text: str) -> set:
+    return set(re.findall(r"\w{3,}", text.casefold()))
+
+def _reuse_banked_question(concept_name: str, source_text: str, source_words: set) -> Optional[dict]:
+    """
+    Returns an approved question from the question bank for this concept
+    whose source passage is supported by the current document, if any.
+    """
+    passage = concept_passage(concept_name, source_text)
+    try:
+        candidates = db_manager.find_banked_questions(concept_name, passage)
+    except Exception as e:
+        print(f"Generator: question bank unavailable ({e})")
+        return None
+    for candidate in candidates:
+        banked_words = _words(candidate["passage"])
+        if banked_words and len(banked_words & source_words) / len(banked_words) >= PASSAGE_SUPPORT_THRESHOLD:
+            return {**candidate["question"], "generated_by": "bank"}
+    return None
+
+def generate_quiz_questions(concepts: list, source_text: str, num_questions: int = 10, deadline=None,
+                            mode: str = "generate") -> list:
     """
     Generates multiple-choice quiz questions based on extracted concepts.
+
+    `mode` is "generate" (always ask the LLM) or "reuse", which first looks
+    for approved questions in the cross-document question bank and only calls
+    the LLM for concepts without a supported match.
+
+    If a `deadline` (src.utils.deadline.Deadline) is given, questions that are
+    not ready when it expires are dropped, so fewer questions may be returned.
+    At least one question is always waited for, if any can be generated.
     """
 
     if not isinstance(concepts, list):
@@ -32,60 +84,71 @@ def generate_quiz_questions(concepts: list, source_text: str, num_questions: int
 
     selected_concepts = sorted_concepts[:min(len(sorted_concepts), num_questions)]
 
-    questions = []
-
-    for concept in selected_concepts:
-        concept_name = concept.get("concept")
-        if not concept_name:
-            continue
+    concept_names = [c.get("concept") for c in selected_concepts if c.get("concept")]
+    if not concept_names:
+        return []
+
+    reused = {}
+    if mode == "reuse":
+        source_words = _words(source_text)
+        for name in concept_names:
+            question = _reuse_banked_question(name, source_text, source_words)
+            if question:
+                reused[name] = question
+        print(f"Generator: reused {len(reused)} of {len(concept_names)} questions from the question bank.")
+        if len(reused) == len(concept_names):
+            return [reused[name] for name in concept_names]
+
+    pending_names = [name for name in concept_names if name not in reused]
+    executor = ThreadPoolExecutor(max_workers=min(MAX_PARALLEL_CALLS, len(pending_names)))
+    futures = {
+        name: submit_in_context(executor, _generate_question, name, source_text)
+        for name in pending_names
+    }
+    done, not_done = wait(futures.values(), timeout=deadline.timeout() if deadline is not None else None)
+    while not_done and not reused and not any(f.result() for f in done):
+        more, not_done = wait(not_done, return_when=FIRST_COMPLETED)
+        done |= more
+    # Late requests are abandoned rather than waited for.
+    executor.shutdown(wait=not not_done, cancel_futures=True)
+    if not_done:
+        print(f"Generator: deadline reached, dropped {len(not_done)} pending questions.")
 
-        print(f"Generating question for concept: {concept_name}")
-        time.sleep(API_CALL_DELAY_SECONDS)
-
-        prompt = f"""
-You are an expert Quiz Designer.
-
-Create ONE multiple-choice question for the concept "{concept_name}".
-
-RULES:
-- Use ONLY the source text
-- Generate 4 options
-- 1 correct answer
-- Output ONLY valid JSON
+    questions = []
+    for name in concept_names:
+        if name in reused:
+            questions.append(reused[name])
+        elif futures[name] in done and futures[name].result():
+            questions.append(futures[name].result())
+    return questions
 
-FORMAT:
-{{
-  "concept": "{concept_name}",
-  "question": "...",
-  "options": ["A", "B", "C", "D"],
-  "correct_answer": "A"
-}}
+def _generate_question(concept_name: str, source_text: str) -> Optional[dict]:
+    """Generates one question for a concept. Returns None on failure."""
+    print(f"Generating question for concept: {concept_name}")
 
-SOURCE TEXT:
-{source_text}
-"""
+    prompt = GENERATOR_PROMPT.render(source_text=source_text, concept=concept_name)
 
-        try:
-            raw_response = call_gemini_api(prompt)
-            json_str = _extract_json_object(raw_response)
+    try:
+        raw_response = call_gemini_api(prompt, agent="generator")
+        json_str = _extract_json_object(raw_response)
 
-            if not json_str:
-                continue
+        if not json_str:
+            return None
 
-            question = json.loads(json_str)
+        question = json.loads(json_str)
 
-            if (
-                isinstance(question, dict)
-                and "question" in question
-                and isinstance(question.get("options"), list)
-                and "correct_answer" in question
-            ):
-                questions.append(question)
+        if (
+            isinstance(question, dict)
+            and "question" in question
+            and isinstance(question.get("options"), list)
+            and "correct_answer" in question
+        ):
+            return question
 
-        except Exception as e:
-            print(f"Generator error for {concept_name}: {e}")
+    except Exception as e:
+        print(f"Generator error for {concept_name}: {e}")
 
-    return questions
+    return None
 
 
 if __name__ == '__main__':
@@ -1,26 +1,29 @@
 import json
 import re
+from concurrent.futures import ThreadPoolExecutor
 from typing import Optional
 from src.utils.llm_client import call_gemini_api
+from src.utils.cooccurrence import cluster_concepts, cooccurrence_matrix
+from src.utils.concept_tree import repair_concept_map
+from src.utils.fan_out import submit_in_context
+from src.utils.prompts import PromptTemplate
 
-def _extract_json_object(text: str) -> Optional[str]:
-    """
-    Extracts the first JSON object found in a string.
-    Searches for content between the first '{' and the last '}'.
-    """
-    match = re.search(r"\{[\s\S]*\}", text)
-    if match:
-        return match.group(0)
-    return None
+# Above this many concepts, "auto" mode switches to the partitioned organizer.
+PARTITION_THRESHOLD = 40
+MAX_CLUSTER_SIZE = 25
+# Cluster requests carry large prompts, so fewer run in parallel than for other agents.
+MAX_PARALLEL_CLUSTERS = 4
+# Above this many cluster roots, the stitching call is skipped and roots stay top-level.
+MAX_STITCH_ROOTS = 60
+# Local organizer: a concept becomes a child of a more general concept that
+# appears in at least this share of the windows mentioning the child, if the
+# child is mentioned in at least MIN_SUBSUMPTION_SUPPORT windows. A single
+# shared sentence is not evidence of a hierarchy.
+SUBSUMPTION_THRESHOLD = 0.8
+MIN_SUBSUMPTION_SUPPORT = 2
+COOCCURRENCE_WINDOW = 1
 
-def organize_concepts(concepts: list) -> dict:
-    """
-    Takes a flat list of concepts and organizes them into a hierarchical
-    tree structure using an LLM.
-    """
-    concept_names = [c["concept"] for c in concepts]
-    
-    prompt = f"""
+ORGANIZER_PROMPT = PromptTemplate("organizer", """
 You are a Knowledge Architect. Your task is to organize a given list of concepts into a hierarchical tree structure.
 The main, most general concepts should be at the top level, and more specific concepts should be nested as their children.
 
@@ -33,46 +36,238 @@ RULES:
 - Every single concept from the input list must be placed somewhere in the tree.
 
 EXAMPLE OUTPUT STRUCTURE:
-{{
-  "concept_map": [
-    {{
-      "concept": "Main Topic A",
-      "children": [
-        {{
-          "concept": "Sub-topic A.1",
-          "children": []
-        }}
-      ]
-    }},
-    {{
-      "concept": "Main Topic B",
-      "children": []
-    }}
-  ]
-}}
-
-Here is the list of concepts to organize:
-{json.dumps(concept_names, indent=2)}
-
-Now, generate the JSON object representing the concept map.
-"""
+{"concept_map":[{"concept":"Main Topic A","children":[{"concept":"Sub-topic A.1","children":[]}]},{"concept":"Main Topic B","children":[]}]}
+
+Generate the JSON object representing the concept map for the concepts below.
+""", sections=[("CONCEPTS", "concepts")])
+
+def _extract_json_object(text: str) -> Optional[str]:
+    """
+    Extracts the first JSON object found in a string.
+    Searches for content between the first '{' and the last '}'.
+    """
+    match = re.search(r"\{[\s\S]*\}", text)
+    if match:
+        return match.group(0)
+    return None
 
+def _request_concept_map(concept_names: list) -> Optional[dict]:
+    """
+    Asks the LLM to organize `concept_names` into a tree.
+    Returns the parsed {"concept_map": [...]} object, or None on failure.
+    """
     try:
-        raw_response = call_gemini_api(prompt)
+        raw_response = call_gemini_api(ORGANIZER_PROMPT.render(concepts=concept_names), agent="organizer")
         json_str = _extract_json_object(raw_response)
         if not json_str:
             print("Organizer Error: No JSON object found in the response.")
             print("Raw model output:\n", raw_response)
-            return {}
-            
+            return None
+
         organized_map = json.loads(json_str)
+        if not isinstance(organized_map, dict) or not isinstance(organized_map.get("concept_map"), list):
+            print("Organizer Error: Response has no 'concept_map' list.")
+            return None
         return organized_map
 
     except (json.JSONDecodeError, Exception) as e:
         print(f"Organizer failed to parse response: {e}")
         if 'raw_response' in locals():
             print("Raw model output:\n", raw_response)
-        return {}
+        return None
+
+def _organize_cluster(cluster: list, source_text: str = "") -> tuple:
+    """
+    Organizes one cluster into a list of root nodes. A failed call falls back to
+    the local organizer for this cluster only, so the rest of the tree is kept.
+
+    Returns:
+        A (root nodes, fell back) tuple.
+    """
+    if len(cluster) == 1:
+        return [{"concept": cluster[0], "children": []}], False
+
+    organized_map = _request_concept_map(cluster)
+    if organized_map is None:
+        print(f"Organizer: cluster of {len(cluster)} concepts organized locally after a failed call.")
+        return organize_concepts_local([{"concept": name} for name in cluster], source_text)["concept_map"], True
+    return organized_map["concept_map"], False
+
+def _graft(stitched_nodes: list, subtrees: dict) -> list:
+    """
+    Replaces each node of the stitched root tree with the cluster subtree of the
+    same name, appending the stitched children after the subtree's own children.
+    """
+    grafted = []
+    for node in stitched_nodes:
+        if not isinstance(node, dict):
+            continue
+        subtree = subtrees.pop(node.get("concept"), None)
+        if subtree is None:
+            continue
+        children = _graft(node.get("children") or [], subtrees)
+        grafted.append({**subtree, "children": list(subtree.get("children") or []) + children})
+    return grafted
+
+def organize_concepts_partitioned(
+    concepts: list,
+    source_text: str = "",
+    max_cluster_size: int = MAX_CLUSTER_SIZE,
+    max_workers: int = MAX_PARALLEL_CLUSTERS,
+) -> dict:
+    """
+    Organizes large concept lists in three steps:
+    1. Clusters concepts locally by sentence co-occurrence in `source_text`.
+    2. Organizes each cluster's subtree in parallel LLM calls.
+    3. Stitches the cluster roots together in one small final call.
+
+    Organize time grows with the largest cluster rather than the total concept
+    count, and a failed call only affects its own cluster. "organized_by" is
+    "partial" if any cluster or the stitching call fell back to local
+    organization, else "llm".
+    """
+    concept_names = [c["concept"] for c in concepts]
+    clusters = cluster_concepts(concept_names, source_text, max_cluster_size)
+    print(f"Organizer: partitioned {len(concept_names)} concepts into {len(clusters)} clusters.")
+
+    with ThreadPoolExecutor(max_workers=max_workers) as executor:
+        futures = [
+            submit_in_context(executor, _organize_cluster, cluster, source_text)
+            for cluster in clusters
+        ]
+        results = [future.result() for future in futures]
+
+    organized_by = "partial" if any(fell_back for _, fell_back in results) else "llm"
+    roots = [node for forest, _ in results for node in forest if isinstance(node, dict)]
+    if len(roots) <= 1:
+        return {"concept_map": roots, "organized_by": organized_by}
+
+    subtrees = {}
+    for node in roots:
+        subtrees.setdefault(node.get("concept"), node)
+    root_names = list(subtrees)
+
+    if len(root_names) > MAX_STITCH_ROOTS:
+        return {"concept_map": list(subtrees.values()), "organized_by": organized_by}
+    stitched = _request_concept_map(root_names)
+    if stitched is None:
+        return {"concept_map": list(subtrees.values()), "organized_by": "partial"}
+
+    concept_map = _graft(stitched["concept_map"], subtrees)
+    # Roots the stitching call dropped are kept at the top level.
+    concept_map.extend(subtrees.values())
+    return {"concept_map": concept_map, "organized_by": organized_by}
+
+def organize_concepts_local(concepts: list, source_text: str = "") -> dict:
+    """
+    Deterministic, offline organizer that derives the hierarchy from a concept
+    co-occurrence matrix over sentence windows of `source_text`.
+
+    Concepts are ranked from general to specific (more frequent first, then
+    shorter names, then higher importance). Each concept is nested under the
+    more general concept that subsumes it best: one that appears in most of
+    the (at least MIN_SUBSUMPTION_SUPPORT) windows mentioning it, but not the
+    other way round, or whose name is contained in its own name. Concepts
+    with no such parent stay at the top level.
+    Because parents always rank before their children, the result is acyclic.
+    """
+    import numpy as np
+
+    concept_names = list(dict.fromkeys(c["concept"] for c in concepts))
+    if not concept_names:
+        return {"concept_map": []}
+    importance = {c["concept"]: c.get("importance", 0) or 0 for c in concepts}
+
+    matrix = cooccurrence_matrix(concept_names, source_text, window=COOCCURRENCE_WINDOW)
+    frequency = np.diag(matrix).copy()
+    # containment[p, c] = share of the windows mentioning c that also mention p
+    containment = matrix / np.where(frequency > 0, frequency, 1.0)[np.newaxis, :]
+
+    lowered = [name.casefold() for name in concept_names]
+    name_contained = np.array([
+        [p != c and re.search(r"(?<!\w)" + re.escape(lowered[p]) + r"(?!\w)", lowered[c]) is not None
+         for c in range(len(concept_names))]
+        for p in range(len(concept_names))
+    ], dtype=bool)
+
+    order = sorted(
+        range(len(concept_names)),
+        key=lambda i: (-frequency[i], len(lowered[i].split()), -importance[concept_names[i]], i),
+    )
+    rank = np.empty(len(concept_names), dtype=np.int64)
+    rank[order] = np.arange(len(concept_names))
+    more_general = rank[:, np.newaxis] < rank[np.newaxis, :]
+
+    # Sanderson-Croft subsumption: p covers most of c's windows but not vice versa.
+    subsumes = (
+        (containment >= SUBSUMPTION_THRESHOLD) & (containment.T < 1.0)
+        & (frequency[np.newaxis, :] >= MIN_SUBSUMPTION_SUPPORT)
+    )
+    candidates = more_general & (subsumes | name_contained)
+    # Prefer name containment, then higher containment, then the most specific parent.
+    score = containment + name_contained + rank[:, np.newaxis] / (10.0 * len(concept_names) ** 2)
+    score = np.where(candidates, score, -1.0)
+    parents = np.where(candidates.any(axis=0), score.argmax(axis=0), -1)
+
+    nodes = [{"concept": name, "children": []} for name in concept_names]
+    concept_map = []
+    for child in order:
+        parent = int(parents[child])
+        if parent < 0:
+            concept_map.append(nodes[child])
+        else:
+            nodes[parent]["children"].append(nodes[child])
+
+    return {"concept_map": concept_map}
+
+def organize_concepts(concepts: list, source_text: str = "", mode: str = "auto") -> dict:
+    """
+    Takes a flat list of concepts and organizes them into a hierarchical
+    tree structure using an LLM.
+
+    Modes:
+    - "single": one prompt containing every concept.
+    - "partitioned": see `organize_concepts_partitioned`.
+    - "auto": "partitioned" above PARTITION_THRESHOLD concepts, else "single".
+    - "local": `organize_concepts_local`, with no LLM calls at all.
+
+    If the LLM modes produce nothing, the local organizer is used as a
+    fallback. The resulting tree is verified and repaired locally, so every
+    input concept appears exactly once.
+
+    The result's "organized_by" says how the tree was built: "llm", "local"
+    (local mode or a full fallback) or "partial" (see partitioned mode).
+    """
+    if mode == "auto":
+        mode = "partitioned" if len(concepts) > PARTITION_THRESHOLD else "single"
+
+    if mode == "partitioned":
+        organized_map = organize_concepts_partitioned(concepts, source_text)
+    elif mode == "single":
+        concept_names = [c["concept"] for c in concepts]
+        organized_map = {**(_request_concept_map(concept_names) or {}), "organized_by": "llm"}
+    elif mode == "local":
+        organized_map = {**organize_concepts_local(concepts, source_text), "organized_by": "local"}
+    else:
+        raise ValueError(f"Unknown organizer mode: {mode}")
+
+    if mode != "local" and not (organized_map or {}).get("concept_map"):
+        print("Organizer: LLM produced no concept map, falling back to the local organizer.")
+        organized_map = {**organize_concepts_local(concepts, source_text), "organized_by": "local"}
+    return {**_repair(organized_map, concepts, source_text), "organized_by": organized_map["organized_by"]}
+
+def _repair(organized_map: dict, concepts: list, source_text: str) -> dict:
+    """
+    Checks that every concept is placed exactly once and fixes the tree locally
+    instead of re-prompting the LLM.
+    """
+    repaired_map, report = repair_concept_map(organized_map, concepts, source_text)
+    if report["attached"] or report["duplicates"] or report["cycles"]:
+        print(
+            f"Organizer: repaired concept map (attached {len(report['attached'])} missing, "
+            f"dropped {len(report['duplicates'])} duplicates, broke {len(report['cycles'])} cycles)."
+        )
+    return repaired_map
 
 if __name__ == '__main__':
     # NEW: Plausible Extractor output for the CS text
@@ -1,31 +1,17 @@
-from src.utils.llm_client import call_gemini_api
+from src.utils.llm_client import call_gemini_api, estimate_call_seconds
+from src.utils.concept_tree import ConceptTreeIndex
+from src.utils.fan_out import MAX_PARALLEL_CALLS, assign_question_ids, fan_out
+from src.utils.prompts import PromptTemplate
 import json
 import re
 
-def _extract_json_object(text: str):
-    match = re.search(r"\{[\s\S]*\}", text)
-    return match.group(0) if match else None
-
-def rank_questions(questions: list, concept_map: dict) -> list:
-    """
-    Uses LLM to assign difficulty and importance based on concept hierarchy.
-    """
-    ranked_questions = []
-
-    for idx, question in enumerate(questions, start=1):
-        concept_name = question.get("concept", "Unknown")
-        
-        prompt = f"""
-You are an Educational Assessment Expert. Analyze this concept's position in the knowledge hierarchy and assign appropriate difficulty and importance.
-
-CONCEPT: {concept_name}
-
-FULL CONCEPT HIERARCHY:
-{json.dumps(concept_map, indent=2)}
+# The hierarchy is the same for every question, so it precedes the concept.
+RANKER_PROMPT = PromptTemplate("ranker", """
+You are an Educational Assessment Expert. Analyze the CONCEPT's position in the FULL CONCEPT HIERARCHY given at the end and assign appropriate difficulty and importance.
 
 RULES FOR DIFFICULTY:
 - Root/broad concepts (depth 0-1): "Hard"
-- Mid-level concepts (depth 2-3): "Medium"  
+- Mid-level concepts (depth 2-3): "Medium"
 - Leaf/specific concepts (depth 4+): "Easy"
 
 RULES FOR IMPORTANCE:
@@ -34,35 +20,96 @@ RULES FOR IMPORTANCE:
 - Detailed concepts: "Supporting"
 
 Return ONLY this JSON:
-{{
-  "difficulty": "Hard|Medium|Easy",
-  "importance": "Core|Important|Supporting"
-}}
-"""
-
-        try:
-            raw_response = call_gemini_api(prompt)
-            json_str = _extract_json_object(raw_response)
-            ranking = json.loads(json_str) if json_str else {}
-            
-            difficulty = ranking.get("difficulty", "Medium")
-            importance = ranking.get("importance", "Important")
-            
-        except Exception as e:
-            print(f"Ranker LLM error: {e}")
-            difficulty = "Medium"
-            importance = "Important"
-
-        ranked_question = {
+{"difficulty":"Hard|Medium|Easy","importance":"Core|Important|Supporting"}
+""", sections=[("FULL CONCEPT HIERARCHY", "concept_map"), ("CONCEPT", "concept")])
+
+def _extract_json_object(text: str):
+    match = re.search(r"\{[\s\S]*\}", text)
+    return match.group(0) if match else None
+
+def _rank_by_depth(depth) -> tuple:
+    """
+    Maps a concept's depth in the hierarchy to (difficulty, importance) using
+    the same rules the LLM is given. Unknown concepts get the LLM defaults.
+    """
+    if depth is None:
+        return "Medium", "Important"
+    difficulty = "Hard" if depth <= 1 else "Medium" if depth <= 3 else "Easy"
+    importance = "Core" if depth == 0 else "Important" if depth <= 2 else "Supporting"
+    return difficulty, importance
+
+def rank_questions_local(questions: list, concept_map: dict) -> list:
+    """
+    Ranks questions from their concept's depth in the concept map, without
+    any LLM calls. Used when the pipeline's time budget runs low.
+    """
+    index = ConceptTreeIndex.from_concept_map(concept_map, [])
+    ranked_questions = []
+    for question in assign_question_ids(questions):
+        difficulty, importance = _rank_by_depth(index.depth_of(question.get("concept", "")))
+        ranked_questions.append({
             **question,
-            "question_id": idx,
             "difficulty": difficulty,
-            "importance": importance
-        }
-        ranked_questions.append(ranked_question)
-
+            "importance": importance,
+            "ranked_by": "local"
+        })
     return ranked_questions
 
+def _rank_question(question: dict, concept_map: dict) -> dict:
+    """
+    Ranks one question with the LLM. If the call fails or returns no ranking,
+    the question is ranked by concept depth and marked "local", so it is
+    neither cached nor reported as an LLM ranking.
+    """
+    concept_name = question.get("concept", "Unknown")
+    prompt = RANKER_PROMPT.render(concept_map=concept_map, concept=concept_name)
+
+    try:
+        raw_response = call_gemini_api(prompt, agent="ranker")
+        json_str = _extract_json_object(raw_response)
+        ranking = json.loads(json_str) if json_str else {}
+    except Exception as e:
+        print(f"Ranker LLM error: {e}")
+        ranking = {}
+
+    if not (isinstance(ranking, dict) and ranking.get("difficulty") and ranking.get("importance")):
+        print(f"Ranker: no ranking for '{concept_name}', ranking it by concept depth.")
+        return rank_questions_local([question], concept_map)[0]
+
+    return {
+        **question,
+        "difficulty": ranking["difficulty"],
+        "importance": ranking["importance"],
+        "ranked_by": "llm"
+    }
+
+def rank_questions(questions: list, concept_map: dict, deadline=None) -> list:
+    """
+    Uses LLM to assign difficulty and importance based on concept hierarchy.
+
+    Questions are ranked in parallel and matched back by "question_id"
+    (assigned here if missing). If a `deadline` (src.utils.deadline.Deadline)
+    is given, questions not ranked when it expires are ranked locally by
+    concept depth, as are questions whose call failed. Each question records how it was ranked in "ranked_by"
+    ("llm" or "local").
+    """
+    questions = assign_question_ids(questions)
+    if deadline is not None and not deadline.allows(estimate_call_seconds("ranker")):
+        return rank_questions_local(questions, concept_map)
+
+    ranked = fan_out(
+        lambda question: _rank_question(question, concept_map),
+        questions,
+        key=lambda question: question["question_id"],
+        max_workers=MAX_PARALLEL_CALLS,
+        deadline=deadline
+    )
+    late = [q for q in questions if q["question_id"] not in ranked]
+    if late:
+        print(f"Ranker: {len(late)} questions not ranked in time, ranking them by concept depth.")
+        ranked.update((q["question_id"], q) for q in rank_questions_local(late, concept_map))
+    return [ranked[q["question_id"]] for q in questions]
+
 if __name__ == "__main__":
     sample_questions = [
         {
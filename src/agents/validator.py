@@ -1,6 +1,28 @@
 import json
 import re
+from src.utils.fan_out import MAX_PARALLEL_CALLS, fan_out
 from src.utils.llm_client import call_gemini_api
+from src.utils.prompts import PromptTemplate
+
+VALIDATOR_PROMPT = PromptTemplate("validator", """
+You are an Educational Quality Assurance Expert. Review each quiz question below for:
+- Question clarity and unambiguous wording
+- Correctness of the correct answer
+- Plausibility of distractors (wrong options)
+- Appropriate difficulty level
+
+Return ONLY a valid JSON array with this EXACT structure (no extra text):
+[{"question_number":1,"decision":"Approve","reason":"Clear question with accurate answer and good distractors","difficulty":"Medium","importance":"Core"},{"question_number":2,"decision":"Reject","reason":"Question wording is ambiguous and could have multiple interpretations"}]
+
+RULES:
+- decision must be ONLY "Approve" or "Reject"
+- Include difficulty and importance from the input questions
+- Give specific reasons for your decision
+- Return ONLY the JSON array, no other text before or after
+""", sections=[("QUESTIONS TO REVIEW", "questions")])
+
+# Only these question fields are sent for review; bookkeeping keys are left out.
+REVIEWED_FIELDS = ("concept", "question", "options", "correct_answer", "difficulty", "importance")
 
 def _extract_json_array(text: str):
     """Extract JSON array from text that might contain markdown or extra text."""
@@ -12,6 +34,16 @@ def _extract_json_array(text: str):
         return match.group(0)
     return None
 
+def _reviewed_question(validation, position: int, questions: list):
+    """
+    The question a validation refers to: by its 1-based "question_number"
+    if valid, otherwise by its position in the response.
+    """
+    number = validation.get("question_number")
+    if isinstance(number, int) and 1 <= number <= len(questions):
+        return questions[number - 1]
+    return questions[position] if position < len(questions) else None
+
 def validate_question_difficulty(question: dict) -> dict:
     """
     Validates a single quiz question for difficulty appropriateness.
@@ -24,41 +56,11 @@ def validate_questions(questions: list) -> list:
     Validates quiz questions for quality, correctness, and clarity.
     Returns a list of validation results.
     """
-    prompt = f"""
-You are an Educational Quality Assurance Expert. Review each quiz question for:
-- Question clarity and unambiguous wording
-- Correctness of the correct answer
-- Plausibility of distractors (wrong options)
-- Appropriate difficulty level
-
-QUESTIONS TO REVIEW:
-{json.dumps(questions, indent=2)}
-
-Return ONLY a valid JSON array with this EXACT structure (no extra text):
-[
-  {{
-    "question_number": 1,
-    "decision": "Approve",
-    "reason": "Clear question with accurate answer and good distractors",
-    "difficulty": "Medium",
-    "importance": "Core"
-  }},
-  {{
-    "question_number": 2,
-    "decision": "Reject",
-    "reason": "Question wording is ambiguous and could have multiple interpretations"
-  }}
-]
-
-RULES:
-- decision must be ONLY "Approve" or "Reject"
-- Include difficulty and importance from the input questions
-- Give specific reasons for your decision
-- Return ONLY the JSON array, no other text before or after
-"""
+    reviewed = [{key: q[key] for key in REVIEWED_FIELDS if key in q} for q in questions]
+    prompt = VALIDATOR_PROMPT.render(questions=reviewed)
 
     try:
-        raw_response = call_gemini_api(prompt)
+        raw_response = call_gemini_api(prompt, agent="validator")
         print(f"[Validator] Raw LLM Response:\n{raw_response}\n")
         
         json_str = _extract_json_array(raw_response)
@@ -69,15 +71,18 @@ RULES:
         validations = json.loads(json_str)
         
         for i, validation in enumerate(validations):
-            if i < len(questions):
+            question = _reviewed_question(validation, i, questions)
+            if question is not None:
                 if 'difficulty' not in validation:
-                    validation['difficulty'] = questions[i].get('difficulty', 'Medium')
+                    validation['difficulty'] = question.get('difficulty', 'Medium')
                 if 'importance' not in validation:
-                    validation['importance'] = questions[i].get('importance', 'Important')
+                    validation['importance'] = question.get('importance', 'Important')
                 if 'question' not in validation:
-                    validation['question'] = questions[i].get('question', 'N/A')
+                    validation['question'] = question.get('question', 'N/A')
                 if 'reason' not in validation:
                     validation['reason'] = 'No specific reason provided'
+                if 'question_id' in question:
+                    validation['question_id'] = question['question_id']
         
         print(f"[Validator] Successfully parsed {len(validations)} validations")
         return validations
@@ -93,12 +98,33 @@ RULES:
                 "question": q.get("question", "N/A"),
                 "decision": "Approve",
                 "reason": f"Auto-approved due to parsing error: {str(e)[:100]}",
+                # Not a real verdict: kept out of the agent cache and the question bank.
+                "validated": False,
                 "difficulty": q.get("difficulty", "Medium"),
                 "importance": q.get("importance", "Important")
             })
+            if "question_id" in q:
+                fallback_validations[-1]["question_id"] = q["question_id"]
         
         return fallback_validations
 
+def validate_questions_parallel(questions: list, batch_size: int = 1, deadline=None) -> list:
+    """
+    Validates questions in parallel batches of `batch_size`. Each result
+    carries the "question_id" of the question it reviews; batches not done
+    when the `deadline` (src.utils.deadline.Deadline) expires are missing
+    from the returned list.
+    """
+    batches = [questions[i:i + batch_size] for i in range(0, len(questions), batch_size)]
+    results = fan_out(
+        lambda numbered: validate_questions(numbered[1]),
+        list(enumerate(batches)),
+        key=lambda numbered: numbered[0],
+        max_workers=MAX_PARALLEL_CALLS,
+        deadline=deadline
+    )
+    return [validation for i in range(len(batches)) for validation in results.get(i, [])]
+
 if __name__ == '__main__':
     sample_question_1 = {
         "concept": "Machine Learning",
@@ -0,0 +1,278 @@
+"""
+HTTP API for running the pipeline without the web app.
+
+Jobs go through the same SQLite queue as the web app (see src/worker.py):
+the API process only accepts and reports jobs, while worker processes run
+them and share the agent cache in the same database. Start both with:
+
+    python -m src.api [--port 8000] [--processes 2] [--workers 2]
+
+Endpoints:
+    POST /jobs                   Submits a document: JSON {"source_text": ..., "settings": {...}},
+                                 or a raw text/plain or application/pdf body. Returns 202 {"job_id": ...}.
+    GET  /jobs/<id>              Status, progress and error of a job.
+    GET  /jobs/<id>/quiz         Quiz questions and validation results of a finished job.
+    GET  /jobs/<id>/concept-map  Concept map of a finished job.
+    GET  /jobs/<id>/events       Progress as Server-Sent Events until the job ends.
+    GET  /health                 Liveness check.
+
+For load tests, --stand-in answers every LLM call from the local stand-in
+(see src/utils/stand_in_llm.py). It uses a separate database unless --db is
+given, so stand-in answers never reach the real agent cache.
+"""
+
+import argparse
+import io
+import json
+import logging
+import multiprocessing
+import re
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+from src.run_pipeline import configure_logging
+from src.utils import db_manager, llm_client
+from src.utils.documents import extract_text_from_pdf
+from src.worker import WorkerPool
+
+DEFAULT_PORT = 8000
+DEFAULT_PROCESSES = 2
+DEFAULT_WORKERS = 2
+MAX_BODY_BYTES = 20 * 1024 * 1024
+EVENT_POLL_SECONDS = 0.5
+STAND_IN_DB_PATH = "scholara_stand_in.db"
+
+# run_full_pipeline arguments a client may set per job.
+JOB_SETTINGS = ("organizer_mode", "generator_mode", "deadline_seconds", "use_cache")
+FINISHED_STATUSES = ("done", "failed")
+
+_JOB_PATH = re.compile(r"^/jobs/([0-9a-f]+)(?:/(quiz|concept-map|events))?/?$")
+
+
+class ApiError(Exception):
+    """An error reported to the client with an HTTP status."""
+
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+
+
+def _job_summary(job: dict) -> dict:
+    result = job["result"] or {}
+    return {
+        "job_id": job["id"],
+        "status": job["status"],
+        "progress": job["progress"],
+        "error": job["error"],
+        "degraded_stages": result.get("degraded_stages", []),
+        "created_at": job["created_at"],
+        "started_at": job["started_at"],
+        "finished_at": job["finished_at"],
+    }
+
+
+def _finished_result(job_id: str) -> dict:
+    job = db_manager.get_job(job_id)
+    if job is None:
+        raise ApiError(404, f"Unknown job: {job_id}")
+    if job["status"] == "failed":
+        raise ApiError(409, f"Job failed: {job['error']}")
+    if job["status"] != "done":
+        raise ApiError(409, f"Job is {job['status']}")
+    return job["result"]
+
+
+class ApiHandler(BaseHTTPRequestHandler):
+    server_version = "ScholaraAPI/1.0"
+
+    def do_GET(self):
+        self._handle(self._get)
+
+    def do_POST(self):
+        self._handle(self._post)
+
+    def log_message(self, format, *args):
+        logging.debug(f"[API] {self.address_string()} {format % args}")
+
+    def _handle(self, route):
+        try:
+            route()
+        except ApiError as e:
+            self._send_json(e.status, {"error": str(e)})
+        except (BrokenPipeError, ConnectionResetError):
+            pass
+        except Exception as e:
+            logging.exception("[API] Request failed.")
+            self._send_json(500, {"error": f"{type(e).__name__}: {e}"})
+
+    def _send_json(self, status: int, body: dict):
+        payload = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def _get(self):
+        if self.path.rstrip("/") == "/health":
+            self._send_json(200, {"status": "ok"})
+            return
+        match = _JOB_PATH.match(self.path)
+        if not match:
+            raise ApiError(404, f"No route for GET {self.path}")
+        job_id, view = match.groups()
+        if view == "events":
+            self._stream_events(job_id)
+        elif view == "quiz":
+            result = _finished_result(job_id)
+            self._send_json(200, {"job_id": job_id, "quiz": result["quiz"], "validation": result["validation"]})
+        elif view == "concept-map":
+            self._send_json(200, {"job_id": job_id, "concept_map": _finished_result(job_id)["concepts"]})
+        else:
+            job = db_manager.get_job(job_id)
+            if job is None:
+                raise ApiError(404, f"Unknown job: {job_id}")
+            self._send_json(200, _job_summary(job))
+
+    def _post(self):
+        if self.path.rstrip("/") != "/jobs":
+            raise ApiError(404, f"No route for POST {self.path}")
+        source_text, settings = self._read_submission()
+        if not source_text.strip():
+            raise ApiError(400, "Document contains no text")
+        job_id = db_manager.create_job(source_text, settings)
+        self._send_json(202, {"job_id": job_id, "status_url": f"/jobs/{job_id}"})
+
+    def _read_submission(self) -> tuple:
+        """Returns the (source text, settings) of a POST /jobs request."""
+        length = int(self.headers.get("Content-Length") or 0)
+        if length > MAX_BODY_BYTES:
+            raise ApiError(413, f"Request body exceeds {MAX_BODY_BYTES} bytes")
+        body = self.rfile.read(length)
+        content_type = (self.headers.get("Content-Type") or "").split(";")[0].strip()
+
+        if content_type == "application/pdf":
+            try:
+                return extract_text_from_pdf(io.BytesIO(body)), {}
+            except Exception as e:
+                raise ApiError(400, f"Could not read PDF: {e}")
+        if content_type in ("text/plain", "text/markdown"):
+            return body.decode("utf-8", errors="replace"), {}
+
+        try:
+            request = json.loads(body)
+        except json.JSONDecodeError as e:
+            raise ApiError(400, f"Invalid JSON: {e}")
+        if not isinstance(request, dict) or not isinstance(request.get("source_text"), str):
+            raise ApiError(400, 'Expected {"source_text": "...", "settings": {...}}')
+        settings = request.get("settings") or {}
+        unknown = set(settings) - set(JOB_SETTINGS)
+        if unknown:
+            raise ApiError(400, f"Unknown settings: {', '.join(sorted(unknown))}")
+        return request["source_text"], settings
+
+    def _stream_events(self, job_id: str):
+        """Sends a "progress" event whenever the job changes, then a "done" or "failed" event."""
+        job = db_manager.get_job(job_id)
+        if job is None:
+            raise ApiError(404, f"Unknown job: {job_id}")
+        self.send_response(200)
+        self.send_header("Content-Type", "text/event-stream")
+        self.send_header("Cache-Control", "no-cache")
+        self.end_headers()
+
+        last = None
+        while True:
+            summary = _job_summary(job)
+            event = {"status": summary["status"], "progress": summary["progress"]}
+            if event != last:
+                self._send_event("progress", event)
+                last = event
+            if job["status"] in FINISHED_STATUSES:
+                self._send_event(job["status"], summary)
+                return
+            time.sleep(EVENT_POLL_SECONDS)
+            job = db_manager.get_job(job_id)
+
+    def _send_event(self, name: str, data: dict):
+        self.wfile.write(f"event: {name}\ndata: {json.dumps(data)}\n\n".encode("utf-8"))
+        self.wfile.flush()
+
+
+def create_server(host: str = "127.0.0.1", port: int = DEFAULT_PORT) -> ThreadingHTTPServer:
+    """Creates the API server (port 0 picks a free port); call serve_forever() to run it."""
+    db_manager.init_db()
+    server = ThreadingHTTPServer((host, port), ApiHandler)
+    server.daemon_threads = True
+    return server
+
+
+def _worker_process(num_workers: int, db_path: str, stand_in_latency_scale):
+    """Entry point of one worker process: a WorkerPool on the shared database."""
+    configure_logging()
+    db_manager.DB_PATH = db_path
+    if stand_in_latency_scale is not None:
+        llm_client.configure_stand_in(True, stand_in_latency_scale)
+    WorkerPool(num_workers=num_workers).start()
+    threading.Event().wait()
+
+
+def start_worker_processes(processes: int, workers: int, db_path: str = None,
+                           stand_in_latency_scale: float = None) -> list:
+    """
+    Starts `processes` daemon processes with `workers` worker threads each.
+    Every process has its own LLM client state; they share the job queue and
+    agent cache through the SQLite database at `db_path`.
+    """
+    started = []
+    for i in range(processes):
+        process = multiprocessing.Process(
+            target=_worker_process,
+            args=(workers, db_path or db_manager.DB_PATH, stand_in_latency_scale),
+            name=f"scholara-worker-process-{i}",
+            daemon=True
+        )
+        process.start()
+        started.append(process)
+    return started
+
+
+def main(argv=None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Serve the Scholara AI pipeline over HTTP.")
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT)
+    parser.add_argument(
+        "--processes", type=int, default=DEFAULT_PROCESSES,
+        help="Worker processes to start; 0 if workers run separately (python -m src.worker)"
+    )
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Worker threads per process")
+    parser.add_argument("--db", default=None, help=f"SQLite database for jobs and the agent cache (default {db_manager.DB_PATH})")
+    parser.add_argument("--stand-in", action="store_true", help="Answer LLM calls with the local stand-in LLM")
+    parser.add_argument(
+        "--stand-in-latency-scale", type=float, default=1.0,
+        help="Multiplier for the stand-in's simulated latencies (0 for none)"
+    )
+    args = parser.parse_args(argv)
+
+    if args.db or args.stand_in:
+        db_manager.DB_PATH = args.db or STAND_IN_DB_PATH
+    stand_in_scale = args.stand_in_latency_scale if args.stand_in else None
+
+    server = create_server(args.host, args.port)
+    start_worker_processes(args.processes, args.workers, db_manager.DB_PATH, stand_in_scale)
+    logging.info(
+        f"[API] Serving on http://{args.host}:{server.server_port} with {args.processes} worker processes "
+        f"x {args.workers} workers (database {db_manager.DB_PATH}{', stand-in LLM' if args.stand_in else ''})."
+    )
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+if __name__ == "__main__":
+    main()
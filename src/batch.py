@@ -0,0 +1,247 @@
+"""
+Batch mode: runs the pipeline over a directory (or manifest) of documents.
+
+Usage:
+    python -m src.batch <directory-or-manifest> [--output results.jsonl] [--workers 4]
+
+Each finished document is appended to the output file as one JSON line, so a
+run can be interrupted and resumed: documents whose path and content hash
+already have an "ok" record are skipped. Failed documents are retried.
+"""
+
+import argparse
+import hashlib
+import json
+import logging
+import os
+import time
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+from src.run_pipeline import configure_logging, run_full_pipeline
+from src.state import PipelineState
+from src.utils import llm_client
+from src.utils.documents import SUPPORTED_EXTENSIONS, load_document
+from src.utils.fair_scheduler import tenant_scope
+
+DEFAULT_OUTPUT = "batch_results.jsonl"
+DEFAULT_WORKERS = 4
+
+
+def discover_documents(source: str) -> list:
+    """
+    Lists the documents to process.
+
+    `source` is either a directory (searched recursively for supported files)
+    or a manifest file with one document path per line. Relative manifest
+    paths are resolved against the manifest's directory; blank lines and
+    lines starting with '#' are ignored.
+    """
+    if os.path.isdir(source):
+        paths = []
+        for root, _, files in os.walk(source):
+            for name in files:
+                if name.lower().endswith(SUPPORTED_EXTENSIONS):
+                    paths.append(os.path.join(root, name))
+        return sorted(paths)
+
+    base_dir = os.path.dirname(os.path.abspath(source))
+    paths = []
+    with open(source, "r", encoding="utf-8") as f:
+        for line in f:
+            line = line.strip()
+            if line and not line.startswith("#"):
+                paths.append(line if os.path.isabs(line) else os.path.join(base_dir, line))
+    return paths
+
+
+def _file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def load_completed(output_path: str) -> set:
+    """Returns the (path, sha256) pairs that already have an "ok" record."""
+    completed = set()
+    if not os.path.exists(output_path):
+        return completed
+    with open(output_path, "r", encoding="utf-8") as f:
+        for line in f:
+            try:
+                record = json.loads(line)
+            except json.JSONDecodeError:
+                # A partially written last line from an interrupted run.
+                continue
+            if record.get("status") == "ok":
+                completed.add((record.get("path"), record.get("sha256")))
+    return completed
+
+
+def process_document(path: str, sha256: str, organizer_mode: str = None, deadline_seconds: float = None,
+                     use_cache: bool = True, generator_mode: str = None) -> dict:
+    """Runs the pipeline over one document and returns its result record."""
+    started = time.perf_counter()
+    record = {"path": path, "sha256": sha256}
+    state = PipelineState()
+    try:
+        source_text = load_document(path)
+        if not source_text.strip():
+            raise ValueError("Document contains no text")
+        with tenant_scope(path, size_chars=len(source_text)):
+            concept_map, quiz, validation = run_full_pipeline(
+                source_text,
+                organizer_mode=organizer_mode,
+                generator_mode=generator_mode,
+                deadline_seconds=deadline_seconds,
+                use_cache=use_cache,
+                state=state
+            )
+        record.update(
+            status="ok",
+            concept_map=concept_map,
+            quiz=quiz,
+            validation=validation,
+            degraded_stages=state.degraded_stages,
+            normalization=state.normalization
+        )
+    except Exception as e:
+        record.update(status="error", error=f"{type(e).__name__}: {e}")
+    record["elapsed_seconds"] = round(time.perf_counter() - started, 3)
+    return record
+
+
+def _init_worker_process(calls_per_minute):
+    """
+    Sets this worker process's share of the overall call rate. None disables
+    limiting, so the process does not apply the full LLM_CALLS_PER_MINUTE.
+    """
+    llm_client.configure_rate_limit(calls_per_minute)
+
+
+def _write_record(out, record: dict, counts: dict):
+    out.write(json.dumps(record) + "\n")
+    out.flush()
+    counts[record["status"]] += 1
+    logging.info(f"[Batch] {record['status'].upper()}: {record['path']} ({record['elapsed_seconds']}s)")
+
+
+def run_batch(
+    source: str,
+    output_path: str = DEFAULT_OUTPUT,
+    workers: int = DEFAULT_WORKERS,
+    executor: str = "thread",
+    calls_per_minute: float = None,
+    organizer_mode: str = None,
+    deadline_seconds: float = None,
+    use_cache: bool = True,
+    generator_mode: str = None,
+) -> dict:
+    """
+    Processes every pending document with a bounded pool and appends each
+    record to `output_path` as soon as it finishes.
+
+    With the thread executor all workers share this process's rate limiter
+    and agent cache. With the process executor the rate is divided evenly
+    between processes and the SQLite agent cache is shared on disk.
+
+    Documents that cannot be read get an "error" record and are retried on
+    the next run.
+
+    Returns:
+        Counts of "ok", "error" and "skipped" documents.
+    """
+    completed = load_completed(output_path)
+    pending = []
+    unreadable = []
+    skipped = 0
+    for path in discover_documents(source):
+        try:
+            sha256 = _file_hash(path)
+        except OSError as e:
+            unreadable.append({
+                "path": path, "sha256": None, "status": "error",
+                "error": f"{type(e).__name__}: {e}", "elapsed_seconds": 0.0
+            })
+            continue
+        if (path, sha256) in completed:
+            skipped += 1
+        else:
+            pending.append((path, sha256))
+
+    logging.info(
+        f"[Batch] {len(pending)} documents to process, {skipped} already completed, {len(unreadable)} unreadable."
+    )
+    counts = {"ok": 0, "error": 0, "skipped": skipped}
+    if unreadable:
+        with open(output_path, "a", encoding="utf-8") as out:
+            for record in unreadable:
+                _write_record(out, record, counts)
+    if not pending:
+        return counts
+
+    if executor == "process":
+        # Resolved here so an LLM_CALLS_PER_MINUTE from the environment or .env is split too.
+        total_rate = calls_per_minute or llm_client.get_rate_limit()
+        per_process_rate = total_rate / workers if total_rate else None
+        pool = ProcessPoolExecutor(
+            max_workers=workers,
+            initializer=_init_worker_process,
+            initargs=(per_process_rate,)
+        )
+    else:
+        if calls_per_minute:
+            llm_client.configure_rate_limit(calls_per_minute)
+        pool = ThreadPoolExecutor(max_workers=workers)
+
+    with pool, open(output_path, "a", encoding="utf-8") as out:
+        futures = {
+            pool.submit(process_document, path, sha256, organizer_mode, deadline_seconds, use_cache, generator_mode): path
+            for path, sha256 in pending
+        }
+        for future in as_completed(futures):
+            _write_record(out, future.result(), counts)
+
+    return counts
+
+
+def main(argv=None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Run the Scholara AI pipeline over many documents.")
+    parser.add_argument("source", help="Directory of .pdf/.txt/.md files, or a manifest listing one path per line")
+    parser.add_argument("--output", default=DEFAULT_OUTPUT, help="JSON Lines file to append results to")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Maximum documents processed at once")
+    parser.add_argument("--executor", choices=["thread", "process"], default="thread")
+    parser.add_argument(
+        "--calls-per-minute", type=float, default=None,
+        help="Overall LLM call rate limit (defaults to LLM_CALLS_PER_MINUTE)"
+    )
+    parser.add_argument("--organizer-mode", choices=["auto", "single", "partitioned", "local"], default=None)
+    parser.add_argument(
+        "--generator-mode", choices=["generate", "reuse"], default=None,
+        help="'reuse' answers repeated concepts from the question bank before calling the LLM"
+    )
+    parser.add_argument(
+        "--deadline-seconds", type=float, default=None,
+        help="Per-document time budget; slow stages degrade to cheaper paths to meet it"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true",
+        help="Bypass the agent cache, e.g. to load-test against a replayed cassette"
+    )
+    args = parser.parse_args(argv)
+
+    counts = run_batch(
+        args.source,
+        output_path=args.output,
+        workers=args.workers,
+        executor=args.executor,
+        calls_per_minute=args.calls_per_minute,
+        organizer_mode=args.organizer_mode,
+        generator_mode=args.generator_mode,
+        deadline_seconds=args.deadline_seconds,
+        use_cache=not args.no_cache,
+    )
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -1,34 +1,248 @@
+import hashlib
 import json
 import logging
+import math
 import os
+import threading
 
-from src.agents.extractor import extract_concepts
-from src.agents.organizer import organize_concepts
-from src.agents.generator import generate_quiz_questions
-from src.agents.ranker import rank_questions
-from src.agents.validator import validate_questions
+from src.utils import db_manager
+from src.utils.deadline import Deadline
+from src.utils.fan_out import MAX_PARALLEL_CALLS, assign_question_ids, merge_by_question_id
+from src.utils.llm_client import estimate_call_seconds, get_mode
+from src.utils.profiling import StageProfiler
+from src.utils.text_normalization import normalize_text
+from src.utils.single_flight import SingleFlight
 
 # --- Configuration ---
-MODE = "live" # Options: "live" or "mock" live is for API calls, mock uses predefined data becasue of rate limits in API usage
+# The execution mode ("live" or "mock") comes from the MODE environment
+# variable or .env, see llm_client.get_mode(). Mock mode uses predefined data
+# because of rate limits in API usage.
 
-os.environ["MODE"] = MODE
+# Organizer strategy: "auto", "single", "partitioned" or "local" (offline,
+# zero-latency). Overridden by the ORGANIZER_MODE environment variable or .env.
+DEFAULT_ORGANIZER_MODE = "auto"
 
-logging.basicConfig(
-    level=logging.INFO,
-    format='[%(asctime)s] [%(levelname)s] - %(message)s'
-)
+# Generator strategy: "generate" (always call the LLM) or "reuse" (approved
+# questions from the cross-document question bank first). Overridden by the
+# GENERATOR_MODE environment variable or .env.
+DEFAULT_GENERATOR_MODE = "generate"
+
+NUM_QUESTIONS = 5
+
+LOG_FORMAT = '[%(asctime)s] [%(levelname)s] - %(message)s'
+
+def configure_logging(level=logging.INFO):
+    """Configures root logging for command-line entry points."""
+    logging.basicConfig(level=level, format=LOG_FORMAT)
+
+_db_ready = False
+
+# Identical runs in flight are coalesced; every waiting caller's progress
+# callback receives the leader's progress.
+_inflight_runs = SingleFlight()
+_progress_listeners = {}
+_listeners_lock = threading.Lock()
 
 def load_mock_data(file_path):
     with open(file_path, "r") as f:
         return json.load(f)
 
-def run_full_pipeline(source_text):
+def _ensure_db():
+    global _db_ready
+    if not _db_ready:
+        db_manager.init_db()
+        _db_ready = True
+
+def _cached_stage(agent_name, source_text, input_data, compute, cache_if=None):
+    """
+    Returns the cached output of an agent for this source text and input,
+    computing and caching it on a miss. Empty outputs, and outputs rejected
+    by `cache_if`, are never cached.
+    """
+    _ensure_db()
+
+    cached = db_manager.get_cached_result(agent_name, source_text, input_data)
+    if cached is not None:
+        return cached
+
+    output = compute()
+    if output and (cache_if is None or cache_if(output)):
+        db_manager.set_cached_result(agent_name, source_text, output, input_data)
+    return output
+
+PIPELINE_STAGES = ["extractor", "organizer", "generator", "ranker", "validator"]
+
+def _run_key(source_text, organizer_mode, generator_mode, use_cache, deadline_seconds, profile_dir):
+    """Identifies a run by its source text hash and settings."""
+    settings = json.dumps({
+        "mode": get_mode(),
+        "organizer_mode": organizer_mode,
+        "generator_mode": generator_mode,
+        "use_cache": use_cache,
+        "deadline_seconds": deadline_seconds,
+        "profile_dir": profile_dir
+    }, sort_keys=True)
+    return hashlib.sha256(f"{settings}\0{source_text}".encode()).hexdigest()
+
+def run_full_pipeline(source_text, organizer_mode=None, use_cache=True, progress_callback=None,
+                      deadline_seconds=None, state=None, profile_dir=None, generator_mode=None):
+    """
+    Runs the five agents over `source_text`, after normalizing it (repeated
+page headers/footers, hyphenated line breaks and whitespace runs removed).
+
+    In live mode each agent's output is cached in the agent cache (keyed by
+    source text and agent input) unless `use_cache` is False.
+    Approved questions are added to the cross-document question bank, which
+    `generator_mode="reuse"` draws on before calling the LLM.
+    If given, `progress_callback(stage, completed, total)` is called before
+    each stage and once more with stage "done" at the end.
+
+    With `deadline_seconds`, the remaining budget decides whether the
+    organizer runs locally, how many questions are generated, whether ranking
+    falls back to local depth ranking, and whether validation runs per
+    question, in one batch, or not at all. The names of the stages that took
+    a cheaper path are recorded in `state.degraded_stages` when a
+    PipelineState is passed, along with the normalization report in
+    `state.normalization` and the normalized text in `state.source_text`.
+
+    With `profile_dir`, each stage is profiled with cProfile and tracemalloc
+    and its artifacts are written to that directory (see src.utils.profiling).
+
+    Concurrent calls with the same source text and settings share a single
+    run; each caller receives its own copy of the result.
+
+    Returns:
+        A (concept_map, ranked_questions, validation_results) tuple.
+    """
+    # get_mode() loads .env, so the defaults below see its settings.
+    get_mode()
+    organizer_mode = organizer_mode or os.getenv("ORGANIZER_MODE", DEFAULT_ORGANIZER_MODE)
+    generator_mode = generator_mode or os.getenv("GENERATOR_MODE", DEFAULT_GENERATOR_MODE)
+    key = _run_key(source_text, organizer_mode, generator_mode, use_cache, deadline_seconds, profile_dir)
+
+    with _listeners_lock:
+        listeners = _progress_listeners.setdefault(key, [])
+        if progress_callback:
+            listeners.append(progress_callback)
+
+    def broadcast(stage_name, completed, total):
+        with _listeners_lock:
+            callbacks = list(_progress_listeners.get(key, []))
+        for callback in callbacks:
+            callback(stage_name, completed, total)
+
+    def run():
+        profiler = StageProfiler(profile_dir)
+        try:
+            return _run_full_pipeline(
+                source_text, organizer_mode, use_cache, broadcast, deadline_seconds, profiler, generator_mode
+            )
+        finally:
+            profiler.close()
+
+    try:
+        concept_map, ranked_questions, validation_results, run_info = _inflight_runs.do(key, run)
+    finally:
+        with _listeners_lock:
+            if progress_callback:
+                listeners.remove(progress_callback)
+            if not listeners and _progress_listeners.get(key) is listeners:
+                del _progress_listeners[key]
+
+    if state is not None:
+        state.source_text = run_info["source_text"]
+        state.concepts = concept_map
+        state.quiz = ranked_questions
+        state.validation = validation_results
+        state.degraded_stages = run_info["degraded_stages"]
+        state.normalization = run_info["normalization"]
+
+    return concept_map, ranked_questions, validation_results
+
+def _questions_within_budget(deadline, requested, reserve):
+    """
+    How many questions can be generated in the remaining budget, keeping
+    `reserve` seconds for later stages. Requests run in parallel batches.
+    """
+    available = deadline.remaining() - reserve
+    rounds = int(available // estimate_call_seconds("generator"))
+    return max(1, min(requested, rounds * MAX_PARALLEL_CALLS))
+
+def _bank_approved_questions(questions, validation_results, source_text):
+    """
+    Adds newly approved questions to the cross-document question bank.
+    `validation_results` is in question order; fallback approvals from a
+    failed validator call are not banked.
+    """
+    from src.utils.cooccurrence import concept_passage
+
+    try:
+        _ensure_db()
+        added = 0
+        for q, v in zip(questions, validation_results):
+            if q.get("decision") != "Approve" or v.get("validated") is False:
+                continue
+            if q.get("generated_by") == "bank" or not q.get("concept"):
+                continue
+            passage = concept_passage(q["concept"], source_text)
+            if not passage:
+                continue
+            added += db_manager.bank_question(q, passage, q["decision"], q.get("reason"), source_text)
+        if added:
+            logging.info(f"[Question Bank] Added {added} approved questions.")
+    except Exception as e:
+        logging.warning(f"[Question Bank] Could not store approved questions: {e}")
+
+def _run_full_pipeline(source_text, organizer_mode, use_cache, progress_callback, deadline_seconds=None,
+                       profiler=None, generator_mode="generate"):
+    # Agents are imported on first run to keep module import cheap.
+    from src.agents.extractor import extract_concepts
+    from src.agents.organizer import organize_concepts
+    from src.agents.generator import generate_quiz_questions
+    from src.agents.ranker import rank_questions, rank_questions_local
+    from src.agents.validator import validate_questions, validate_questions_parallel
+
+    MODE = get_mode()
     logging.info(f"Pipeline starting in {MODE.upper()} mode.")
+    deadline = Deadline(deadline_seconds)
+    degraded_stages = []
+
+    # ---------- 0. NORMALIZATION ----------
+    # Every prompt below embeds the source text, so it is trimmed once here.
+    if profiler is not None:
+        profiler.switch("normalizer")
+    source_text, normalization = normalize_text(source_text)
+    logging.info(
+        f"[Normalizer] Saved {normalization['bytes_saved']} bytes "
+        f"(~{normalization['tokens_saved']} tokens), removed "
+        f"{normalization['repeated_lines_removed']} repeated header/footer lines."
+    )
+
+    def report(stage_name):
+        if profiler is not None:
+            profiler.switch(stage_name if stage_name in PIPELINE_STAGES else None)
+        if progress_callback:
+            completed = PIPELINE_STAGES.index(stage_name) if stage_name in PIPELINE_STAGES else len(PIPELINE_STAGES)
+            progress_callback(stage_name, completed, len(PIPELINE_STAGES))
+
+    def stage(agent_name, input_data, compute, cache_if=None):
+        if MODE == "live" and use_cache:
+            return _cached_stage(agent_name, source_text, input_data, compute, cache_if)
+        return compute()
+
+    def degrade(stage_name, reason, cause="to meet the deadline"):
+        logging.warning(f"[{stage_name.capitalize()}] Degraded {cause}: {reason}")
+        degraded_stages.append(stage_name)
+
+    # Minimum time kept back for the stages after the current one.
+    rank_reserve = estimate_call_seconds("validator")
+    generate_reserve = estimate_call_seconds("ranker") + rank_reserve
 
     # ---------- 1. EXTRACTOR ----------
+    report("extractor")
     if MODE == "live":
         logging.info("[Extractor] Extracting concepts...")
-        concepts = extract_concepts(source_text)
+        concepts = stage("extractor", None, lambda: extract_concepts(source_text))
     else:
         concepts = load_mock_data("mock_data/concepts.json")
 
@@ -36,57 +250,137 @@ def run_full_pipeline(source_text):
         raise ValueError("Extractor produced no concepts")
 
     # ---------- 2. ORGANIZER ----------
+    report("organizer")
     if MODE == "live":
         logging.info("[Organizer] Building concept hierarchy...")
-        concept_map = organize_concepts(concepts)
+        needed = estimate_call_seconds("organizer") + estimate_call_seconds("generator") + generate_reserve
+        if organizer_mode != "local" and not deadline.allows(needed):
+            degrade("organizer", "using the local co-occurrence organizer")
+            organizer_mode = "local"
+        # Trees from a failed LLM call are not cached, so the next run tries the LLM again.
+        concept_map = stage(
+            "organizer",
+            {"concepts": concepts, "mode": organizer_mode},
+            lambda: organize_concepts(concepts, source_text, mode=organizer_mode),
+            cache_if=lambda organized: organizer_mode == "local" or organized.get("organized_by") == "llm"
+        )
+        # Cache entries from before "organized_by" existed were LLM trees.
+        if organizer_mode != "local" and concept_map.get("organized_by", "llm") != "llm":
+            degrade("organizer", "used the local co-occurrence organizer", cause="after a failed LLM call")
     else:
         concept_map = load_mock_data("mock_data/concept_map.json")
 
-    if not concept_map or "concept_map" not in concept_map:
+    if not concept_map or not concept_map.get("concept_map"):
         raise ValueError("Organizer produced invalid concept map")
 
     # ---------- 3. GENERATOR (FIXED) ----------
+    report("generator")
     if MODE == "live":
         logging.info("[Generator] Generating quiz questions...")
-        quiz_questions = generate_quiz_questions(
-            concepts,       
-            source_text,
-            num_questions=5
+        num_questions = NUM_QUESTIONS
+        if deadline.seconds is not None:
+            num_questions = _questions_within_budget(deadline, NUM_QUESTIONS, generate_reserve)
+            if num_questions < NUM_QUESTIONS:
+                degrade("generator", f"generating {num_questions} of {NUM_QUESTIONS} questions")
+        generation_deadline = deadline.reserve(generate_reserve)
+        quiz_questions = stage(
+            "generator",
+            {"concepts": concepts, "num_questions": num_questions, "mode": generator_mode},
+            lambda: generate_quiz_questions(
+                concepts,
+                source_text,
+                num_questions=num_questions,
+                deadline=generation_deadline,
+                mode=generator_mode
+            ),
+            cache_if=lambda questions: len(questions) >= min(num_questions, len(concepts))
         )
+        if len(quiz_questions) < num_questions and generation_deadline.expired() \
+                and "generator" not in degraded_stages:
+            degrade("generator", f"only {len(quiz_questions)} questions were ready in time")
     else:
         quiz_questions = load_mock_data("mock_data/quiz.json")
 
     if not quiz_questions:
         raise ValueError("Generator produced no questions")
+    quiz_questions = assign_question_ids(quiz_questions)
 
     # ---------- 4. RANKER ----------
+    report("ranker")
     logging.info("[Ranker] Assigning difficulty...")
-    ranked_questions = rank_questions(
-        questions=quiz_questions,
-        concept_map=concept_map  
-    )
+    if not deadline.allows(estimate_call_seconds("ranker") + rank_reserve):
+        degrade("ranker", "ranking by concept depth")
+        ranked_questions = rank_questions_local(quiz_questions, concept_map)
+    else:
+        ranked_questions = stage(
+            "ranker",
+            {"questions": quiz_questions, "concept_map": concept_map},
+            lambda: rank_questions(
+                questions=quiz_questions,
+                concept_map=concept_map,
+                deadline=deadline.reserve(rank_reserve)
+            ),
+            cache_if=lambda ranked: all(q.get("ranked_by") != "local" for q in ranked)
+        )
+        if any(q.get("ranked_by") == "local" for q in ranked_questions):
+            degrade("ranker", "ranked some questions by concept depth", cause="to meet the deadline or after failed LLM calls")
 
     # ---------- 5. VALIDATOR ----------
+    report("validator")
     logging.info("[Validator] Validating questions...")
-    validation_results = []
-
-    for idx, question in enumerate(ranked_questions):
-        result = validate_questions(question)
-        result["question_id"] = idx
-        validation_results.append(result)
+    validation_call = estimate_call_seconds("validator")
+    validation_rounds = math.ceil(len(ranked_questions) / MAX_PARALLEL_CALLS)
+    if deadline.allows(validation_call * validation_rounds):
+        question_ids = {q["question_id"] for q in ranked_questions}
+        validation_results = stage(
+            "validator",
+            {"questions": ranked_questions},
+            lambda: validate_questions_parallel(ranked_questions, deadline=deadline),
+            cache_if=lambda results: question_ids <= {r.get("question_id") for r in results}
+            and all(r.get("validated", True) for r in results)
+        )
+    elif deadline.allows(validation_call):
+        degrade("validator", "validating all questions in a single batch")
+        validation_results = validate_questions(ranked_questions)
+    else:
+        degrade("validator", "skipped")
+        validation_results = [
+            {"question_id": q["question_id"], "decision": "Skipped", "reason": "Not validated: the run's deadline was reached."}
+            for q in ranked_questions
+        ]
 
     # ---------- FINAL MERGE ----------
-    for idx, q in enumerate(ranked_questions):
-        v = validation_results[idx]
+    # Verdicts are matched to questions by id, so results that are missing,
+    # duplicated or out of order cannot land on the wrong question.
+    validation_results = merge_by_question_id(
+        ranked_questions,
+        validation_results,
+        missing=lambda q: {
+            "question_id": q["question_id"],
+            "question": q.get("question", "N/A"),
+            "decision": "N/A",
+            "reason": "No validation result was returned."
+        }
+    )
+    unvalidated = sum(v["decision"] == "N/A" for v in validation_results)
+    if unvalidated and deadline.expired() and "validator" not in degraded_stages:
+        degrade("validator", f"{unvalidated} questions were not validated in time")
+    for q, v in zip(ranked_questions, validation_results):
         q["decision"] = v.get("decision", "N/A")
         q["reason"] = v.get("reason", "N/A")
 
+    if MODE == "live":
+        _bank_approved_questions(ranked_questions, validation_results, source_text)
+
+    report("done")
     logging.info("Pipeline finished successfully.")
 
-    return concept_map, ranked_questions, validation_results
+    run_info = {"source_text": source_text, "degraded_stages": degraded_stages, "normalization": normalization}
+    return concept_map, ranked_questions, validation_results, run_info
 
 
 if __name__ == "__main__":
+    configure_logging()
     text = "Machine learning includes supervised and unsupervised learning techniques."
     concept_map, quiz, validation = run_full_pipeline(text)
 
@@ -9,10 +9,16 @@ class PipelineState:
     concepts: Dict[str, Any] = field(default_factory=dict)
     quiz: List[Dict[str, Any]] = field(default_factory=list)
     validation: List[Dict[str, Any]] = field(default_factory=list)
+    # Stages that took a cheaper path to meet the run's deadline or after a failed LLM call.
+    degraded_stages: List[str] = field(default_factory=list)
+    # Bytes and estimated tokens saved by normalizing the source text.
+    normalization: Dict[str, Any] = field(default_factory=dict)
     
     def clear(self):
         """Resets the state for a new run."""
         self.source_text = ""
         self.concepts = {}
         self.quiz = []
-        self.validation = []
\ No newline at end of file
+        self.validation = []
+        self.degraded_stages = []
+        self.normalization = {}
\ No newline at end of file
@@ -0,0 +1,18 @@
+"""
+Example texts offered in the web app's topic picker. They are the most
+frequently run inputs, so `src.warmup` precomputes their results.
+"""
+
+CUSTOM_TEXT = "Custom Text"
+
+PRE_CANNED_TEXT = {
+    CUSTOM_TEXT: "Paste your own text here or select a topic above...",
+    "Machine Learning & AI": """
+    Machine learning (ML) is a field of inquiry devoted to understanding and building methods that 'learn', that is, methods that leverage data to improve performance on some set of tasks. It is seen as a part of artificial intelligence. Machine learning algorithms build a model based on sample data, known as training data, in order to make predictions or decisions without being explicitly programmed to do so. Machine learning algorithms are used in a wide variety of applications, such as in medicine, email filtering, speech recognition, and computer vision, where it is difficult or unfeasible to develop conventional algorithms to perform the needed tasks.
+    A subset of machine learning is closely related to computational statistics, which focuses on making predictions using computers, but not all machine learning is statistical learning. The study of mathematical optimization delivers methods, theory and application domains to the field of machine learning. Data mining is a related field of study, focusing on exploratory data analysis through unsupervised learning. Some implementations of machine learning use data and neural networks in a way that mimics the working of a biological brain. In its application across business problems, machine learning is also referred to as predictive analytics.
+    """,
+    "The History of the Internet": """
+    The history of the Internet has its origin in the efforts to build and interconnect computer networks that arose from research and development in the United States and involved international collaboration, particularly with researchers in the United Kingdom and France. The ARPANET, as it would become known, was a groundbreaking project. The first successful message on the ARPANET was sent by UCLA student programmer Charley Kline, at 22:30 PST on October 29, 1969, from Boelter Hall.
+    The development of the TCP/IP protocol suite in the 1970s by Vint Cerf and Bob Kahn was a pivotal moment, providing a standard for how data should be packetized, addressed, transmitted, routed, and received. This allowed for the creation of a "network of networks," which is the foundation of the modern Internet. In 1983, the ARPANET migrated to TCP/IP. The 1980s also saw the expansion of the network to academic and military institutions. The commercialization of the Internet began in the late 1980s and early 1990s, but it was the invention of the World Wide Web by Tim Berners-Lee at CERN in 1989 that truly brought the Internet to the public. He developed HTML, HTTP, and the first web browser, making the Internet accessible and user-friendly.
+    """
+}
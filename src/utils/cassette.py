@@ -0,0 +1,110 @@
+"""
+Record/replay store ("cassette") for LLM responses.
+
+In record mode every successful call is appended to a JSON Lines file as
+one entry keyed by the model and the SHA-256 of the prompt, together with
+the response and the measured latency. In replay mode the same calls are
+answered from that file without touching the API, optionally sleeping for
+the recorded latency (scaled by `latency_scale`) so offline runs keep
+realistic timing and payload sizes.
+
+Prompts themselves are not stored, only their hash and length.
+"""
+
+import hashlib
+import json
+import os
+import threading
+import time
+from collections import defaultdict
+
+RECORD = "record"
+REPLAY = "replay"
+DEFAULT_PATH = os.path.join("cassettes", "llm_calls.jsonl")
+
+
+def cassette_key(model: str, prompt: str) -> str:
+    """Identifies a call by its model and prompt."""
+    return hashlib.sha256(f"{model}\0{prompt}".encode()).hexdigest()
+
+
+class Cassette:
+    """
+    Thread-safe cassette file in "record" or "replay" mode.
+
+    A prompt recorded several times (e.g. a sampled generator prompt) keeps
+    every response; replay cycles through them in recorded order.
+    """
+
+    def __init__(self, path: str = DEFAULT_PATH, mode: str = REPLAY, latency_scale: float = 1.0):
+        if mode not in (RECORD, REPLAY):
+            raise ValueError(f"Unknown cassette mode: {mode!r}")
+        self.path = path
+        self.mode = mode
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._entries = defaultdict(list)
+        self._next = defaultdict(int)
+        self._counters = {"recorded": 0, "hits": 0, "misses": 0}
+        if mode == REPLAY:
+            self._load()
+
+    def _load(self):
+        if not os.path.exists(self.path):
+            raise FileNotFoundError(f"Cassette not found: {self.path}")
+        with open(self.path, "r", encoding="utf-8") as f:
+            for line in f:
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    # A partially written last line from an interrupted recording.
+                    continue
+                self._entries[entry["key"]].append(entry)
+
+    def record(self, model: str, prompt: str, response: str, latency: float, agent: str = None):
+        """Appends one call to the cassette file."""
+        entry = {
+            "key": cassette_key(model, prompt),
+            "model": model,
+            "agent": agent,
+            "prompt_chars": len(prompt),
+            "response": response,
+            "latency_seconds": round(latency, 4),
+            "recorded_at": time.time(),
+        }
+        with self._lock:
+            directory = os.path.dirname(self.path)
+            if directory:
+                os.makedirs(directory, exist_ok=True)
+            with open(self.path, "a", encoding="utf-8") as f:
+                f.write(json.dumps(entry) + "\n")
+            self._counters["recorded"] += 1
+
+    def lookup(self, model: str, prompt: str):
+        """
+        Returns the next recorded entry for this call, or None if the call
+        was never recorded.
+        """
+        key = cassette_key(model, prompt)
+        with self._lock:
+            entries = self._entries.get(key)
+            if not entries:
+                self._counters["misses"] += 1
+                return None
+            entry = entries[self._next[key] % len(entries)]
+            self._next[key] += 1
+            self._counters["hits"] += 1
+            return entry
+
+    def replay_delay(self, entry: dict) -> float:
+        """Seconds to wait before serving `entry`."""
+        return entry.get("latency_seconds", 0.0) * self.latency_scale
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "mode": self.mode,
+                "path": self.path,
+                "entries": sum(len(entries) for entries in self._entries.values()),
+                **self._counters,
+            }
@@ -0,0 +1,183 @@
+from typing import Dict, List, Optional, Tuple
+
+from src.utils.cooccurrence import concept_sentence_sets
+
+
+def _key(name: str) -> str:
+    """Normalizes a concept name for identity comparisons."""
+    return " ".join(str(name).split()).casefold()
+
+
+class ConceptTreeIndex:
+    """
+    Array-backed index over a concept map.
+
+    Every concept gets an integer id (its position in the input concept list);
+    the tree is stored as parallel `parent`, `depth` and `children` arrays keyed
+    by that id. A depth of -1 means the concept has not been placed yet.
+    Concepts the organizer invented are appended after the input concepts.
+    """
+
+    def __init__(self, concept_names: List[str]):
+        self.names: List[str] = []
+        self.ids: Dict[str, int] = {}
+        self.parent: List[int] = []
+        self.depth: List[int] = []
+        self.children: List[List[int]] = []
+        self.roots: List[int] = []
+        self.extra: List[int] = []
+        self.duplicates: List[str] = []
+        self.cycles: List[str] = []
+        self.attached: List[str] = []
+        self.expected_count = 0
+        for name in concept_names:
+            self._add(name)
+        self.expected_count = len(self.names)
+
+    def _add(self, name: str) -> int:
+        key = _key(name)
+        if key in self.ids:
+            return self.ids[key]
+        concept_id = len(self.names)
+        self.ids[key] = concept_id
+        self.names.append(name)
+        self.parent.append(-1)
+        self.depth.append(-1)
+        self.children.append([])
+        return concept_id
+
+    def _place(self, concept_id: int, parent_id: int):
+        self.parent[concept_id] = parent_id
+        if parent_id < 0:
+            self.depth[concept_id] = 0
+            self.roots.append(concept_id)
+        else:
+            self.depth[concept_id] = self.depth[parent_id] + 1
+            self.children[parent_id].append(concept_id)
+
+    @classmethod
+    def from_concept_map(cls, concept_map: dict, concepts: list) -> "ConceptTreeIndex":
+        """
+        Builds the index from organizer output and the extractor's concept list.
+
+        A node repeating one of its ancestors is recorded as a cycle; a node
+        already placed elsewhere is recorded as a duplicate. In both cases the
+        node itself is dropped and its children are lifted to its parent, so no
+        placed concept is lost.
+        """
+        names = [c["concept"] if isinstance(c, dict) else c for c in concepts]
+        index = cls([n for n in names if isinstance(n, str) and n.strip()])
+
+        nodes = concept_map.get("concept_map", []) if isinstance(concept_map, dict) else concept_map
+        # Stack entries: (node, parent_id, ancestor ids on the path to parent)
+        stack = [(node, -1, frozenset()) for node in reversed(nodes or [])]
+        while stack:
+            node, parent_id, ancestors = stack.pop()
+            if not isinstance(node, dict) or not isinstance(node.get("concept"), str):
+                continue
+            child_nodes = node.get("children") or []
+            if not isinstance(child_nodes, list):
+                child_nodes = []
+
+            key = _key(node["concept"])
+            concept_id = index.ids.get(key)
+            if concept_id is None:
+                concept_id = index._add(node["concept"].strip())
+                index.extra.append(concept_id)
+
+            if concept_id in ancestors:
+                index.cycles.append(index.names[concept_id])
+                stack.extend((child, parent_id, ancestors) for child in reversed(child_nodes))
+                continue
+            if index.depth[concept_id] >= 0:
+                index.duplicates.append(index.names[concept_id])
+                stack.extend((child, parent_id, ancestors) for child in reversed(child_nodes))
+                continue
+
+            index._place(concept_id, parent_id)
+            path = ancestors | {concept_id}
+            stack.extend((child, concept_id, path) for child in reversed(child_nodes))
+
+        return index
+
+    def missing(self) -> List[int]:
+        """Returns the ids of input concepts that are not placed in the tree."""
+        return [i for i in range(self.expected_count) if self.depth[i] < 0]
+
+    def is_complete(self) -> bool:
+        return not self.missing()
+
+    def depth_of(self, name: str) -> Optional[int]:
+        """Returns the depth of a concept, or None if it is unknown or unplaced."""
+        concept_id = self.ids.get(_key(name))
+        if concept_id is None or self.depth[concept_id] < 0:
+            return None
+        return self.depth[concept_id]
+
+    def attach_missing(self, source_text: str = "") -> List[str]:
+        """
+        Places every missing concept under the placed concept it shares the most
+        source sentences with (ties go to the shallower, then earlier, concept).
+        Concepts with no co-occurrence become roots.
+        Returns the names of the attached concepts.
+        """
+        missing = self.missing()
+        if not missing:
+            return []
+
+        occurrences = concept_sentence_sets(self.names, source_text)
+        sentences = [occurrences[name] for name in self.names]
+
+        for concept_id in missing:
+            best_id, best_score = -1, 0
+            for candidate in range(len(self.names)):
+                if self.depth[candidate] < 0:
+                    continue
+                score = len(sentences[concept_id] & sentences[candidate])
+                if score > best_score or (
+                    score == best_score and score > 0 and self.depth[candidate] < self.depth[best_id]
+                ):
+                    best_id, best_score = candidate, score
+            self._place(concept_id, best_id)
+            self.attached.append(self.names[concept_id])
+
+        return [self.names[i] for i in missing]
+
+    def to_concept_map(self) -> dict:
+        """Serializes the index back into the {"concept_map": [...]} format."""
+        def build(concept_id):
+            return {"concept": self.names[concept_id], "children": []}
+
+        concept_map = [build(root) for root in self.roots]
+        stack = list(zip(self.roots, concept_map))
+        while stack:
+            concept_id, node = stack.pop()
+            for child_id in self.children[concept_id]:
+                child = build(child_id)
+                node["children"].append(child)
+                stack.append((child_id, child))
+        return {"concept_map": concept_map}
+
+    def report(self) -> dict:
+        """Summarizes the problems found while building and repairing the tree."""
+        return {
+            "concept_count": self.expected_count,
+            "missing": [self.names[i] for i in self.missing()],
+            "attached": list(self.attached),
+            "duplicates": list(self.duplicates),
+            "cycles": list(self.cycles),
+            "extra": [self.names[i] for i in self.extra],
+            "max_depth": max(self.depth, default=-1),
+        }
+
+
+def repair_concept_map(concept_map: dict, concepts: list, source_text: str = "") -> Tuple[dict, dict]:
+    """
+    Verifies that every concept is placed exactly once and fixes the tree locally.
+
+    Returns:
+        A (repaired_concept_map, report) tuple. See `ConceptTreeIndex.report`.
+    """
+    index = ConceptTreeIndex.from_concept_map(concept_map, concepts)
+    index.attach_missing(source_text)
+    return index.to_concept_map(), index.report()
@@ -0,0 +1,134 @@
+import threading
+import time
+from contextlib import contextmanager
+
+
+class AdaptiveConcurrencyLimiter:
+    """
+    AIMD (additive-increase, multiplicative-decrease) limit on in-flight calls.
+
+    While calls succeed at a stable latency, the limit grows by about one slot
+    per limit's worth of completed calls. A rate-limit error, or a latency above
+    `latency_tolerance` times the smoothed baseline, multiplies the limit by
+    `backoff`. Latencies are compared per unit of call cost (e.g. prompt
+    kilotokens), so a large document's call is not mistaken for a spike
+    after a run of small ones. Baselines are kept per latency key (e.g. per
+    agent), since prompts of different kinds take very different times, and
+    they keep tracking slow calls so a lasting slowdown becomes the new normal.
+
+    Only calls started after the previous decrease can trigger a new one, so
+    one burst of 429s halves the limit once, not once per call.
+    """
+
+    def __init__(
+        self,
+        initial_limit: float = 4,
+        min_limit: float = 1,
+        max_limit: float = 32,
+        backoff: float = 0.5,
+        latency_tolerance: float = 2.0,
+        smoothing: float = 0.1,
+    ):
+        self.limit = float(initial_limit)
+        self.min_limit = float(min_limit)
+        self.max_limit = float(max_limit)
+        self.backoff = backoff
+        self.latency_tolerance = latency_tolerance
+        self.smoothing = smoothing
+
+        self.in_flight = 0
+        self.baseline_latency = {}
+        self._last_decrease = 0.0
+        self._cond = threading.Condition()
+        self._counters = {"successes": 0, "errors": 0, "rate_limited": 0, "latency_backoffs": 0}
+
+    def acquire(self) -> float:
+        """Blocks until a slot is free. Returns the call's start time."""
+        with self._cond:
+            while self.in_flight >= max(1, int(self.limit)):
+                self._cond.wait()
+            self.in_flight += 1
+            return time.monotonic()
+
+    def release(self, started: float, outcome: str, latency: float = None, latency_key: str = None,
+                cost: float = 1.0):
+        """
+        Frees a slot and adapts the limit.
+
+        Args:
+            started (float): The value returned by `acquire`.
+            outcome (str): "ok", "rate_limited" or "error". Plain errors do not
+                change the limit.
+            latency (float, optional): Duration of a successful call in seconds.
+            latency_key (str, optional): Which latency baseline to compare against.
+            cost (float): Size of the call (e.g. prompt kilotokens); the
+                latency is divided by it before comparing.
+        """
+        with self._cond:
+            self.in_flight -= 1
+            if outcome == "rate_limited":
+                self._counters["rate_limited"] += 1
+                self._decrease(started)
+            elif outcome == "ok":
+                self._counters["successes"] += 1
+                normalized = latency / cost if latency is not None else None
+                if normalized is not None and self._is_spike(latency_key, normalized):
+                    self._counters["latency_backoffs"] += 1
+                    self._decrease(started)
+                else:
+                    self.limit = min(self.max_limit, self.limit + 1.0 / self.limit)
+                if normalized is not None:
+                    self._update_baseline(latency_key, normalized)
+            else:
+                self._counters["errors"] += 1
+            self._cond.notify_all()
+
+    @contextmanager
+    def slot(self, latency_key: str = None, cost: float = 1.0):
+        """
+        Context manager around one call. Set `.outcome` on the yielded object
+        to "rate_limited" or "error" before an exception propagates; the
+        default is "ok" and the latency is measured automatically.
+        """
+        call = _Call(self.acquire())
+        try:
+            yield call
+        except Exception:
+            if call.outcome == "ok":
+                call.outcome = "error"
+            raise
+        finally:
+            latency = time.monotonic() - call.started if call.outcome == "ok" else None
+            self.release(call.started, call.outcome, latency, latency_key, cost)
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "limit": round(self.limit, 2),
+                "in_flight": self.in_flight,
+                "baseline_seconds_per_cost": {k: round(v, 3) for k, v in self.baseline_latency.items()},
+                **self._counters,
+            }
+
+    def _is_spike(self, key, latency: float) -> bool:
+        baseline = self.baseline_latency.get(key)
+        return baseline is not None and latency > baseline * self.latency_tolerance
+
+    def _update_baseline(self, key, latency: float):
+        baseline = self.baseline_latency.get(key)
+        if baseline is None:
+            self.baseline_latency[key] = latency
+        else:
+            self.baseline_latency[key] = baseline + self.smoothing * (latency - baseline)
+
+    def _decrease(self, started: float):
+        if started < self._last_decrease:
+            return
+        self.limit = max(self.min_limit, self.limit * self.backoff)
+        self._last_decrease = time.monotonic()
+
+
+class _Call:
+    def __init__(self, started: float):
+        self.started = started
+        self.outcome = "ok"
@@ -0,0 +1,125 @@
+import re
+from collections import defaultdict
+from typing import Dict, List, Set
+
+_SENTENCE_SPLIT = re.compile(r"(?<=[.!?])\s+|\n{2,}")
+
+
+def split_sentences(text: str) -> List[str]:
+    """Splits source text into non-empty sentences."""
+    return [s.strip() for s in _SENTENCE_SPLIT.split(text or "") if s.strip()]
+
+
+def concept_sentence_sets(concept_names: List[str], source_text: str) -> Dict[str, Set[int]]:
+    """
+    Maps each concept name to the indices of the sentences that mention it.
+    Matching is case-insensitive and respects word boundaries.
+    """
+    sentences = [s.lower() for s in split_sentences(source_text)]
+    occurrences = {}
+    for name in concept_names:
+        pattern = re.compile(r"(?<!\w)" + re.escape(name.lower()) + r"(?!\w)")
+        occurrences[name] = {i for i, sentence in enumerate(sentences) if pattern.search(sentence)}
+    return occurrences
+
+
+def concept_passage(concept_name: str, source_text: str, max_sentences: int = 3) -> str:
+    """Returns the first sentences of the source text that mention the concept."""
+    sentences = split_sentences(source_text)
+    indices = sorted(concept_sentence_sets([concept_name], source_text)[concept_name])
+    return " ".join(sentences[i] for i in indices[:max_sentences])
+
+
+def cooccurrence_counts(concept_names: List[str], source_text: str) -> Dict[tuple, int]:
+    """
+    Counts, for every pair of concepts, the number of sentences mentioning both.
+    Keys are (name_a, name_b) tuples ordered as in `concept_names`.
+    """
+    occurrences = concept_sentence_sets(concept_names, source_text)
+    by_sentence = defaultdict(list)
+    for name in concept_names:
+        for idx in occurrences[name]:
+            by_sentence[idx].append(name)
+
+    counts = defaultdict(int)
+    for names in by_sentence.values():
+        for i in range(len(names)):
+            for j in range(i + 1, len(names)):
+                counts[(names[i], names[j])] += 1
+    return dict(counts)
+
+
+def cluster_concepts(concept_names: List[str], source_text: str, max_cluster_size: int) -> List[List[str]]:
+    """
+    Groups concepts into clusters of at most `max_cluster_size` names.
+
+    Pairs that share the most sentences are merged first (greedy single-linkage
+    with a size cap). Concepts that never co-occur with anything are packed
+    together in input order so every concept ends up in exactly one cluster.
+    """
+    names = list(dict.fromkeys(concept_names))
+    parent = {name: name for name in names}
+    size = {name: 1 for name in names}
+
+    def find(name):
+        while parent[name] != name:
+            parent[name] = parent[parent[name]]
+            name = parent[name]
+        return name
+
+    counts = cooccurrence_counts(names, source_text)
+    order = {name: i for i, name in enumerate(names)}
+    pairs = sorted(counts.items(), key=lambda item: (-item[1], order[item[0][0]], order[item[0][1]]))
+
+    for (a, b), _ in pairs:
+        root_a, root_b = find(a), find(b)
+        if root_a == root_b or size[root_a] + size[root_b] > max_cluster_size:
+            continue
+        if order[root_b] < order[root_a]:
+            root_a, root_b = root_b, root_a
+        parent[root_b] = root_a
+        size[root_a] += size[root_b]
+
+    groups = defaultdict(list)
+    for name in names:
+        groups[find(name)].append(name)
+
+    clusters = []
+    loose = []
+    for members in groups.values():
+        if len(members) == 1:
+            loose.extend(members)
+        else:
+            clusters.append(members)
+
+    for i in range(0, len(loose), max_cluster_size):
+        clusters.append(loose[i:i + max_cluster_size])
+
+    return clusters
+
+
+def cooccurrence_matrix(concept_names: List[str], source_text: str, window: int = 1):
+    """
+    Builds a concept co-occurrence matrix over sliding windows of `window`
+    consecutive sentences.
+
+    Returns:
+        A square NumPy array where entry [i, j] is the number of windows that
+        mention both concept i and concept j; the diagonal holds each concept's
+        own window count.
+    """
+    # Imported here so the pure-Python helpers above stay dependency-free.
+    import numpy as np
+
+    window = max(1, window)
+    sentence_count = len(split_sentences(source_text))
+    window_count = max(1, sentence_count - window + 1)
+    occurrences = concept_sentence_sets(concept_names, source_text)
+
+    incidence = np.zeros((len(concept_names), window_count), dtype=np.float32)
+    for row, name in enumerate(concept_names):
+        for idx in occurrences[name]:
+            first = max(0, idx - window + 1)
+            incidence[row, first:min(idx, window_count - 1) + 1] = 1.0
+
+    return incidence @ incidence.T
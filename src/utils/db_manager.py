@@ -1,18 +1,28 @@
 import sqlite3
 import json
 import hashlib
+import re
+import uuid
 
 DB_PATH = 'scholara.db'
+# Seconds to wait on a locked database when several workers share it.
+DB_TIMEOUT_SECONDS = 30
+# Words of the current passage used to rank banked passages (FTS5 OR query).
+BANK_QUERY_TERMS = 32
+# Running jobs without a heartbeat for this long are assumed orphaned.
+JOB_STALE_SECONDS = 600
 
 def _get_db_connection():
     """Establishes a connection to the SQLite database."""
-    conn = sqlite3.connect(DB_PATH)
+    conn = sqlite3.connect(DB_PATH, timeout=DB_TIMEOUT_SECONDS)
     conn.row_factory = sqlite3.Row
     return conn
 
 def init_db():
     """Initializes the database and creates tables if they don't exist."""
     with _get_db_connection() as conn:
+        # WAL lets concurrent readers proceed while one worker writes.
+        conn.execute("PRAGMA journal_mode=WAL")
         cursor = conn.cursor()
         cursor.execute('''
             CREATE TABLE IF NOT EXISTS agent_cache (
@@ -29,6 +39,52 @@ def init_db():
             CREATE INDEX IF NOT EXISTS idx_agent_cache
             ON agent_cache (agent_name, source_text_hash, input_data_hash)
         ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS jobs (
+                id TEXT PRIMARY KEY,
+                status TEXT NOT NULL,
+                source_text TEXT NOT NULL,
+                source_text_hash TEXT,
+                settings TEXT,
+                progress TEXT,
+                result TEXT,
+                error TEXT,
+                worker_id TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP,
+                started_at TIMESTAMP,
+                finished_at TIMESTAMP,
+                heartbeat_at TIMESTAMP
+            )
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_status
+            ON jobs (status, created_at)
+        ''')
+        cursor.execute('''
+            CREATE INDEX IF NOT EXISTS idx_jobs_source
+            ON jobs (source_text_hash, status)
+        ''')
+        cursor.execute('''
+            CREATE TABLE IF NOT EXISTS question_bank (
+                id INTEGER PRIMARY KEY AUTOINCREMENT,
+                concept TEXT NOT NULL,
+                concept_key TEXT NOT NULL,
+                question_hash TEXT NOT NULL UNIQUE,
+                question TEXT NOT NULL,
+                difficulty TEXT,
+                passage TEXT NOT NULL,
+                verdict TEXT NOT NULL,
+                reason TEXT,
+                source_text_hash TEXT,
+                created_at TIMESTAMP DEFAULT CURRENT_TIMESTAMP
+            )
+        ''')
+        # Full-text index over each banked question's concept and source
+        # passage; its rowid is the question_bank id.
+        cursor.execute('''
+            CREATE VIRTUAL TABLE IF NOT EXISTS question_bank_fts
+            USING fts5(concept, passage, tokenize = 'porter unicode61')
+        ''')
         conn.commit()
     print("[DB] Database initialized.")
 
@@ -90,6 +146,212 @@ def set_cached_result(agent_name, source_text, output_data, input_data=None):
         conn.commit()
     print(f"[CACHE] Saved result for agent '{agent_name}'.")
 
+def _concept_key(concept):
+    return " ".join(concept.split()).casefold()
+
+def _fts_phrase(text):
+    return '"' + text.replace('"', '""') + '"'
+
+def bank_question(question, passage, verdict, reason=None, source_text=None):
+    """
+    Stores an approved question in the cross-document question bank.
+    A question already in the bank (same concept, wording, options and answer)
+    is not stored twice.
+
+    Args:
+        question (dict): The question with its concept, options and correct answer.
+        passage (str): The source passage the question was written from.
+        verdict (str): The validator's decision, e.g. "Approve".
+        reason (str, optional): The validator's reason.
+        source_text (str, optional): The document the question came from.
+
+    Returns:
+        True if the question was added, False if it was already banked.
+    """
+    stored = {key: question.get(key) for key in ("concept", "question", "options", "correct_answer")}
+    question_json = json.dumps(stored, sort_keys=True)
+    question_hash = hashlib.sha256(question_json.encode()).hexdigest()
+    source_hash = hashlib.sha256(source_text.encode()).hexdigest() if source_text else None
+
+    with _get_db_connection() as conn:
+        cursor = conn.execute(
+            "INSERT OR IGNORE INTO question_bank (concept, concept_key, question_hash, question, difficulty, "
+            "passage, verdict, reason, source_text_hash) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?)",
+            (stored["concept"], _concept_key(stored["concept"]), question_hash, question_json,
+             question.get("difficulty"), passage, verdict, reason, source_hash)
+        )
+        added = cursor.rowcount > 0
+        if added:
+            conn.execute(
+                "INSERT INTO question_bank_fts (rowid, concept, passage) VALUES (?, ?, ?)",
+                (cursor.lastrowid, stored["concept"], passage)
+            )
+        conn.commit()
+    return added
+
+def find_banked_questions(concept, passage, limit=5):
+    """
+    Looks up approved questions for a concept, best passage match first.
+
+    Only questions banked for the same concept (ignoring case and spacing)
+    are returned, ranked by BM25 similarity of their source passage to
+    `passage`.
+
+    Args:
+        concept (str): The concept name.
+        passage (str): The current document's passage about the concept.
+        limit (int): The maximum number of questions to return.
+
+    Returns:
+        A list of dicts with "question", "passage", "difficulty", "verdict" and "reason".
+    """
+    terms = list(dict.fromkeys(re.findall(r"\w{3,}", passage.casefold())))[:BANK_QUERY_TERMS]
+    query = f"concept : {_fts_phrase(concept)}"
+    if terms:
+        query += " AND passage : (" + " OR ".join(_fts_phrase(term) for term in terms) + ")"
+
+    with _get_db_connection() as conn:
+        rows = conn.execute(
+            "SELECT b.question, b.passage, b.difficulty, b.verdict, b.reason "
+            "FROM question_bank_fts JOIN question_bank b ON b.id = question_bank_fts.rowid "
+            "WHERE question_bank_fts MATCH ? AND b.concept_key = ? "
+            "ORDER BY bm25(question_bank_fts) LIMIT ?",
+            (query, _concept_key(concept), limit)
+        ).fetchall()
+    return [{**dict(row), "question": json.loads(row["question"])} for row in rows]
+
+def _job_from_row(row):
+    """Converts a jobs row into a dict with its JSON columns decoded."""
+    job = dict(row)
+    for key in ("settings", "progress", "result"):
+        job[key] = json.loads(job[key]) if job[key] else None
+    return job
+
+def create_job(source_text, settings=None, stale_seconds=JOB_STALE_SECONDS):
+    """
+    Queues a pipeline run. If an identical job (same source text and settings)
+    is already queued or running, no new job is created. Running jobs without
+    a heartbeat for `stale_seconds` are not reused, since their worker is
+    probably gone.
+
+    Args:
+        source_text (str): The raw source text.
+        settings (dict, optional): Keyword arguments for run_full_pipeline.
+        stale_seconds (float, optional): Heartbeat age after which a running job is ignored.
+
+    Returns:
+        The id of the new or already pending job.
+    """
+    source_hash = hashlib.sha256(source_text.encode()).hexdigest()
+    settings_json = json.dumps(settings or {}, sort_keys=True)
+    conn = _get_db_connection()
+    try:
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE source_text_hash = ? AND settings = ? AND (status = 'queued' "
+            "OR (status = 'running' AND heartbeat_at >= datetime('now', ?))) ORDER BY created_at LIMIT 1",
+            (source_hash, settings_json, f"-{int(stale_seconds)} seconds")
+        ).fetchone()
+        if row:
+            conn.rollback()
+            return row['id']
+
+        job_id = uuid.uuid4().hex
+        conn.execute(
+            "INSERT INTO jobs (id, status, source_text, source_text_hash, settings) VALUES (?, 'queued', ?, ?, ?)",
+            (job_id, source_text, source_hash, settings_json)
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return job_id
+
+def get_job(job_id):
+    """Returns a job as a dict, or None if it does not exist."""
+    with _get_db_connection() as conn:
+        row = conn.execute("SELECT * FROM jobs WHERE id = ?", (job_id,)).fetchone()
+    return _job_from_row(row) if row else None
+
+def claim_next_job(worker_id):
+    """
+    Atomically moves the oldest queued job to 'running' for this worker.
+
+    Returns:
+        The claimed job as a dict, or None if the queue is empty.
+    """
+    conn = _get_db_connection()
+    try:
+        # BEGIN IMMEDIATE takes the write lock up front so two workers
+        # can never claim the same job.
+        conn.execute("BEGIN IMMEDIATE")
+        row = conn.execute(
+            "SELECT id FROM jobs WHERE status = 'queued' ORDER BY created_at, rowid LIMIT 1"
+        ).fetchone()
+        if row is None:
+            conn.rollback()
+            return None
+        conn.execute(
+            "UPDATE jobs SET status = 'running', worker_id = ?, started_at = CURRENT_TIMESTAMP, "
+            "heartbeat_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (worker_id, row['id'])
+        )
+        conn.commit()
+    finally:
+        conn.close()
+    return get_job(row['id'])
+
+def update_job_progress(job_id, progress):
+    """Records a running job's progress (any JSON-serializable dict) and heartbeat."""
+    with _get_db_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET progress = ?, heartbeat_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (json.dumps(progress), job_id)
+        )
+        conn.commit()
+
+def heartbeat_job(job_id):
+    """Refreshes a running job's heartbeat so it is not requeued as stale."""
+    with _get_db_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET heartbeat_at = CURRENT_TIMESTAMP WHERE id = ? AND status = 'running'",
+            (job_id,)
+        )
+        conn.commit()
+
+def complete_job(job_id, result):
+    """Marks a job as done and stores its JSON-serializable result."""
+    with _get_db_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'done', result = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (json.dumps(result), job_id)
+        )
+        conn.commit()
+
+def fail_job(job_id, error):
+    """Marks a job as failed with an error message."""
+    with _get_db_connection() as conn:
+        conn.execute(
+            "UPDATE jobs SET status = 'failed', error = ?, finished_at = CURRENT_TIMESTAMP WHERE id = ?",
+            (str(error), job_id)
+        )
+        conn.commit()
+
+def requeue_stale_jobs(max_age_seconds):
+    """
+    Puts running jobs whose worker stopped sending heartbeats back in the queue.
+
+    Returns:
+        The number of requeued jobs.
+    """
+    with _get_db_connection() as conn:
+        cursor = conn.execute(
+            "UPDATE jobs SET status = 'queued', worker_id = NULL "
+            "WHERE status = 'running' AND heartbeat_at < datetime('now', ?)",
+            (f"-{int(max_age_seconds)} seconds",)
+        )
+        conn.commit()
+        return cursor.rowcount
+
 if __name__ == '__main__':
     print("Running DB Manager self-test...")
     init_db()
@@ -0,0 +1,42 @@
+import math
+import time
+from typing import Optional
+
+
+class Deadline:
+    """
+    A point in time by which a pipeline run should finish.
+
+    `Deadline(None)` never expires, so callers can pass a deadline around
+    unconditionally.
+    """
+
+    def __init__(self, seconds: Optional[float] = None):
+        self.seconds = seconds
+        self._expires_at = time.monotonic() + seconds if seconds is not None else None
+
+    def remaining(self) -> float:
+        """Seconds left (never negative), or infinity without a deadline."""
+        if self._expires_at is None:
+            return math.inf
+        return max(0.0, self._expires_at - time.monotonic())
+
+    def reserve(self, seconds: float) -> "Deadline":
+        """Returns a deadline that ends `seconds` before this one, keeping time back for later work."""
+        if self._expires_at is None:
+            return Deadline(None)
+        return Deadline(max(0.0, self.remaining() - seconds))
+
+    def timeout(self) -> Optional[float]:
+        """Remaining seconds for APIs that take a timeout; None without a deadline."""
+        return None if self._expires_at is None else self.remaining()
+
+    def expired(self) -> bool:
+        return self.remaining() <= 0
+
+    def allows(self, estimated_seconds: float) -> bool:
+        """True if work estimated to take `estimated_seconds` fits in the remaining budget."""
+        return self.remaining() >= estimated_seconds
+
+    def __repr__(self):
+        return f"Deadline(remaining={self.remaining():.1f}s)"
@@ -0,0 +1,31 @@
+import io
+import os
+
+SUPPORTED_EXTENSIONS = (".pdf", ".txt", ".md")
+
+
+def extract_text_from_pdf(source) -> str:
+    """
+    Extracts text from a PDF given a file path or a binary file-like object.
+    Pages are separated by form feeds, so repeated page headers and footers
+    can be recognized later (see text_normalization).
+    """
+    # pypdf is imported on first use to keep it out of cold start.
+    import pypdf
+
+    if not isinstance(source, (str, os.PathLike)):
+        source = io.BytesIO(source.read())
+    pdf_reader = pypdf.PdfReader(source)
+    pages = (page.extract_text() for page in pdf_reader.pages)
+    return "\f".join(page_text for page_text in pages if page_text)
+
+
+def load_document(path: str) -> str:
+    """Loads the text of a supported document (.pdf, .txt or .md) from disk."""
+    extension = os.path.splitext(path)[1].lower()
+    if extension == ".pdf":
+        return extract_text_from_pdf(path)
+    if extension in SUPPORTED_EXTENSIONS:
+        with open(path, "r", encoding="utf-8", errors="replace") as f:
+            return f.read()
+    raise ValueError(f"Unsupported document type: {path}")
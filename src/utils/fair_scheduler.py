@@ -0,0 +1,215 @@
+"""
+Weighted fair queuing of LLM calls across sessions and jobs.
+
+Every call is tagged with the tenant (a job, a batch document, ...) active
+in the calling context, see `tenant_scope`. Waiting calls are dispatched in
+order of their virtual finish time: a call costing `c` (prompt size in
+kilotokens) from a tenant with weight `w` finishes `c / w` after the later of
+the scheduler's virtual time and the tenant's previous call. A tenant
+with many queued calls therefore cannot crowd out one that has just arrived,
+and smaller documents get a higher weight so short jobs finish first.
+
+Optional per-tenant limits cap a tenant's concurrent calls and its calls per
+minute; a tenant at its limit waits while other tenants are served.
+"""
+
+import contextvars
+import itertools
+import threading
+import time
+from collections import deque
+from contextlib import contextmanager
+
+# Documents up to this size get the full short-job boost; larger ones get
+# proportionally less, down to weight 1.
+SHORT_JOB_CHARS = 20_000
+MAX_SHORT_JOB_WEIGHT = 8.0
+CHARS_PER_KILOTOKEN = 4000
+QUOTA_WINDOW_SECONDS = 60.0
+
+DEFAULT_TENANT = "default"
+
+_current_tenant = contextvars.ContextVar("llm_tenant", default=None)
+
+
+def job_weight(size_chars) -> float:
+    """Scheduling weight of a job from its source text size; short jobs weigh more."""
+    if not size_chars:
+        return 1.0
+    return min(MAX_SHORT_JOB_WEIGHT, max(1.0, SHORT_JOB_CHARS * MAX_SHORT_JOB_WEIGHT / size_chars))
+
+
+@contextmanager
+def tenant_scope(tenant_id: str, size_chars: int = None, weight: float = None):
+    """
+    Tags the LLM calls made in this context (and in thread pools started with
+    a copy of it) with `tenant_id`. The weight defaults to `job_weight(size_chars)`.
+    """
+    token = _current_tenant.set((tenant_id, weight if weight is not None else job_weight(size_chars)))
+    try:
+        yield
+    finally:
+        _current_tenant.reset(token)
+
+
+def current_tenant() -> tuple:
+    """Returns the (tenant id, weight) of the calling context."""
+    return _current_tenant.get() or (DEFAULT_TENANT, 1.0)
+
+
+class _Tenant:
+    def __init__(self):
+        self.last_finish = 0.0
+        self.in_flight = 0
+        self.queued = 0
+        self.calls = 0
+        self.wait_seconds = 0.0
+        self.recent_calls = deque()
+
+
+class _Ticket:
+    __slots__ = ("tenant_id", "start", "finish", "seq", "enqueued_at", "granted")
+
+    def __init__(self, tenant_id, start, finish, seq):
+        self.tenant_id = tenant_id
+        self.start = start
+        self.finish = finish
+        self.seq = seq
+        self.enqueued_at = time.monotonic()
+        self.granted = False
+
+
+class FairScheduler:
+    """
+    Admits at most `capacity()` calls at once, choosing among waiting calls
+    by weighted fair queuing. `capacity` is a callable so the scheduler can
+    follow the adaptive concurrency limit.
+    """
+
+    def __init__(self, capacity=lambda: 4, max_concurrent_per_tenant=None, calls_per_minute_per_tenant=None):
+        self.capacity = capacity
+        self.configure(max_concurrent_per_tenant, calls_per_minute_per_tenant)
+        self._cond = threading.Condition()
+        self._tenants = {}
+        self._waiting = []
+        self._in_flight = 0
+        self._virtual_time = 0.0
+        self._seq = itertools.count()
+
+    def configure(self, max_concurrent_per_tenant=None, calls_per_minute_per_tenant=None):
+        self.max_concurrent_per_tenant = max_concurrent_per_tenant
+        self.calls_per_minute_per_tenant = calls_per_minute_per_tenant
+
+    def acquire(self, cost: float = 1.0) -> str:
+        """Blocks until the calling tenant may start a call. Returns the tenant id."""
+        tenant_id, weight = current_tenant()
+        with self._cond:
+            self._forget_idle_tenants()
+            tenant = self._tenants.setdefault(tenant_id, _Tenant())
+            start = max(self._virtual_time, tenant.last_finish)
+            ticket = _Ticket(tenant_id, start, start + cost / weight, next(self._seq))
+            tenant.last_finish = ticket.finish
+            tenant.queued += 1
+            self._waiting.append(ticket)
+
+            self._dispatch()
+            while not ticket.granted:
+                self._cond.wait(timeout=self._next_quota_release())
+                self._dispatch()
+        return tenant_id
+
+    def release(self, tenant_id: str):
+        with self._cond:
+            self._in_flight -= 1
+            tenant = self._tenants[tenant_id]
+            tenant.in_flight -= 1
+            self._forget_idle_tenants()
+            self._dispatch()
+
+    @contextmanager
+    def slot(self, cost: float = 1.0):
+        tenant_id = self.acquire(cost)
+        try:
+            yield
+        finally:
+            self.release(tenant_id)
+
+    def _forget_idle_tenants(self):
+        """
+        Drops tenants with no queued or running calls and no calls inside the
+        quota window; a returning tenant starts at the current virtual time.
+        """
+        now = time.monotonic()
+        idle = [
+            tenant_id for tenant_id, t in self._tenants.items()
+            if not t.in_flight and not t.queued
+            and (not t.recent_calls or now - t.recent_calls[-1] >= QUOTA_WINDOW_SECONDS)
+        ]
+        for tenant_id in idle:
+            del self._tenants[tenant_id]
+
+    def _eligible(self, tenant: _Tenant, now: float) -> bool:
+        if self.max_concurrent_per_tenant and tenant.in_flight >= self.max_concurrent_per_tenant:
+            return False
+        if self.calls_per_minute_per_tenant:
+            while tenant.recent_calls and now - tenant.recent_calls[0] >= QUOTA_WINDOW_SECONDS:
+                tenant.recent_calls.popleft()
+            if len(tenant.recent_calls) >= self.calls_per_minute_per_tenant:
+                return False
+        return True
+
+    def _next_quota_release(self):
+        """Seconds until a quota-blocked tenant may call again, or None."""
+        if not self.calls_per_minute_per_tenant:
+            return None
+        oldest = [t.recent_calls[0] for t in self._tenants.values() if t.queued and t.recent_calls]
+        if not oldest:
+            return None
+        return max(0.01, min(oldest) + QUOTA_WINDOW_SECONDS - time.monotonic())
+
+    def _dispatch(self):
+        """Grants waiting calls, smallest virtual finish time first, while capacity lasts."""
+        granted = False
+        while self._waiting and self._in_flight < max(1, int(self.capacity())):
+            now = time.monotonic()
+            eligible = {tenant_id for tenant_id, t in self._tenants.items() if t.queued and self._eligible(t, now)}
+            candidates = [ticket for ticket in self._waiting if ticket.tenant_id in eligible]
+            if not candidates:
+                break
+            ticket = min(candidates, key=lambda t: (t.finish, t.seq))
+            self._waiting.remove(ticket)
+
+            tenant = self._tenants[ticket.tenant_id]
+            tenant.queued -= 1
+            tenant.in_flight += 1
+            tenant.calls += 1
+            tenant.wait_seconds += now - ticket.enqueued_at
+            if self.calls_per_minute_per_tenant:
+                tenant.recent_calls.append(now)
+            self._in_flight += 1
+            self._virtual_time = max(self._virtual_time, ticket.start)
+            ticket.granted = True
+            granted = True
+        if granted:
+            self._cond.notify_all()
+
+    def metrics(self) -> dict:
+        with self._cond:
+            return {
+                "in_flight": self._in_flight,
+                "queued": len(self._waiting),
+                "tenants": {
+                    tenant_id: {
+                        "in_flight": t.in_flight,
+                        "queued": t.queued,
+                        "calls": t.calls,
+                        "mean_wait_seconds": round(t.wait_seconds / t.calls, 3) if t.calls else None,
+                    }
+                    for tenant_id, t in self._tenants.items()
+                },
+            }
+
+
+def call_cost(prompt: str) -> float:
+    """Scheduling cost of a call: its prompt size in kilotokens (at least 0.1)."""
+    return max(0.1, len(prompt) / CHARS_PER_KILOTOKEN)
@@ -0,0 +1,86 @@
+"""
+Parallel fan-out over quiz questions, keyed by a stable question id.
+
+Agents that handle questions independently (ranking, validation) submit one
+task per question or batch and get back whatever finished, keyed by
+question id. Results are merged back onto the questions by id, never by
+position, so late, missing, duplicated or reordered results cannot shift a
+verdict onto the wrong question.
+"""
+
+import contextvars
+import hashlib
+from concurrent.futures import ThreadPoolExecutor, wait
+
+# Upper bound on parallel LLM requests per agent; the LLM client's adaptive
+# concurrency limit decides how many actually run at once.
+MAX_PARALLEL_CALLS = 8
+
+
+def question_id(question: dict) -> str:
+    """A stable id from the question's concept and wording."""
+    content = f"{question.get('concept', '')}\0{question.get('question', '')}"
+    return "q" + hashlib.sha256(content.encode("utf-8")).hexdigest()[:12]
+
+
+def assign_question_ids(questions: list) -> list:
+    """
+    Returns copies of `questions` with a "question_id". Questions that
+    already have one keep it; identical questions get a numbered suffix.
+    """
+    seen = set()
+    assigned = []
+    for question in questions:
+        base = question.get("question_id") or question_id(question)
+        qid, n = base, 1
+        while qid in seen:
+            n += 1
+            qid = f"{base}-{n}"
+        seen.add(qid)
+        assigned.append({**question, "question_id": qid})
+    return assigned
+
+
+def submit_in_context(executor, fn, *args):
+    """
+    Submits `fn(*args)` to `executor` in a copy of the caller's context, so
+    its LLM calls keep the caller's scheduling tenant.
+    """
+    return executor.submit(contextvars.copy_context().run, fn, *args)
+
+
+def fan_out(fn, items: list, key, max_workers: int, deadline=None) -> dict:
+    """
+    Runs `fn(item)` for every item in a thread pool and returns {key(item): result}
+    for the calls that finished.
+
+    Calls still running when the `deadline` (src.utils.deadline.Deadline)
+    expires are abandoned, and calls that raise are left out, so callers must
+    handle missing keys.
+    """
+    if not items:
+        return {}
+    executor = ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(items))))
+    futures = {submit_in_context(executor, fn, item): key(item) for item in items}
+    done, not_done = wait(futures, timeout=deadline.timeout() if deadline is not None else None)
+    executor.shutdown(wait=not not_done, cancel_futures=True)
+
+    results = {}
+    for future in done:
+        try:
+            results[futures[future]] = future.result()
+        except Exception as e:
+            print(f"Fan-out: task {futures[future]} failed: {e}")
+    return results
+
+
+def merge_by_question_id(questions: list, results: list, missing) -> list:
+    """
+    Orders `results` like `questions` by "question_id". The first result per
+    id wins, results for unknown ids are dropped, and `missing(question)`
+    supplies the result for questions without one.
+    """
+    by_id = {}
+    for result in results:
+        by_id.setdefault(result.get("question_id"), result)
+    return [by_id.get(q.get("question_id")) or missing(q) for q in questions]
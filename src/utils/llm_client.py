@@ -1,43 +1,611 @@
+import hashlib
 import os
-from dotenv import load_dotenv
+import contextvars
+import threading
+import time
+from collections import deque
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
 from typing import Optional
 
-load_dotenv()
+from src.utils.cassette import DEFAULT_PATH as DEFAULT_CASSETTE_PATH, REPLAY, Cassette
+from src.utils.concurrency import AdaptiveConcurrencyLimiter
+from src.utils.fair_scheduler import FairScheduler, call_cost
+from src.utils.single_flight import SingleFlight
 
-# Check if we're in mock mode to avoid importing API dependencies
-MODE = os.getenv("MODE", "mock")
+# Options: "live" (Gemini API calls) or "mock" (no API calls; the pipeline uses
+# mock_data/ instead). Overridden by the MODE environment variable or .env.
+DEFAULT_MODE = "live"
+MODEL_NAME = "gemini-1.5-flash"
 
-def call_gemini_api(prompt: str) -> str:
+_env_loaded = False
+_env_lock = threading.Lock()
+
+def _load_env():
+    """Loads .env on first use instead of at import time."""
+    global _env_loaded
+    if _env_loaded:
+        return
+    with _env_lock:
+        if _env_loaded:
+            return
+        from dotenv import load_dotenv
+        load_dotenv()
+        if not _rate_limiter.configured and os.getenv("LLM_CALLS_PER_MINUTE"):
+            _rate_limiter.set_rate(float(os.getenv("LLM_CALLS_PER_MINUTE")))
+        if not _scheduler_configured:
+            configure_fair_scheduling(
+                _int_env("LLM_SESSION_MAX_CONCURRENCY"),
+                _int_env("LLM_SESSION_CALLS_PER_MINUTE")
+            )
+        if not _hedging_configured and os.getenv("LLM_HEDGING"):
+            configure_hedging(os.getenv("LLM_HEDGING").lower() in ("1", "true", "yes"))
+        if not _stand_in_configured and os.getenv("LLM_STAND_IN", "").lower() in ("1", "true", "yes"):
+            configure_stand_in(True, float(os.getenv("LLM_STAND_IN_LATENCY_SCALE", "1")))
+        if not _cassette_configured and os.getenv("LLM_CASSETTE"):
+            configure_cassette(
+                os.getenv("LLM_CASSETTE"),
+                os.getenv("LLM_CASSETTE_PATH") or None,
+                float(os.getenv("LLM_CASSETTE_LATENCY_SCALE", "1"))
+            )
+        _env_loaded = True
+
+def _int_env(name: str) -> Optional[int]:
+    value = os.getenv(name)
+    return int(value) if value else None
+
+def get_mode() -> str:
+    """Returns the execution mode, "live" or "mock"."""
+    _load_env()
+    return os.getenv("MODE", DEFAULT_MODE)
+
+
+class RateLimiter:
+    """
+    Thread-safe limiter that spaces calls at least `60 / calls_per_minute`
+    seconds apart. A rate of None or 0 disables limiting.
+    """
+
+    def __init__(self, calls_per_minute: Optional[float] = None):
+        self._lock = threading.Lock()
+        self._next_slot = 0.0
+        self.configured = False
+        self.interval = 0.0
+        if calls_per_minute:
+            self.set_rate(calls_per_minute)
+
+    def set_rate(self, calls_per_minute: Optional[float]):
+        self.interval = 60.0 / calls_per_minute if calls_per_minute else 0.0
+        self.configured = True
+
+    def acquire(self):
+        """Blocks until the caller may issue its call."""
+        with self._lock:
+            now = time.monotonic()
+            slot = max(now, self._next_slot)
+            self._next_slot = slot + self.interval
+        if slot > now:
+            time.sleep(slot - now)
+
+
+# Shared by every agent (and every thread of a batch run) in this process.
+# Defaults to the LLM_CALLS_PER_MINUTE environment variable, read on first use.
+_rate_limiter = RateLimiter()
+
+def configure_rate_limit(calls_per_minute: Optional[float]):
+    """Sets the process-wide LLM call rate; None or 0 disables limiting."""
+    _rate_limiter.set_rate(calls_per_minute)
+
+def get_rate_limit() -> Optional[float]:
+    """Returns the process-wide LLM call rate in calls per minute, or None if unlimited."""
+    _load_env()
+    return 60.0 / _rate_limiter.interval if _rate_limiter.interval else None
+
+_inflight_calls = SingleFlight()
+
+# Adaptive cap on concurrent API calls, shared by every agent in the process.
+_concurrency = AdaptiveConcurrencyLimiter(initial_limit=4, min_limit=1, max_limit=32)
+
+def get_concurrency_metrics() -> dict:
+    """Returns the adaptive concurrency limit, in-flight calls and outcome counters."""
+    return _concurrency.metrics()
+
+# Shares the adaptive limit fairly between jobs: calls are tagged with the
+# tenant of their context (see fair_scheduler.tenant_scope) and admitted by
+# weighted fair queuing. Per-tenant limits default to the
+# LLM_SESSION_MAX_CONCURRENCY and LLM_SESSION_CALLS_PER_MINUTE variables.
+_scheduler = FairScheduler(capacity=lambda: _concurrency.limit)
+_scheduler_configured = False
+
+def configure_fair_scheduling(max_concurrent_per_tenant: Optional[int] = None,
+                              calls_per_minute_per_tenant: Optional[int] = None):
+    """Sets per-tenant limits on concurrent calls and calls per minute; None means unlimited."""
+    global _scheduler_configured
+    _scheduler.configure(max_concurrent_per_tenant, calls_per_minute_per_tenant)
+    _scheduler_configured = True
+
+def get_scheduler_metrics() -> dict:
+    """Returns in-flight and queued calls overall and per tenant."""
+    return _scheduler.metrics()
+
+def _is_rate_limit_error(error: Exception) -> bool:
+    """True for quota / HTTP 429 errors from the Gemini API."""
+    if getattr(error, "code", None) == 429 or getattr(error, "status_code", None) == 429:
+        return True
+    message = str(error)
+    return "429" in message or "RESOURCE_EXHAUSTED" in message
+
+# Per-agent routing. Ranking and validation are short classification-style
+# tasks, so they default to the smaller model with tight output caps.
+# A route's fallback model is used after PRIMARY_ATTEMPTS failed attempts.
+# "max_output_tokens" and "temperature" of None leave the model defaults; the
+# extractor is uncapped because a long document's concept list must not be cut off.
+MODEL_ROUTES = {
+    "extractor": {"model": MODEL_NAME, "fallback_model": "gemini-1.5-flash-8b", "max_output_tokens": None, "temperature": 0.2},
+    "organizer": {"model": MODEL_NAME, "fallback_model": "gemini-1.5-flash-8b", "max_output_tokens": 8192, "temperature": 0.2},
+    "generator": {"model": MODEL_NAME, "fallback_model": "gemini-1.5-flash-8b", "max_output_tokens": 512, "temperature": 0.7},
+    "ranker": {"model": "gemini-1.5-flash-8b", "fallback_model": MODEL_NAME, "max_output_tokens": 64, "temperature": 0.0},
+    "validator": {"model": "gemini-1.5-flash-8b", "fallback_model": MODEL_NAME, "max_output_tokens": 1024, "temperature": 0.0},
+}
+DEFAULT_ROUTE = {"model": MODEL_NAME, "fallback_model": None, "max_output_tokens": None, "temperature": None}
+
+PRIMARY_ATTEMPTS = 2
+# After this many consecutive failures a model is skipped in favour of the
+# fallback for FAILOVER_COOLDOWN_SECONDS.
+FAILOVER_THRESHOLD = 3
+FAILOVER_COOLDOWN_SECONDS = 60
+
+def get_route(agent: Optional[str] = None) -> dict:
+    """
+    Returns the routing entry for an agent. The model can be overridden per
+    agent with the LLM_MODEL_<AGENT> environment variable (e.g. LLM_MODEL_RANKER).
+    """
+    _load_env()
+    route = dict(MODEL_ROUTES.get(agent, DEFAULT_ROUTE), agent=agent)
+    if agent and os.getenv(f"LLM_MODEL_{agent.upper()}"):
+        route["model"] = os.getenv(f"LLM_MODEL_{agent.upper()}")
+    return route
+
+# Typical duration of one call per agent, used for deadline planning until
+# enough real latencies have been observed.
+DEFAULT_CALL_ESTIMATES = {"extractor": 15.0, "organizer": 15.0, "generator": 6.0, "ranker": 2.0, "validator": 6.0}
+
+# Lower bound for estimates, so instant calls (a replay or stand-in without
+# simulated latency) cannot make a call look free.
+MIN_CALL_ESTIMATE_SECONDS = 0.05
+
+def estimate_call_seconds(agent: str) -> float:
+    """
+    Estimates how long one call for `agent` takes: the p90 latency of the
+    agent's own recent calls once at least 5 were seen, else a static default.
+    Agents sharing a model are estimated separately, since their prompts
+    differ widely in size.
+    """
+    stats = _agent_stats_for(agent)
+    if stats.sample_count() >= 5:
+        return max(MIN_CALL_ESTIMATE_SECONDS, stats.percentile(90))
+    return DEFAULT_CALL_ESTIMATES.get(agent, 10.0)
+
+def configure_route(agent: str, **settings):
+    """Updates an agent's route, e.g. configure_route("ranker", model="gemini-1.5-flash")."""
+    MODEL_ROUTES[agent] = {**MODEL_ROUTES.get(agent, DEFAULT_ROUTE), **settings}
+
+
+class ModelStats:
+    """Thread-safe call, failure and latency statistics for one model."""
+
+    WINDOW = 200
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self.calls = 0
+        self.failures = 0
+        self.consecutive_failures = 0
+        self.last_failure_at = 0.0
+        self._latencies = deque(maxlen=self.WINDOW)
+
+    def record(self, latency: float, ok: bool):
+        with self._lock:
+            self.calls += 1
+            if ok:
+                self.consecutive_failures = 0
+                self._latencies.append(latency)
+            else:
+                self.failures += 1
+                self.consecutive_failures += 1
+                self.last_failure_at = time.monotonic()
+
+    def in_cooldown(self) -> bool:
+        with self._lock:
+            return (
+                self.consecutive_failures >= FAILOVER_THRESHOLD
+                and time.monotonic() - self.last_failure_at < FAILOVER_COOLDOWN_SECONDS
+            )
+
+    def percentile(self, pct: float) -> Optional[float]:
+        """Returns the given latency percentile (0-100) of recent successful calls."""
+        with self._lock:
+            latencies = sorted(self._latencies)
+        if not latencies:
+            return None
+        return latencies[min(len(latencies) - 1, int(len(latencies) * pct / 100))]
+
+    def sample_count(self) -> int:
+        with self._lock:
+            return len(self._latencies)
+
+    def snapshot(self) -> dict:
+        p50, p95 = self.percentile(50), self.percentile(95)
+        with self._lock:
+            return {
+                "calls": self.calls,
+                "failures": self.failures,
+                "consecutive_failures": self.consecutive_failures,
+                "p50_seconds": round(p50, 3) if p50 is not None else None,
+                "p95_seconds": round(p95, 3) if p95 is not None else None,
+            }
+
+
+_model_stats = {}
+_stats_lock = threading.Lock()
+
+def _stats_for(model_name: str) -> ModelStats:
+    with _stats_lock:
+        if model_name not in _model_stats:
+            _model_stats[model_name] = ModelStats()
+        return _model_stats[model_name]
+
+# Latencies of successful calls per agent, for estimate_call_seconds.
+_agent_stats = {}
+
+def _agent_stats_for(agent: Optional[str]) -> ModelStats:
+    with _stats_lock:
+        if agent not in _agent_stats:
+            _agent_stats[agent] = ModelStats()
+        return _agent_stats[agent]
+
+def _record_success(model_name: str, agent: Optional[str], latency: float):
+    _stats_for(model_name).record(latency, ok=True)
+    _agent_stats_for(agent).record(latency, ok=True)
+
+def get_model_stats() -> dict:
+    """Returns call counts, failures and p50/p95 latency per model."""
+    with _stats_lock:
+        models = list(_model_stats.items())
+    return {name: stats.snapshot() for name, stats in models}
+
+class HedgePolicy:
+    """
+    Settings and budget for hedged requests.
+
+    A call that is still running after the `percentile` latency of its agent's
+    recent calls gets one duplicate request, and whichever finishes first wins.
+    Each call adds `budget_ratio` to a token bucket (capped at `max_tokens`)
+    and each hedge spends one token. This caps hedges at about `budget_ratio`
+    of all calls. No hedging happens before `min_samples` latencies are known.
+    """
+
+    def __init__(self, enabled=False, percentile=95, budget_ratio=0.1, max_tokens=10, min_samples=20):
+        self._lock = threading.Lock()
+        self.configure(enabled, percentile, budget_ratio, max_tokens, min_samples)
+        self._tokens = 0.0
+        self.hedges = 0
+        self.hedge_wins = 0
+        self.denied = 0
+
+    def configure(self, enabled, percentile=95, budget_ratio=0.1, max_tokens=10, min_samples=20):
+        self.enabled = enabled
+        self.percentile = percentile
+        self.budget_ratio = budget_ratio
+        self.max_tokens = max_tokens
+        self.min_samples = min_samples
+
+    def earn(self):
+        with self._lock:
+            self._tokens = min(self.max_tokens, self._tokens + self.budget_ratio)
+
+    def try_spend(self) -> bool:
+        with self._lock:
+            if self._tokens >= 1.0:
+                self._tokens -= 1.0
+                self.hedges += 1
+                return True
+            self.denied += 1
+            return False
+
+    def record_win(self):
+        with self._lock:
+            self.hedge_wins += 1
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {
+                "enabled": self.enabled,
+                "hedges": self.hedges,
+                "hedge_wins": self.hedge_wins,
+                "denied_by_budget": self.denied,
+                "budget_tokens": round(self._tokens, 2),
+            }
+
+
+# Off by default; the LLM_HEDGING environment variable is read on first use.
+_hedging = HedgePolicy()
+_hedging_configured = False
+# Holder for the API time of the current call, which the cassette records.
+# _generate_once fills it, so rate-limiter waits, slot queueing and retries
+# are not recorded as latency.
+_api_seconds = contextvars.ContextVar("llm_api_seconds", default=None)
+
+# Runs backup requests only; primaries run on their own threads.
+_hedge_executor = ThreadPoolExecutor(max_workers=16, thread_name_prefix="llm-hedge")
+
+def configure_hedging(enabled: bool = True, percentile: float = 95, budget_ratio: float = 0.1,
+                      max_tokens: float = 10, min_samples: int = 20):
+    """Turns hedged requests on or off. See HedgePolicy for the settings."""
+    global _hedging_configured
+    _hedging.configure(enabled, percentile, budget_ratio, max_tokens, min_samples)
+    _hedging_configured = True
+
+def get_hedging_metrics() -> dict:
+    """Returns how many hedges were sent, won, or denied by the budget."""
+    return _hedging.metrics()
+
+# Optional record/replay of API calls, see src/utils/cassette.py. Defaults to
+# the LLM_CASSETTE ("record" or "replay") environment variable.
+_cassette = None
+_cassette_configured = False
+
+def configure_cassette(mode: Optional[str], path: Optional[str] = None, latency_scale: float = 1.0):
+    """
+    Records API calls to, or replays them from, a cassette file.
+
+    Args:
+        mode (str): "record", "replay", or None to turn the cassette off.
+        path (str, optional): The cassette file. Defaults to cassettes/llm_calls.jsonl.
+        latency_scale (float): Multiplier for the recorded latencies simulated
+            on replay; 0 replays without delay.
+    """
+    global _cassette, _cassette_configured
+    _cassette = Cassette(path or DEFAULT_CASSETTE_PATH, mode, latency_scale) if mode else None
+    _cassette_configured = True
+
+def get_cassette_metrics() -> Optional[dict]:
+    """Returns recorded, hit and miss counts of the active cassette, if any."""
+    return _cassette.metrics() if _cassette is not None else None
+
+# Optional local stand-in that answers every call without the API, see
+# src/utils/stand_in_llm.py. Defaults to the LLM_STAND_IN environment variable.
+_stand_in = None
+_stand_in_configured = False
+
+def configure_stand_in(enabled: bool = True, latency_scale: float = 1.0):
+    """
+    Answers every API call from the local stand-in LLM instead of Gemini,
+    for load tests.
+
+    Args:
+        enabled (bool): False turns the stand-in off again.
+        latency_scale (float): Multiplier for the simulated call latencies;
+            0 answers without delay.
+    """
+    global _stand_in, _stand_in_configured
+    from src.utils.stand_in_llm import StandInLLM
+
+    _stand_in = StandInLLM(latency_scale) if enabled else None
+    _stand_in_configured = True
+
+def get_stand_in_metrics() -> Optional[dict]:
+    """Returns call counts per agent of the active stand-in, if any."""
+    return _stand_in.metrics() if _stand_in is not None else None
+
+def call_gemini_api(prompt: str, agent: Optional[str] = None) -> str:
     """
     Calls Gemini API or returns empty string in mock mode.
     Returns plain text.
+
+    `agent` selects the model, output cap and temperature from MODEL_ROUTES.
+    Identical prompts that are already in flight (same model and prompt hash)
+    are not sent again; concurrent callers share the one response.
+    With a cassette configured, responses are recorded to or replayed from it;
+    with the stand-in configured, the local stand-in LLM answers instead.
+    Calls wait their turn in the fair scheduler, tagged with the caller's tenant.
     """
     # In mock mode, don't make API calls
-    if MODE == "mock":
+    if get_mode() == "mock":
         print("Mock mode: Skipping API call")
         return ""
-    
-    try:
-        # Only import when actually needed (live mode)
-        import google.genai as genai
-        
-        # Configure the API key
-        api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
-        if not api_key:
-            raise ValueError("Please set GOOGLE_API_KEY or GEMINI_API_KEY in your .env file")
-
-        client = genai.Client(api_key=api_key)
-        MODEL_NAME = "gemini-1.5-flash"
-        
-        response = client.models.generate_content(
-            model=MODEL_NAME,
-            contents=prompt
-        )
-        return response.text
-        
-    except ImportError:
-        print("Error: google-genai package not installed. Install with: pip install google-genai")
-        return ""
-    except Exception as e:
-        print(f"Error calling Gemini API: {e}")
+
+    route = get_route(agent)
+    key = hashlib.sha256(f"{route['model']}\0{prompt}".encode()).hexdigest()
+    return _inflight_calls.do(key, _call_route, prompt, route)
+
+def _call_route(prompt: str, route: dict) -> str:
+    """Serves one call from the stand-in, from the cassette in replay mode, else from the API."""
+    cassette = _cassette
+    stand_in = _stand_in
+    with _scheduler.slot(call_cost(prompt)):
+        if stand_in is not None:
+            return _stand_in_call(stand_in, prompt, route)
+        if cassette is not None and cassette.mode == REPLAY:
+            return _replay(cassette, prompt, route)
+
+        timing = {}
+        token = _api_seconds.set(timing)
+        try:
+            response = _generate(prompt, route)
+        finally:
+            _api_seconds.reset(token)
+    if cassette is not None and response:
+        cassette.record(route["model"], prompt, response, timing.get("seconds", 0.0), agent=route.get("agent"))
+    return response
+
+def _replay(cassette: Cassette, prompt: str, route: dict) -> str:
+    """
+    Answers a call from the cassette. The recorded latency is simulated inside
+    a concurrency slot, so replays load the limiter and latency statistics
+    like real calls. Unrecorded calls fail like an API error.
+    """
+    entry = cassette.lookup(route["model"], prompt)
+    if entry is None:
+        print(f"Cassette miss ({route['model']}): prompt was not recorded")
         return ""
+
+    with _concurrency.slot(latency_key=route.get("agent"), cost=call_cost(prompt)):
+        delay = cassette.replay_delay(entry)
+        if delay > 0:
+            time.sleep(delay)
+    _record_success(route["model"], route.get("agent"), delay)
+    return entry["response"]
+
+def _stand_in_call(stand_in, prompt: str, route: dict) -> str:
+    """Answers a call from the stand-in after its simulated latency, inside a concurrency slot like _replay."""
+    with _concurrency.slot(latency_key=route.get("agent"), cost=call_cost(prompt)):
+        delay = stand_in.delay(route.get("agent"))
+        if delay > 0:
+            time.sleep(delay)
+        response = stand_in.respond(route.get("agent"), prompt)
+    _record_success(route["model"], route.get("agent"), delay)
+    return response
+
+def _generate(prompt: str, route: dict) -> str:
+    """
+    Sends one prompt along a route: up to PRIMARY_ATTEMPTS tries on the
+    primary model, then one on the fallback model. A primary model in failure
+    cooldown is skipped. Returns an empty string if every attempt fails.
+    """
+    attempts = []
+    if not _stats_for(route["model"]).in_cooldown() or not route.get("fallback_model"):
+        attempts += [route["model"]] * PRIMARY_ATTEMPTS
+    if route.get("fallback_model"):
+        attempts.append(route["fallback_model"])
+
+    for model_name in attempts:
+        try:
+            return _generate_hedged(prompt, model_name, route)
+        except ImportError:
+            print("Error: google-genai package not installed. Install with: pip install google-genai")
+            return ""
+        except Exception as e:
+            print(f"Error calling Gemini API ({model_name}): {e}")
+    return ""
+
+_client = None
+_client_lock = threading.Lock()
+
+def _get_client():
+    """Creates the Gemini client once per process."""
+    global _client
+    with _client_lock:
+        if _client is None:
+            # Only import when actually needed (live mode)
+            import google.genai as genai
+
+            # Configure the API key
+            api_key = os.getenv("GOOGLE_API_KEY") or os.getenv("GEMINI_API_KEY")
+            if not api_key:
+                raise ValueError("Please set GOOGLE_API_KEY or GEMINI_API_KEY in your .env file")
+            _client = genai.Client(api_key=api_key)
+        return _client
+
+def _generate_hedged(prompt: str, model_name: str, route: dict) -> str:
+    """
+    Calls the model, sending one duplicate request if the first is slower than
+    the hedging percentile and the hedge budget allows it. The first successful
+    response wins. The slower request cannot be interrupted mid-flight, so its
+    result is simply discarded.
+
+    The hedge delay counts from when the first request is actually sent, so
+    time spent waiting for the rate limiter or a concurrency slot does not
+    trigger a hedge. The first request runs on a thread of its own rather
+    than in the backup pool, so hedging never caps concurrent calls.
+    """
+    if not _hedging.enabled:
+        return _generate_once(prompt, model_name, route)
+
+    _hedging.earn()
+    # Per agent, since one model serves prompts of very different sizes.
+    stats = _agent_stats_for(route.get("agent"))
+    delay = stats.percentile(_hedging.percentile) if stats.sample_count() >= _hedging.min_samples else None
+    if delay is None:
+        return _generate_once(prompt, model_name, route)
+
+    sent = threading.Event()
+    primary = _start_primary(prompt, model_name, route, sent)
+    sent.wait()
+    done, _ = wait([primary], timeout=delay)
+    if done or not _hedging.try_spend():
+        return primary.result()
+
+    backup = _hedge_executor.submit(contextvars.copy_context().run, _generate_once, prompt, model_name, route)
+    pending = {primary, backup}
+    error = None
+    while pending:
+        done, pending = wait(pending, return_when=FIRST_COMPLETED)
+        for future in done:
+            if future.exception() is None:
+                for other in pending:
+                    other.cancel()
+                if future is backup:
+                    _hedging.record_win()
+                return future.result()
+            error = future.exception()
+    raise error
+
+def _start_primary(prompt: str, model_name: str, route: dict, sent: threading.Event) -> Future:
+    """
+    Runs `_generate_once` on a new daemon thread in a copy of the caller's
+    context. `sent` is set when the request goes out, or when the call ends
+    without sending it.
+    """
+    future = Future()
+    context = contextvars.copy_context()
+
+    def run():
+        future.set_running_or_notify_cancel()
+        try:
+            future.set_result(context.run(_generate_once, prompt, model_name, route, sent))
+        except BaseException as e:
+            future.set_exception(e)
+        finally:
+            sent.set()
+
+    threading.Thread(target=run, name="llm-primary", daemon=True).start()
+    return future
+
+def _generate_once(prompt: str, model_name: str, route: dict, sent: threading.Event = None) -> str:
+    """
+    Makes a single API call and records its latency, also for the cassette.
+    Raises on failure. `sent`, if given, is set just before the request goes out.
+    """
+    from google.genai import types
+
+    client = _get_client()
+    config = types.GenerateContentConfig(
+        max_output_tokens=route.get("max_output_tokens"),
+        temperature=route.get("temperature")
+    )
+
+    _rate_limiter.acquire()
+    stats = _stats_for(model_name)
+    with _concurrency.slot(latency_key=route.get("agent"), cost=call_cost(prompt)) as call:
+        started = time.perf_counter()
+        if sent is not None:
+            sent.set()
+        try:
+            response = client.models.generate_content(
+                model=model_name,
+                contents=prompt,
+                config=config
+            )
+            if not response.text:
+                raise ValueError("Empty response")
+        except Exception as e:
+            call.outcome = "rate_limited" if _is_rate_limit_error(e) else "error"
+            stats.record(time.perf_counter() - started, ok=False)
+            raise
+        latency = time.perf_counter() - started
+        _record_success(model_name, route.get("agent"), latency)
+    timing = _api_seconds.get()
+    if timing is not None:
+        # The first successful request of a hedged pair is the one that answered.
+        timing.setdefault("seconds", latency)
+    return response.text
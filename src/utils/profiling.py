@@ -0,0 +1,215 @@
+"""
+Opt-in CPU and memory profiling of pipeline stages.
+
+Each profiled stage writes two artifacts to the run's directory:
+`<stage>.prof`, a cProfile dump readable with `pstats` or snakeviz, and
+`<stage>.json` with wall and CPU time, the tracemalloc peak and the top
+functions and allocation sites. `summarize` merges the stage files of a run
+into `summary.json` and ranks the hot spots across stages.
+
+cProfile only sees the thread that runs the stage, so work done in helper
+threads (e.g. the generator's parallel requests) shows up as waiting time.
+tracemalloc is process-wide: profile one run at a time for clean numbers.
+
+Print the report of a finished run with:
+
+    python -m src.utils.profiling profiles/<run>
+"""
+
+import cProfile
+import glob
+import json
+import logging
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+import uuid
+from contextlib import contextmanager
+
+PROFILE_ROOT = "profiles"
+TOP_N = 15
+
+_tracing_lock = threading.Lock()
+_tracing_users = 0
+
+
+def new_run_dir(root: str = PROFILE_ROOT) -> str:
+    """Creates and returns a fresh artifact directory for one run."""
+    run_dir = os.path.join(root, f"{time.strftime('%Y%m%d-%H%M%S')}-{uuid.uuid4().hex[:6]}")
+    os.makedirs(run_dir, exist_ok=True)
+    return run_dir
+
+
+def _start_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+        _tracing_users += 1
+
+
+def _stop_tracing():
+    global _tracing_users
+    with _tracing_lock:
+        _tracing_users -= 1
+        if _tracing_users == 0:
+            tracemalloc.stop()
+
+
+def _hot_functions(profiler: cProfile.Profile, top: int) -> list:
+    """The functions with the most time spent in their own code."""
+    stats = pstats.Stats(profiler).stats
+    rows = sorted(stats.items(), key=lambda item: item[1][2], reverse=True)[:top]
+    return [
+        {
+            "function": pstats.func_std_string(func),
+            "calls": calls,
+            "self_seconds": round(self_time, 4),
+            "cumulative_seconds": round(cumulative, 4),
+        }
+        for func, (_, calls, self_time, cumulative, _) in rows
+    ]
+
+
+def _top_allocations(before, after, top: int) -> list:
+    """The source lines whose allocations grew the most during the stage."""
+    ignore = (tracemalloc.Filter(False, tracemalloc.__file__), tracemalloc.Filter(False, __file__))
+    growth = after.filter_traces(ignore).compare_to(before.filter_traces(ignore), "lineno")
+    return [
+        {
+            "location": f"{stat.traceback[0].filename}:{stat.traceback[0].lineno}",
+            "size_kib": round(stat.size_diff / 1024, 1),
+            "count": stat.count_diff,
+        }
+        for stat in growth[:top]
+        if stat.size_diff > 0
+    ]
+
+
+@contextmanager
+def profile_stage(run_dir: str, stage: str, top: int = TOP_N):
+    """
+    Profiles the enclosed block as `stage` and writes its artifacts to
+    `run_dir`. Does nothing when `run_dir` is None.
+    """
+    if not run_dir:
+        yield
+        return
+
+    os.makedirs(run_dir, exist_ok=True)
+    _start_tracing()
+    tracemalloc.reset_peak()
+    memory_before = tracemalloc.get_traced_memory()[0]
+    snapshot_before = tracemalloc.take_snapshot()
+
+    profiler = cProfile.Profile()
+    try:
+        profiler.enable()
+    except ValueError:
+        # Another profiler is already active on this interpreter.
+        profiler = None
+
+    wall_started, cpu_started = time.perf_counter(), time.process_time()
+    try:
+        yield
+    finally:
+        wall = time.perf_counter() - wall_started
+        cpu = time.process_time() - cpu_started
+        if profiler is not None:
+            profiler.disable()
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot_after = tracemalloc.take_snapshot()
+        _stop_tracing()
+
+        report = {
+            "stage": stage,
+            "wall_seconds": round(wall, 4),
+            "process_cpu_seconds": round(cpu, 4),
+            "memory_peak_kib": round((peak - memory_before) / 1024, 1),
+            "memory_retained_kib": round((current - memory_before) / 1024, 1),
+            "top_allocations": _top_allocations(snapshot_before, snapshot_after, top),
+            "hot_functions": _hot_functions(profiler, top) if profiler is not None else [],
+        }
+        if profiler is not None:
+            profiler.dump_stats(os.path.join(run_dir, f"{stage}.prof"))
+        with open(os.path.join(run_dir, f"{stage}.json"), "w", encoding="utf-8") as f:
+            json.dump(report, f, indent=2)
+
+
+class StageProfiler:
+    """
+    Profiles consecutive stages of one run: `switch(stage)` ends the current
+    stage and starts the next, `close()` ends the last one and writes the
+    run summary. A profiler without a `run_dir` does nothing.
+    """
+
+    def __init__(self, run_dir: str = None):
+        self.run_dir = run_dir
+        self._current = None
+
+    def switch(self, stage: str = None):
+        if self._current is not None:
+            self._current.__exit__(None, None, None)
+            self._current = None
+        if self.run_dir and stage:
+            self._current = profile_stage(self.run_dir, stage)
+            self._current.__enter__()
+
+    def close(self):
+        self.switch(None)
+        if self.run_dir:
+            summary = summarize(self.run_dir)
+            for line in format_hot_spots(summary, top=5).splitlines():
+                logging.info(f"[Profile] {line}")
+
+
+def summarize(run_dir: str, top: int = TOP_N) -> dict:
+    """
+    Merges the stage reports in `run_dir` into `summary.json` and returns it.
+    Hot spots are the functions with the most self time across all stages.
+    """
+    stages = []
+    for path in sorted(glob.glob(os.path.join(run_dir, "*.json"))):
+        if os.path.basename(path) == "summary.json":
+            continue
+        with open(path, "r", encoding="utf-8") as f:
+            stages.append(json.load(f))
+    stages.sort(key=lambda report: report["wall_seconds"], reverse=True)
+
+    hot_spots = sorted(
+        ({"stage": report["stage"], **row} for report in stages for row in report["hot_functions"]),
+        key=lambda row: row["self_seconds"],
+        reverse=True
+    )[:top]
+    summary = {
+        "run_dir": run_dir,
+        "stages": [
+            {key: report[key] for key in ("stage", "wall_seconds", "process_cpu_seconds", "memory_peak_kib")}
+            for report in stages
+        ],
+        "hot_spots": hot_spots,
+    }
+    with open(os.path.join(run_dir, "summary.json"), "w", encoding="utf-8") as f:
+        json.dump(summary, f, indent=2)
+    return summary
+
+
+def format_hot_spots(summary: dict, top: int = 10) -> str:
+    """Renders a run summary as plain text: time per stage, then the top functions."""
+    lines = [
+        f"{s['stage']}: {s['wall_seconds']:.3f}s wall, {s['process_cpu_seconds']:.3f}s CPU, "
+        f"peak {s['memory_peak_kib']:.0f} KiB"
+        for s in summary["stages"]
+    ]
+    lines += [
+        f"{row['self_seconds']:.4f}s self in {row['function']} ({row['calls']} calls, {row['stage']})"
+        for row in summary["hot_spots"][:top]
+    ]
+    return "\n".join(lines)
+
+
+if __name__ == "__main__":
+    import sys
+    print(format_hot_spots(summarize(sys.argv[1]), top=TOP_N))
@@ -0,0 +1,127 @@
+"""
+Prompt templates shared by the agents.
+
+A template is a static instruction block followed by named input sections.
+The instructions never change between calls, so every prompt of a template
+starts with the same prefix, which providers can cache. The sections come
+last, ordered from the input shared by most calls (e.g. the source text) to
+the most specific one (e.g. the concept), so consecutive calls of one run
+share an even longer prefix. Structured inputs are sent as compact JSON.
+
+Each render records the prompt's estimated token count; `get_prompt_stats`
+reports them per template. `parse` reverses a render, which lets the local
+stand-in LLM read a prompt's inputs.
+"""
+
+import json
+import threading
+
+from src.utils.text_normalization import estimate_tokens
+
+
+def compact_json(value) -> str:
+    """JSON without indentation or spaces after separators."""
+    return json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+class PromptTemplate:
+    """
+    A named prompt: `instructions`, then one "LABEL:\\nvalue" block per
+    section. `sections` is a list of (label, field) pairs; `render` takes the
+    fields as keyword arguments. Strings are inserted as-is, anything else as
+    compact JSON.
+    """
+
+    def __init__(self, name: str, instructions: str, sections: list):
+        self.name = name
+        self.prefix = instructions.strip() + "\n"
+        self.sections = sections
+        self.prefix_tokens = estimate_tokens(self.prefix)
+        _register(self)
+
+    def render(self, **fields) -> str:
+        prompt = self._build(fields)
+        _stats_for(self.name).record(estimate_tokens(prompt))
+        return prompt
+
+    def estimated_tokens(self, **fields) -> int:
+        """Estimated token count of the rendered prompt, without recording it."""
+        return estimate_tokens(self._build(fields))
+
+    def parse(self, prompt: str) -> dict:
+        """
+        Recovers the section values of a prompt rendered from this template,
+        as strings. Sections are split from the end, where the most specific
+        (and shortest) inputs are.
+        """
+        fields = {}
+        rest = prompt
+        for label, field in reversed(self.sections):
+            marker = f"\n{label}:\n"
+            position = rest.rfind(marker)
+            if position < 0:
+                raise ValueError(f"Prompt has no {label} section")
+            fields[field] = rest[position + len(marker):].removesuffix("\n")
+            rest = rest[:position].removesuffix("\n")
+        return fields
+
+    def _build(self, fields: dict) -> str:
+        blocks = [self.prefix]
+        for label, field in self.sections:
+            value = fields[field]
+            blocks.append(f"{label}:\n{value if isinstance(value, str) else compact_json(value)}\n")
+        return "\n".join(blocks)
+
+
+class _TemplateStats:
+    def __init__(self, prefix_tokens: int):
+        self._lock = threading.Lock()
+        self.renders = 0
+        self.total_tokens = 0
+        self.max_tokens = 0
+        self.prefix_tokens = prefix_tokens
+
+    def record(self, tokens: int):
+        with self._lock:
+            self.renders += 1
+            self.total_tokens += tokens
+            self.max_tokens = max(self.max_tokens, tokens)
+
+    def snapshot(self) -> dict:
+        with self._lock:
+            return {
+                "renders": self.renders,
+                "prefix_tokens": self.prefix_tokens,
+                "mean_tokens": round(self.total_tokens / self.renders) if self.renders else 0,
+                "max_tokens": self.max_tokens,
+                "total_tokens": self.total_tokens,
+            }
+
+
+_stats = {}
+_templates = {}
+_registry_lock = threading.Lock()
+
+
+def _register(template: PromptTemplate):
+    with _registry_lock:
+        _templates[template.name] = template
+        _stats.setdefault(template.name, _TemplateStats(template.prefix_tokens))
+
+
+def get_template(name: str) -> PromptTemplate:
+    """Returns the registered template with this name (templates register when their agent module loads)."""
+    with _registry_lock:
+        return _templates[name]
+
+
+def _stats_for(name: str) -> _TemplateStats:
+    with _registry_lock:
+        return _stats[name]
+
+
+def get_prompt_stats() -> dict:
+    """Returns renders and estimated prompt tokens (static prefix, mean, max, total) per template."""
+    with _registry_lock:
+        items = list(_stats.items())
+    return {name: stats.snapshot() for name, stats in items}
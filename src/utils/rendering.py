@@ -0,0 +1,81 @@
+"""
+Pure helpers that turn pipeline results into Markdown for the UI.
+
+Each view is built as one string so the page issues a single element per
+block instead of one per concept or per option line.
+"""
+
+import hashlib
+import json
+
+INDENT = '&#8195;' * 2
+
+
+def result_hash(results) -> str:
+    """Stable hash of a results dict, used as the cache key for derived views."""
+    return hashlib.sha256(json.dumps(results, sort_keys=True, default=str).encode()).hexdigest()
+
+
+class _Label(str):
+    """Marks a generic dict key that should be rendered as a tree entry."""
+
+
+def concept_tree_markdown(data) -> str:
+    """
+    Renders a concept hierarchy as one Markdown block.
+
+    Accepts the organizer's {"concept_map": [...]} output, single
+    {"concept", "children"} nodes, generic nested dicts (as in the mock
+    concepts file) and lists of any of these.
+    """
+    lines = []
+    stack = [(data, 0)]
+    while stack:
+        item, level = stack.pop()
+        indent = INDENT * level
+        if isinstance(item, dict):
+            if "concept_map" in item:
+                stack.append((item["concept_map"], level))
+            elif "concept" in item:
+                lines.append(f"{indent}• **{item.get('concept', 'Unknown')}**")
+                stack.extend((child, level + 1) for child in reversed(item.get("children") or []))
+            else:
+                for key, value in reversed(list(item.items())):
+                    stack.append((value, level + 1))
+                    stack.append((_Label(key), level))
+        elif isinstance(item, list):
+            stack.extend((child, level) for child in reversed(item))
+        elif isinstance(item, _Label):
+            lines.append(f"{indent}• **{item}**")
+    # Two trailing spaces force a line break between entries.
+    return "  \n".join(lines)
+
+
+def _label_or_default(value, default):
+    return value if value and value != 'N/A' else default
+
+
+def question_card(question: dict, validation: dict) -> str:
+    """Renders one quiz question's options, ranking and verdict as Markdown."""
+    correct_answer = question.get("correct_answer")
+    lines = ["**Options:**", ""]
+    for option in question.get("options", []):
+        prefix = "✅" if option == correct_answer else "◻️"
+        lines.append(f"> {prefix} {option}  ")
+    lines += [
+        "",
+        "---",
+        f"**Difficulty:** `{_label_or_default(question.get('difficulty'), 'Medium (Default)')}`  ",
+        f"**Importance:** `{_label_or_default(question.get('importance'), 'Standard')}`  ",
+        f"**Validator Decision:** `{validation.get('decision', 'Pending')}`  ",
+        f"**Validator Reason:** `{validation.get('reason', 'No reason provided')}`",
+    ]
+    return "\n".join(lines)
+
+
+def quiz_cards(quiz: list, validation: list) -> list:
+    """Returns (expander title, body Markdown) pairs for every question."""
+    return [
+        (f"**Question {i}:** {q.get('question', 'N/A')}", question_card(q, v))
+        for i, (q, v) in enumerate(zip(quiz, validation), 1)
+    ]
@@ -0,0 +1,133 @@
+"""
+Local stand-in for the LLM, for load tests without API calls or quota.
+
+Every agent prompt gets a small, well-formed answer built from the prompt's
+own inputs (recovered with PromptTemplate.parse): capitalized phrases of the
+text become concepts, each concept gets one question quoting a sentence of
+the source, and so on. Each answer is returned after a simulated latency.
+Unlike a replayed cassette it needs no recording and accepts any document,
+so it can drive the HTTP API or batch mode at any scale. The answers only
+have realistic shape and timing, not meaning.
+
+Enable it with LLM_STAND_IN=1 (see llm_client.configure_stand_in).
+"""
+
+import hashlib
+import json
+import random
+import re
+import threading
+from collections import Counter
+
+from src.utils.prompts import get_template
+
+# Typical latency of one call per agent, scaled by `latency_scale`.
+DEFAULT_LATENCIES = {"extractor": 1.5, "organizer": 1.5, "generator": 0.6, "ranker": 0.2, "validator": 0.6}
+# Simulated latencies vary uniformly by this share around the typical value.
+LATENCY_JITTER = 0.5
+MAX_CONCEPTS = 12
+
+_PHRASE = re.compile(r"\b[A-Z][A-Za-z0-9-]+(?: [A-Z][A-Za-z0-9-]+)*")
+_SENTENCE_END = re.compile(r"(?<=[.!?])\s+")
+
+
+def _pick(options: list, key: str):
+    """A deterministic choice, so equal prompts get equal answers."""
+    digest = hashlib.sha256(key.encode("utf-8")).digest()
+    return options[digest[0] % len(options)]
+
+
+def _sentences(text: str) -> list:
+    return [s.strip() for s in _SENTENCE_END.split(text) if len(s.strip()) > 20]
+
+
+def _extract(fields: dict) -> list:
+    phrases = Counter(_PHRASE.findall(fields["text"]))
+    top = [phrase for phrase, _ in phrases.most_common(MAX_CONCEPTS)]
+    return [
+        {"concept": phrase, "type": "term", "importance": round(0.95 - 0.05 * rank, 2)}
+        for rank, phrase in enumerate(top)
+    ]
+
+
+def _organize(fields: dict) -> dict:
+    names = json.loads(fields["concepts"])
+    roots = max(1, len(names) // 3)
+    concept_map = [{"concept": name, "children": []} for name in names[:roots]]
+    for i, name in enumerate(names[roots:]):
+        concept_map[i % roots]["children"].append({"concept": name, "children": []})
+    return {"concept_map": concept_map}
+
+
+def _generate(fields: dict) -> dict:
+    concept = fields["concept"]
+    sentences = _sentences(fields["source_text"]) or [f"{concept} is described in the text."]
+    about = [s for s in sentences if concept.lower() in s.lower()] or sentences
+    correct = _pick(about, concept)[:200]
+    distractors = [s[:200] for s in sentences if s[:200] != correct][:3]
+    while len(distractors) < 3:
+        distractors.append(f"{concept} is not mentioned in the text ({len(distractors) + 1}).")
+    options = sorted([correct] + distractors, key=lambda option: hashlib.sha256(option.encode()).hexdigest())
+    return {
+        "concept": concept,
+        "question": f"Which statement about {concept} is supported by the text?",
+        "options": options,
+        "correct_answer": correct,
+    }
+
+
+def _rank(fields: dict) -> dict:
+    return {
+        "difficulty": _pick(["Easy", "Medium", "Hard"], fields["concept"]),
+        "importance": _pick(["Core", "Important", "Supporting"], fields["concept"][::-1]),
+    }
+
+
+def _validate(fields: dict) -> list:
+    questions = json.loads(fields["questions"])
+    return [
+        {"question_number": number, "decision": "Approve", "reason": "Stand-in review: well-formed question."}
+        for number in range(1, len(questions) + 1)
+    ]
+
+
+_RESPONDERS = {
+    "extractor": _extract,
+    "organizer": _organize,
+    "generator": _generate,
+    "ranker": _rank,
+    "validator": _validate,
+}
+
+
+class StandInLLM:
+    """Answers agent prompts locally; thread-safe."""
+
+    def __init__(self, latency_scale: float = 1.0):
+        self.latency_scale = latency_scale
+        self._lock = threading.Lock()
+        self._calls = Counter()
+
+    def respond(self, agent: str, prompt: str) -> str:
+        """
+        Returns the stand-in answer, or an empty string (like a failed call)
+        for unknown agents and prompts not built from the agent's template.
+        """
+        with self._lock:
+            self._calls[agent] += 1
+        if agent not in _RESPONDERS:
+            return ""
+        try:
+            fields = get_template(agent).parse(prompt)
+        except ValueError:
+            return ""
+        return json.dumps(_RESPONDERS[agent](fields))
+
+    def delay(self, agent: str) -> float:
+        """Seconds to wait before answering a call for `agent`."""
+        typical = DEFAULT_LATENCIES.get(agent, 1.0) * self.latency_scale
+        return typical * random.uniform(1 - LATENCY_JITTER, 1 + LATENCY_JITTER)
+
+    def metrics(self) -> dict:
+        with self._lock:
+            return {"calls": dict(self._calls), "latency_scale": self.latency_scale}
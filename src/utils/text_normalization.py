@@ -0,0 +1,100 @@
+"""
+Token-reducing cleanup of ingested text before it reaches any prompt.
+
+PDF text arrives with running headers and footers, page numbers, words
+hyphenated across line breaks and runs of whitespace. All of it would be
+sent verbatim to the extractor and, once per concept, to the generator.
+"""
+
+import math
+import re
+from collections import Counter
+
+PAGE_BREAK = "\f"
+# Lines this close to the top or bottom of a page are header/footer candidates.
+MARGIN_LINES = 3
+# A margin line is boilerplate if it recurs on at least this share of pages.
+REPEAT_RATIO = 0.5
+CHARS_PER_TOKEN = 4
+
+_HYPHENATED_BREAK = re.compile(r"(\w)-[ \t]*\n[ \t]*([a-z])")
+_SPACE_RUN = re.compile("[ \t\u00a0]+")
+_BLANK_LINES = re.compile(r"\n{3,}")
+_DIGITS = re.compile(r"\d+")
+
+
+def estimate_tokens(text: str) -> int:
+    """Rough token count for budgeting: about four characters per token."""
+    return math.ceil(len(text) / CHARS_PER_TOKEN)
+
+
+def _line_key(line: str) -> str:
+    """Compares margin lines with page numbers masked, e.g. "Page # of #"."""
+    return _DIGITS.sub("#", " ".join(line.split())).casefold()
+
+
+def _margin_indexes(lines: list) -> list:
+    """Header/footer candidates: at most a third of a page's non-blank lines at each end."""
+    content = [i for i, line in enumerate(lines) if line.strip()]
+    margin = min(MARGIN_LINES, len(content) // 3)
+    if margin == 0:
+        return []
+    return sorted(set(content[:margin] + content[-margin:]))
+
+
+def strip_repeated_lines(pages: list) -> tuple:
+    """
+    Drops header and footer lines that recur across pages.
+
+    Returns:
+        The cleaned pages and the number of lines removed.
+    """
+    if len(pages) < 2:
+        return pages, 0
+
+    page_lines = [page.split("\n") for page in pages]
+    counts = Counter()
+    for lines in page_lines:
+        counts.update({_line_key(lines[i]) for i in _margin_indexes(lines)})
+    threshold = max(2, math.ceil(len(pages) * REPEAT_RATIO))
+    repeated = {key for key, count in counts.items() if count >= threshold}
+
+    removed = 0
+    cleaned = []
+    for lines in page_lines:
+        drop = {i for i in _margin_indexes(lines) if _line_key(lines[i]) in repeated}
+        removed += len(drop)
+        cleaned.append("\n".join(line for i, line in enumerate(lines) if i not in drop))
+    return cleaned, removed
+
+
+def normalize_text(text: str) -> tuple:
+    """
+    Strips repeated headers/footers (for text with form-feed page breaks),
+    joins words hyphenated across line breaks and collapses whitespace.
+
+    Returns:
+        A (normalized text, report) tuple; the report has the bytes and
+        estimated tokens before and after, and what was removed.
+    """
+    pages, repeated_lines = strip_repeated_lines(text.split(PAGE_BREAK))
+    normalized = "\n\n".join(pages).replace("\u00ad", "")  # soft hyphens
+
+    normalized, hyphenations = _HYPHENATED_BREAK.subn(r"\1\2", normalized)
+    normalized = "\n".join(_SPACE_RUN.sub(" ", line).strip() for line in normalized.split("\n"))
+    normalized = _BLANK_LINES.sub("\n\n", normalized).strip()
+
+    bytes_before, bytes_after = len(text.encode()), len(normalized.encode())
+    tokens_before, tokens_after = estimate_tokens(text), estimate_tokens(normalized)
+    report = {
+        "pages": len(pages),
+        "repeated_lines_removed": repeated_lines,
+        "hyphenations_joined": hyphenations,
+        "bytes_before": bytes_before,
+        "bytes_after": bytes_after,
+        "bytes_saved": bytes_before - bytes_after,
+        "tokens_before": tokens_before,
+        "tokens_after": tokens_after,
+        "tokens_saved": tokens_before - tokens_after,
+    }
+    return normalized, report
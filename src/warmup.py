@@ -0,0 +1,112 @@
+"""
+Cache warm-up: runs the pipeline over the web app's example topics and an
+optional corpus directory so their agent outputs are already cached.
+
+Usage:
+    python -m src.warmup [--corpus path/to/documents] [--no-topics] [--workers 2]
+
+The web app can also warm up in the background at server start, see
+SCHOLARA_WARMUP in streamlit_app.py. Warm-up runs use the default pipeline
+settings, so later runs of the same text hit the cache at every stage.
+"""
+
+import argparse
+import json
+import logging
+import os
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from src.batch import discover_documents
+from src.run_pipeline import configure_logging, run_full_pipeline
+from src.topics import CUSTOM_TEXT, PRE_CANNED_TEXT
+from src.utils.documents import load_document
+from src.utils.fair_scheduler import tenant_scope
+from src.utils.llm_client import get_mode
+
+DEFAULT_WORKERS = 2
+# Warm-up calls yield to interactive jobs in the fair scheduler.
+WARMUP_WEIGHT = 0.5
+
+
+def warmup_sources(corpus_dir: str = None, include_topics: bool = True) -> list:
+    """Returns (name, loader) pairs for every text to warm up."""
+    sources = []
+    if include_topics:
+        sources += [
+            (f"topic: {name}", lambda text=text: text)
+            for name, text in PRE_CANNED_TEXT.items() if name != CUSTOM_TEXT
+        ]
+    if corpus_dir:
+        sources += [(path, lambda path=path: load_document(path)) for path in discover_documents(corpus_dir)]
+    return sources
+
+
+def _warm_one(name, load) -> bool:
+    started = time.perf_counter()
+    try:
+        source_text = load()
+        if not source_text.strip():
+            raise ValueError("Document contains no text")
+        with tenant_scope(f"warmup:{name}", weight=WARMUP_WEIGHT):
+            run_full_pipeline(source_text)
+    except Exception as e:
+        logging.warning(f"[Warm-up] FAILED: {name} ({type(e).__name__}: {e})")
+        return False
+    logging.info(f"[Warm-up] Cached {name} ({time.perf_counter() - started:.1f}s)")
+    return True
+
+
+def warm_up(corpus_dir: str = None, include_topics: bool = True, workers: int = DEFAULT_WORKERS) -> dict:
+    """
+    Runs the pipeline over the example topics and the documents in
+    `corpus_dir`, filling the agent cache. Does nothing in mock mode.
+
+    Returns:
+        Counts of "ok" and "error" sources.
+    """
+    counts = {"ok": 0, "error": 0}
+    if get_mode() != "live":
+        logging.info("[Warm-up] Skipped: the agent cache is only used in live mode.")
+        return counts
+
+    sources = warmup_sources(corpus_dir, include_topics)
+    logging.info(f"[Warm-up] Warming the cache for {len(sources)} inputs.")
+    with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+        for ok in pool.map(lambda source: _warm_one(*source), sources):
+            counts["ok" if ok else "error"] += 1
+    logging.info(f"[Warm-up] Done: {counts['ok']} cached, {counts['error']} failed.")
+    return counts
+
+
+def start_background_warmup(corpus_dir: str = None, include_topics: bool = True,
+                            workers: int = DEFAULT_WORKERS) -> threading.Thread:
+    """Runs `warm_up` in a daemon thread and returns the thread."""
+    thread = threading.Thread(
+        target=warm_up,
+        args=(corpus_dir, include_topics, workers),
+        name="scholara-warmup",
+        daemon=True
+    )
+    thread.start()
+    return thread
+
+
+def main(argv=None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Precompute Scholara AI results for known inputs.")
+    parser.add_argument(
+        "--corpus", default=os.getenv("SCHOLARA_WARMUP_CORPUS"),
+        help="Directory or manifest of documents to warm up (defaults to SCHOLARA_WARMUP_CORPUS)"
+    )
+    parser.add_argument("--no-topics", action="store_true", help="Skip the web app's example topics")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Inputs processed at once")
+    args = parser.parse_args(argv)
+
+    counts = warm_up(args.corpus, include_topics=not args.no_topics, workers=args.workers)
+    print(json.dumps(counts))
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+"""
+Background workers that execute queued pipeline jobs.
+
+Jobs live in the SQLite `jobs` table (see db_manager), so any number of
+worker threads or processes can share one queue. The Streamlit app starts a
+small embedded pool; extra capacity can be added with:
+
+    python -m src.worker --workers 4
+"""
+
+import argparse
+import logging
+import os
+import socket
+import threading
+import time
+import uuid
+
+from src.run_pipeline import configure_logging, run_full_pipeline
+from src.state import PipelineState
+from src.utils import db_manager
+from src.utils.fair_scheduler import tenant_scope
+
+POLL_INTERVAL_SECONDS = 0.5
+# How often a pool requeues jobs whose worker stopped sending heartbeats
+# (see db_manager.JOB_STALE_SECONDS).
+REQUEUE_INTERVAL_SECONDS = 60
+# A running job's heartbeat is refreshed this often, even while one stage
+# takes a long time.
+HEARTBEAT_INTERVAL_SECONDS = 30
+
+
+def _send_heartbeats(job_id, stop):
+    while not stop.wait(HEARTBEAT_INTERVAL_SECONDS):
+        try:
+            db_manager.heartbeat_job(job_id)
+        except Exception as e:
+            logging.warning(f"[Worker] Could not refresh the heartbeat of job {job_id}: {e}")
+
+
+def run_job(job):
+    """
+    Runs one claimed job and records its result or error. Its heartbeat is
+    refreshed every HEARTBEAT_INTERVAL_SECONDS while it runs, so a long stage
+    does not get the job requeued as stale.
+    """
+    job_id = job["id"]
+
+    def on_progress(stage, completed, total):
+        db_manager.update_job_progress(job_id, {"stage": stage, "completed": completed, "total": total})
+
+    state = PipelineState()
+    stop_heartbeats = threading.Event()
+    threading.Thread(
+        target=_send_heartbeats,
+        args=(job_id, stop_heartbeats),
+        name=f"scholara-heartbeat-{job_id[:8]}",
+        daemon=True
+    ).start()
+    try:
+        # Each job is its own tenant in the LLM client's fair scheduler, so a
+        # large document cannot starve the jobs queued behind it.
+        with tenant_scope(job_id, size_chars=len(job["source_text"])):
+            concept_map, quiz, validation = run_full_pipeline(
+                job["source_text"],
+                progress_callback=on_progress,
+                state=state,
+                **(job["settings"] or {})
+            )
+        db_manager.complete_job(job_id, {
+            "concepts": concept_map,
+            "quiz": quiz,
+            "validation": validation,
+            "degraded_stages": state.degraded_stages,
+            "normalization": state.normalization
+        })
+    except Exception as e:
+        logging.exception(f"[Worker] Job {job_id} failed.")
+        db_manager.fail_job(job_id, e)
+    finally:
+        stop_heartbeats.set()
+
+
+class WorkerPool:
+    """A fixed number of daemon threads that claim and run queued jobs."""
+
+    def __init__(self, num_workers=2, poll_interval=POLL_INTERVAL_SECONDS):
+        self.num_workers = num_workers
+        self.poll_interval = poll_interval
+        self._stop = threading.Event()
+        self._threads = []
+        self._prefix = f"{socket.gethostname()}-{os.getpid()}-{uuid.uuid4().hex[:6]}"
+        self._requeue_lock = threading.Lock()
+        self._next_requeue = 0.0
+
+    def start(self):
+        db_manager.init_db()
+        self._requeue_stale_jobs()
+        for i in range(self.num_workers):
+            thread = threading.Thread(
+                target=self._loop,
+                args=(f"{self._prefix}-{i}",),
+                name=f"scholara-worker-{i}",
+                daemon=True
+            )
+            thread.start()
+            self._threads.append(thread)
+        return self
+
+    def stop(self, timeout=None):
+        """Stops claiming new jobs and waits for running ones to finish."""
+        self._stop.set()
+        for thread in self._threads:
+            thread.join(timeout)
+
+    def _requeue_stale_jobs(self):
+        """Requeues orphaned jobs at most every REQUEUE_INTERVAL_SECONDS, from one thread at a time."""
+        if time.monotonic() < self._next_requeue or not self._requeue_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_requeue = time.monotonic() + REQUEUE_INTERVAL_SECONDS
+            requeued = db_manager.requeue_stale_jobs(db_manager.JOB_STALE_SECONDS)
+            if requeued:
+                logging.info(f"[Worker] Requeued {requeued} stale jobs.")
+        except Exception as e:
+            logging.error(f"[Worker] Could not requeue stale jobs: {e}")
+        finally:
+            self._requeue_lock.release()
+
+    def _loop(self, worker_id):
+        while not self._stop.is_set():
+            # Jobs orphaned after start-up, e.g. by a crashed worker process.
+            self._requeue_stale_jobs()
+            try:
+                job = db_manager.claim_next_job(worker_id)
+            except Exception as e:
+                logging.error(f"[Worker] Could not claim a job: {e}")
+                job = None
+            if job is None:
+                self._stop.wait(self.poll_interval)
+                continue
+            run_job(job)
+
+
+def main(argv=None):
+    configure_logging()
+    parser = argparse.ArgumentParser(description="Run Scholara AI pipeline workers.")
+    parser.add_argument("--workers", type=int, default=2, help="Number of worker threads")
+    args = parser.parse_args(argv)
+
+    pool = WorkerPool(num_workers=args.workers).start()
+    logging.info(f"[Worker] {args.workers} workers waiting for jobs.")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pool.stop()
+
+
+if __name__ == "__main__":
+    main()
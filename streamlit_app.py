@@ -1,8 +1,26 @@
+import os
 import streamlit as st
-import pandas as pd
-import pypdf
-import io
-from src.run_pipeline import run_full_pipeline, MODE
+from src.run_pipeline import configure_logging
+from src.topics import CUSTOM_TEXT, PRE_CANNED_TEXT
+from src.utils import db_manager, documents, profiling, rendering
+from src.utils.llm_client import get_mode
+from src.warmup import start_background_warmup
+from src.worker import WorkerPool
+
+configure_logging()
+MODE = get_mode()
+
+# Worker threads started inside the Streamlit server; set to 0 when jobs are
+# handled by separate `python -m src.worker` processes.
+EMBEDDED_WORKERS = int(os.getenv("SCHOLARA_EMBEDDED_WORKERS", "2"))
+JOB_POLL_SECONDS = 1.0
+QUIZ_PAGE_SIZE = 10
+# Time budget per run; slow stages degrade to cheaper paths to meet it.
+DEADLINE_SECONDS = float(os.getenv("SCHOLARA_DEADLINE_SECONDS", "120"))
+# Opt-in per-stage CPU and memory profiling; artifacts go to profiles/<run>/.
+PROFILE_RUNS = os.getenv("SCHOLARA_PROFILE", "").lower() in ("1", "true", "yes")
+# Precompute the example topics (and SCHOLARA_WARMUP_CORPUS) at server start.
+WARMUP_AT_START = os.getenv("SCHOLARA_WARMUP", "").lower() in ("1", "true", "yes")
 
 
 # --- Page Configuration ---
@@ -46,60 +64,87 @@ st.markdown("""
 if "results" not in st.session_state:
     st.session_state.results = None
 if "selected_topic" not in st.session_state:
-    st.session_state.selected_topic = "Custom Text"
-
-# --- Pre-canned Text Examples ---
-PRE_CANNED_TEXT = {
-    "Custom Text": "Paste your own text here or select a topic above...",
-    "Machine Learning & AI": """
-    Machine learning (ML) is a field of inquiry devoted to understanding and building methods that 'learn', that is, methods that leverage data to improve performance on some set of tasks. It is seen as a part of artificial intelligence. Machine learning algorithms build a model based on sample data, known as training data, in order to make predictions or decisions without being explicitly programmed to do so. Machine learning algorithms are used in a wide variety of applications, such as in medicine, email filtering, speech recognition, and computer vision, where it is difficult or unfeasible to develop conventional algorithms to perform the needed tasks.
-    A subset of machine learning is closely related to computational statistics, which focuses on making predictions using computers, but not all machine learning is statistical learning. The study of mathematical optimization delivers methods, theory and application domains to the field of machine learning. Data mining is a related field of study, focusing on exploratory data analysis through unsupervised learning. Some implementations of machine learning use data and neural networks in a way that mimics the working of a biological brain. In its application across business problems, machine learning is also referred to as predictive analytics.
-    """,
-    "The History of the Internet": """
-    The history of the Internet has its origin in the efforts to build and interconnect computer networks that arose from research and development in the United States and involved international collaboration, particularly with researchers in the United Kingdom and France. The ARPANET, as it would become known, was a groundbreaking project. The first successful message on the ARPANET was sent by UCLA student programmer Charley Kline, at 22:30 PST on October 29, 1969, from Boelter Hall.
-    The development of the TCP/IP protocol suite in the 1970s by Vint Cerf and Bob Kahn was a pivotal moment, providing a standard for how data should be packetized, addressed, transmitted, routed, and received. This allowed for the creation of a "network of networks," which is the foundation of the modern Internet. In 1983, the ARPANET migrated to TCP/IP. The 1980s also saw the expansion of the network to academic and military institutions. The commercialization of the Internet began in the late 1980s and early 1990s, but it was the invention of the World Wide Web by Tim Berners-Lee at CERN in 1989 that truly brought the Internet to the public. He developed HTML, HTTP, and the first web browser, making the Internet accessible and user-friendly.
-    """
-}
+    st.session_state.selected_topic = CUSTOM_TEXT
+if "job_id" not in st.session_state:
+    # The job id is mirrored in the URL so a browser refresh resumes polling.
+    st.session_state.job_id = st.query_params.get("job")
+if "job_error" not in st.session_state:
+    st.session_state.job_error = None
+if "results_hash" not in st.session_state:
+    st.session_state.results_hash = None
+if "profile_dir" not in st.session_state:
+    st.session_state.profile_dir = None
+
 
 # --- Helper Functions ---
+@st.cache_resource
+def get_worker_pool():
+    """One worker pool per server process, shared by all sessions and reruns."""
+    return WorkerPool(num_workers=EMBEDDED_WORKERS).start()
+
+@st.cache_resource
+def start_warmup():
+    """Starts the cache warm-up once per server process."""
+    return start_background_warmup(os.getenv("SCHOLARA_WARMUP_CORPUS"))
+
+@st.fragment(run_every=JOB_POLL_SECONDS)
+def poll_job():
+    """Shows the running job's progress and loads its result once it finishes."""
+    job_id = st.session_state.job_id
+    if not job_id or st.session_state.results:
+        return
+
+    job = db_manager.get_job(job_id)
+    if job is None:
+        st.session_state.job_id = None
+        st.session_state.job_error = "The submitted job could not be found."
+        st.rerun()
+    elif job["status"] == "done":
+        st.session_state.results = job["result"]
+        st.session_state.results_hash = rendering.result_hash(job["result"])
+        st.toast("Pipeline executed successfully!")
+        st.rerun()
+    elif job["status"] == "failed":
+        st.session_state.job_id = None
+        st.session_state.job_error = job["error"]
+        st.rerun()
+    else:
+        progress = job["progress"] or {"stage": "queued", "completed": 0, "total": 1}
+        st.progress(
+            progress["completed"] / max(progress["total"], 1),
+            text=f"AI agents are reasoning... (stage: {progress['stage']})"
+        )
+
 def extract_text_from_pdf(pdf_file):
     """Extracts text from an uploaded PDF file."""
     try:
-        pdf_reader = pypdf.PdfReader(io.BytesIO(pdf_file.read()))
-        text = ""
-        for page in pdf_reader.pages:
-            page_text = page.extract_text()
-            if page_text:
-                text += page_text + "\n"
-        return text
+        return documents.extract_text_from_pdf(pdf_file)
     except Exception as e:
         st.error(f"Error reading PDF file: {e}")
         return None
 
-def display_concepts_recursively(data, level=0):
-    """Display concept hierarchy properly."""
-    indent = '&#8195;' * level * 2
-    
-    if isinstance(data, dict):
-        # Handle concept_map wrapper
-        if "concept_map" in data:
-            display_concepts_recursively(data["concept_map"], level)
-        # Handle individual concept nodes
-        elif "concept" in data:
-            concept_name = data.get("concept", "Unknown")
-            st.markdown(f"{indent}• **{concept_name}**")
-            if data.get("children"):
-                for child in data["children"]:
-                    display_concepts_recursively(child, level + 1)
-        else:
-            # Generic dict display
-            for key, value in data.items():
-                st.markdown(f"{indent}• **{key}**")
-                display_concepts_recursively(value, level + 1)
-                
-    elif isinstance(data, list):
-        for item in data:
-            display_concepts_recursively(item, level)
+# Derived views are memoized by result hash; the leading underscore tells
+# st.cache_data not to hash the (possibly large) result itself.
+# When profiling, the first (uncached) build of each view is profiled.
+@st.cache_data(max_entries=32)
+def concept_tree_view(results_hash, _concepts, _profile_dir=None):
+    with profiling.profile_stage(_profile_dir, "render_concepts"):
+        return rendering.concept_tree_markdown(_concepts)
+
+@st.cache_data(max_entries=32)
+def quiz_view(results_hash, _quiz, _validation, _profile_dir=None):
+    with profiling.profile_stage(_profile_dir, "render_quiz"):
+        return rendering.quiz_cards(_quiz, _validation)
+
+@st.cache_data(max_entries=32)
+def validation_frame(results_hash, _validation, _profile_dir=None):
+    with profiling.profile_stage(_profile_dir, "render_validation"):
+        import pandas as pd
+        return pd.DataFrame(_validation)
+
+
+if WARMUP_AT_START and MODE == "live":
+    start_warmup()
 
 
 # --- UI ---
@@ -175,38 +220,63 @@ with input_tab2:
     )
 
 if st.button("🚀 Run Multi-Agent Pipeline"):
+    st.session_state.profile_dir = profiling.new_run_dir() if PROFILE_RUNS else None
     source_text = ""
-    if uploaded_pdf is not None:
-        source_text = extract_text_from_pdf(uploaded_pdf)
-    elif source_text_input.strip() and source_text_input != PRE_CANNED_TEXT["Custom Text"]:
-        source_text = source_text_input
+    with profiling.profile_stage(st.session_state.profile_dir, "ingestion"):
+        if uploaded_pdf is not None:
+            source_text = extract_text_from_pdf(uploaded_pdf)
+        elif source_text_input.strip() and source_text_input != PRE_CANNED_TEXT[CUSTOM_TEXT]:
+            source_text = source_text_input
     
+    st.session_state.results = None
+    st.session_state.job_error = None
     if not source_text:
         st.error("Please provide input by either pasting text, selecting a topic, or uploading a PDF.")
-        st.session_state.results = None
     else:
-        with st.spinner("AI agents are reasoning... This may take a moment."):
-            try:
-                concepts, quiz, validation = run_full_pipeline(source_text)
-                st.session_state.results = {
-                    "concepts": concepts,
-                    "quiz": quiz,
-                    "validation": validation
-                }
-                st.success("Pipeline executed successfully!")
-            except Exception as e:
-                st.error(f"An error occurred during pipeline execution: {e}")
-                st.session_state.results = None
+        get_worker_pool()
+        settings = {"deadline_seconds": DEADLINE_SECONDS}
+        if st.session_state.profile_dir:
+            settings["profile_dir"] = st.session_state.profile_dir
+        st.session_state.job_id = db_manager.create_job(source_text, settings)
+        st.query_params["job"] = st.session_state.job_id
+
+if st.session_state.job_error:
+    st.error(f"An error occurred during pipeline execution: {st.session_state.job_error}")
+
+if st.session_state.job_id and not st.session_state.results:
+    get_worker_pool()
+    poll_job()
 
 # ---- Output Display ----
 if st.session_state.results:
     st.markdown("---")
+
+    degraded_stages = st.session_state.results.get("degraded_stages")
+    if degraded_stages:
+        st.info(
+            "To finish within the time budget, or after a failed LLM call, these stages used a "
+            "faster, simplified path: "
+            + ", ".join(stage.capitalize() for stage in degraded_stages)
+        )
+
+    normalization = st.session_state.results.get("normalization")
+    if normalization and normalization["bytes_saved"] > 0:
+        st.caption(
+            f"Input normalized: {normalization['bytes_saved']:,} bytes "
+            f"(~{normalization['tokens_saved']:,} tokens) removed before prompting."
+        )
     
     # ---- 1. Extracted Concepts ----
     with st.container(border=True):
         st.header("1️⃣ Extracted Concept Hierarchy")
         if st.session_state.results["concepts"]:
-            display_concepts_recursively(st.session_state.results["concepts"])
+            st.markdown(
+                concept_tree_view(
+                    st.session_state.results_hash,
+                    st.session_state.results["concepts"],
+                    st.session_state.profile_dir
+                )
+            )
         else:
             st.warning("No concepts were extracted.")
 
@@ -217,31 +287,17 @@ if st.session_state.results:
         validation_data = st.session_state.results.get("validation")
 
         if quiz_data and validation_data and len(quiz_data) == len(validation_data):
-            for i, (q, v) in enumerate(zip(quiz_data, validation_data), 1):
-                with st.expander(f"**Question {i}:** {q.get('question', 'N/A')}"):
-                    st.markdown("**Options:**")
-                    options = q.get("options", [])
-                    correct_answer = q.get("correct_answer")
-                    for opt in options:
-                        prefix = "✅" if opt == correct_answer else "◻️"
-                        st.markdown(f"> {prefix} {opt}")
-                    
-                    st.markdown("---")
-                    difficulty = q.get('difficulty', 'Not assigned')
-                    if not difficulty or difficulty == 'N/A' or difficulty == '':
-                        difficulty = 'Medium (Default)'
-                    
-                    importance = q.get('importance', 'Not assigned')
-                    if not importance or importance == 'N/A' or importance == '':
-                        importance = 'Standard'
-                    
-                    decision = v.get('decision', 'Pending')
-                    reason = v.get('reason', 'No reason provided')
-                    
-                    st.markdown(f"**Difficulty:** `{difficulty}`")
-                    st.markdown(f"**Importance:** `{importance}`")
-                    st.markdown(f"**Validator Decision:** `{decision}`")
-                    st.markdown(f"**Validator Reason:** `{reason}`")
+            cards = quiz_view(st.session_state.results_hash, quiz_data, validation_data, st.session_state.profile_dir)
+            page_count = (len(cards) - 1) // QUIZ_PAGE_SIZE + 1
+            page = 1
+            if page_count > 1:
+                page = st.number_input(
+                    f"Page (of {page_count})", min_value=1, max_value=page_count, value=1, step=1
+                )
+            start = (page - 1) * QUIZ_PAGE_SIZE
+            for title, body in cards[start:start + QUIZ_PAGE_SIZE]:
+                with st.expander(title):
+                    st.markdown(body)
 
         else:
             st.warning("No quiz questions were generated or validation data is missing/mismatched.")
@@ -252,9 +308,20 @@ if st.session_state.results:
         st.header("3️⃣ Validator Output Analysis")
         if st.session_state.results["validation"]:
             try:
-                df = pd.DataFrame(st.session_state.results["validation"])
+                df = validation_frame(
+                    st.session_state.results_hash,
+                    st.session_state.results["validation"],
+                    st.session_state.profile_dir
+                )
                 st.dataframe(df, use_container_width=True)
             except Exception:
                 st.json(st.session_state.results["validation"])
         else:
-            st.warning("No validation data was produced.")
\ No newline at end of file
+            st.warning("No validation data was produced.")
+
+    # ---- Profile Report ----
+    if st.session_state.profile_dir:
+        with st.expander("⏱️ Run Profile"):
+            summary = profiling.summarize(st.session_state.profile_dir)
+            st.caption(f"Artifacts: `{summary['run_dir']}`")
+            st.code(profiling.format_hot_spots(summary), language=None)
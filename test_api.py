@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the HTTP API, run end to end against the local stand-in LLM.
+"""
+
+import json
+import threading
+import urllib.error
+import urllib.request
+
+from src import api
+from src.worker import WorkerPool
+from testing_support import SAMPLE_TEXT, stand_in_pipeline, temp_database
+
+
+def _request(base, path, body=None, content_type="application/json"):
+    request = urllib.request.Request(base + path, data=body, headers={"Content-Type": content_type})
+    try:
+        with urllib.request.urlopen(request, timeout=10) as response:
+            return response.status, response.read().decode("utf-8")
+    except urllib.error.HTTPError as e:
+        return e.code, e.read().decode("utf-8")
+
+
+def test_submit_poll_fetch_and_stream():
+    with stand_in_pipeline():
+        server = api.create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        pool = WorkerPool(num_workers=1, poll_interval=0.05).start()
+        base = f"http://127.0.0.1:{server.server_port}"
+        try:
+            status, body = _request(base, "/jobs", json.dumps({"source_text": SAMPLE_TEXT, "settings": {"use_cache": False}}).encode())
+            assert status == 202
+            job_id = json.loads(body)["job_id"]
+
+            status, body = _request(base, f"/jobs/{job_id}/events")
+            assert status == 200
+            events = [block.split("\n")[0] for block in body.strip().split("\n\n")]
+            assert events[0] == "event: progress" and events[-1] == "event: done", body
+
+            job = json.loads(_request(base, f"/jobs/{job_id}")[1])
+            assert job["status"] == "done"
+            quiz = json.loads(_request(base, f"/jobs/{job_id}/quiz")[1])
+            assert quiz["quiz"] and len(quiz["quiz"]) == len(quiz["validation"])
+            assert all(q["decision"] == "Approve" for q in quiz["quiz"])
+            concept_map = json.loads(_request(base, f"/jobs/{job_id}/concept-map")[1])["concept_map"]
+            assert concept_map["concept_map"]
+
+            assert _request(base, "/jobs", b"{}")[0] == 400
+            assert _request(base, "/jobs", json.dumps({"source_text": "x", "settings": {"profile_dir": "/"}}).encode())[0] == 400
+            assert _request(base, "/jobs/0123abc")[0] == 404
+        finally:
+            pool.stop(timeout=5)
+            server.shutdown()
+            server.server_close()
+
+
+def test_unfinished_job_has_no_quiz_yet():
+    with temp_database():
+        server = api.create_server(port=0)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        try:
+            status, body = _request(f"http://127.0.0.1:{server.server_port}", "/jobs", SAMPLE_TEXT.encode(), "text/plain")
+            job_id = json.loads(body)["job_id"]
+            assert status == 202
+            assert _request(f"http://127.0.0.1:{server.server_port}", f"/jobs/{job_id}/quiz")[0] == 409
+        finally:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    test_submit_poll_fetch_and_stream()
+    test_unfinished_job_has_no_quiz_yet()
+    print("API tests passed.")
@@ -0,0 +1,44 @@
+#!/usr/bin/env python3
+"""
+Tests for batch mode's resume and skip-by-hash behaviour, run against the
+local stand-in LLM.
+"""
+
+import json
+import os
+import tempfile
+
+from src import batch
+from testing_support import SAMPLE_TEXT, stand_in_pipeline
+
+
+def _statuses(output_path):
+    with open(output_path, "r", encoding="utf-8") as f:
+        return [(os.path.basename(r["path"]), r["status"]) for r in map(json.loads, f)]
+
+
+def test_rerun_skips_completed_documents():
+    directory = tempfile.mkdtemp()
+    for name in ("a.txt", "b.txt"):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(f"{name}. {SAMPLE_TEXT}")
+    manifest = os.path.join(directory, "manifest.txt")
+    with open(manifest, "w", encoding="utf-8") as f:
+        f.write("a.txt\nb.txt\nmissing.txt\n")
+    output = os.path.join(directory, "results.jsonl")
+
+    with stand_in_pipeline():
+        assert batch.run_batch(manifest, output, workers=2) == {"ok": 2, "error": 1, "skipped": 0}
+        assert sorted(_statuses(output)) == [("a.txt", "ok"), ("b.txt", "ok"), ("missing.txt", "error")]
+
+        assert batch.run_batch(manifest, output, workers=2) == {"ok": 0, "error": 1, "skipped": 2}
+
+        # A changed document no longer matches its recorded hash.
+        with open(os.path.join(directory, "b.txt"), "a", encoding="utf-8") as f:
+            f.write(" Plants store the sugars as starch.")
+        assert batch.run_batch(manifest, output, workers=2) == {"ok": 1, "error": 1, "skipped": 1}
+
+
+if __name__ == "__main__":
+    test_rerun_skips_completed_documents()
+    print("Batch tests passed.")
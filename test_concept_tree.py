@@ -0,0 +1,75 @@
+#!/usr/bin/env python3
+"""
+Tests for the local concept-map completeness check and repair.
+"""
+
+from src.utils.concept_tree import ConceptTreeIndex, repair_concept_map
+
+CONCEPTS = [
+    {"concept": "Machine Learning"},
+    {"concept": "Supervised Learning"},
+    {"concept": "Linear Regression"},
+    {"concept": "Web Development"},
+    {"concept": "React"},
+]
+
+SOURCE_TEXT = (
+    "Machine Learning is broadly divided into Supervised Learning and more. "
+    "A common Supervised Learning algorithm is Linear Regression. "
+    "Web Development uses tools like React."
+)
+
+
+def test_complete_tree_is_unchanged():
+    concept_map = {"concept_map": [
+        {"concept": "Machine Learning", "children": [
+            {"concept": "Supervised Learning", "children": [
+                {"concept": "Linear Regression", "children": []}
+            ]}
+        ]},
+        {"concept": "Web Development", "children": [{"concept": "React", "children": []}]},
+    ]}
+    repaired, report = repair_concept_map(concept_map, CONCEPTS, SOURCE_TEXT)
+    assert repaired == concept_map
+    assert report["missing"] == [] and report["attached"] == []
+    assert report["max_depth"] == 2
+
+
+def test_missing_concepts_attached_by_cooccurrence():
+    concept_map = {"concept_map": [
+        {"concept": "Machine Learning", "children": [{"concept": "Supervised Learning", "children": []}]},
+        {"concept": "Web Development", "children": []},
+    ]}
+    index = ConceptTreeIndex.from_concept_map(concept_map, CONCEPTS)
+    assert sorted(index.names[i] for i in index.missing()) == ["Linear Regression", "React"]
+
+    index.attach_missing(SOURCE_TEXT)
+    assert index.is_complete()
+    assert index.depth_of("Linear Regression") == 2
+    assert index.depth_of("React") == 1
+
+
+def test_duplicates_and_cycles_are_dropped():
+    concept_map = {"concept_map": [
+        {"concept": "Machine Learning", "children": [
+            {"concept": "machine learning", "children": [{"concept": "Supervised Learning", "children": []}]},
+        ]},
+        {"concept": "Web Development", "children": [
+            {"concept": "React", "children": []},
+            {"concept": "Supervised Learning", "children": [{"concept": "Linear Regression", "children": []}]},
+        ]},
+    ]}
+    repaired, report = repair_concept_map(concept_map, CONCEPTS, SOURCE_TEXT)
+    assert report["cycles"] == ["Machine Learning"]
+    assert report["duplicates"] == ["Supervised Learning"]
+    assert report["missing"] == []
+    # The cyclic node's child is lifted to its parent; the duplicate's child is kept.
+    assert repaired["concept_map"][0]["children"][0]["concept"] == "Supervised Learning"
+    assert [c["concept"] for c in repaired["concept_map"][1]["children"]] == ["React", "Linear Regression"]
+
+
+if __name__ == "__main__":
+    test_complete_tree_is_unchanged()
+    test_missing_concepts_attached_by_cooccurrence()
+    test_duplicates_and_cycles_are_dropped()
+    print("All concept tree tests passed.")
@@ -0,0 +1,61 @@
+#!/usr/bin/env python3
+"""
+Tests for the adaptive (AIMD) concurrency limit on LLM calls.
+"""
+
+from src.utils.concurrency import AdaptiveConcurrencyLimiter
+
+
+def _complete(limiter, outcome="ok", latency=1.0, cost=1.0, key="generator"):
+    limiter.release(limiter.acquire(), outcome, latency if outcome == "ok" else None, key, cost)
+
+
+def test_successes_increase_the_limit():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4, max_limit=6)
+    for _ in range(4):
+        _complete(limiter)
+    assert 4.9 < limiter.limit < 5.1
+    for _ in range(100):
+        _complete(limiter)
+    assert limiter.limit == 6
+
+
+def test_burst_of_rate_limits_decreases_once():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+    burst = [limiter.acquire() for _ in range(4)]
+    for started in burst:
+        limiter.release(started, "rate_limited")
+    assert limiter.limit == 4
+    assert limiter.metrics()["rate_limited"] == 4
+
+    # A call started after the decrease can decrease again.
+    _complete(limiter, "rate_limited")
+    assert limiter.limit == 2
+
+
+def test_plain_errors_leave_the_limit_alone():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=4)
+    _complete(limiter, "error")
+    assert limiter.limit == 4
+
+
+def test_large_prompt_is_not_a_latency_spike():
+    limiter = AdaptiveConcurrencyLimiter(initial_limit=8)
+    for _ in range(5):
+        _complete(limiter, latency=1.0, cost=0.5)
+    limit = limiter.limit
+    # A document 100 times larger takes about 100 times longer.
+    _complete(limiter, latency=100.0, cost=50.0)
+    assert limiter.limit > limit and limiter.metrics()["latency_backoffs"] == 0
+
+    # The same size taking ten times longer is a spike.
+    _complete(limiter, latency=20.0, cost=1.0)
+    assert limiter.limit < limit and limiter.metrics()["latency_backoffs"] == 1
+
+
+if __name__ == "__main__":
+    test_successes_increase_the_limit()
+    test_burst_of_rate_limits_decreases_once()
+    test_plain_errors_leave_the_limit_alone()
+    test_large_prompt_is_not_a_latency_spike()
+    print("Concurrency limiter tests passed.")
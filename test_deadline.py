@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+Tests for deadline planning and the pipeline's degraded paths, run against
+the local stand-in LLM.
+"""
+
+from src.run_pipeline import _questions_within_budget, run_full_pipeline
+from src.state import PipelineState
+from src.utils import llm_client
+from src.utils.deadline import Deadline
+from testing_support import SAMPLE_TEXT, stand_in_pipeline
+
+
+def _run_with_stand_in(deadline_seconds):
+    state = PipelineState()
+    with stand_in_pipeline():
+        _, quiz, validation = run_full_pipeline(
+            SAMPLE_TEXT, use_cache=False, deadline_seconds=deadline_seconds, state=state
+        )
+    return quiz, validation, state
+
+
+def test_instant_calls_do_not_break_deadline_planning():
+    # Enough zero-latency calls for every agent to replace the static estimates.
+    for _ in range(3):
+        _run_with_stand_in(None)
+    assert llm_client.estimate_call_seconds("generator") >= llm_client.MIN_CALL_ESTIMATE_SECONDS
+    assert _questions_within_budget(Deadline(60), 5, reserve=1) == 5
+
+    quiz, _, state = _run_with_stand_in(60)
+    assert quiz and state.degraded_stages == []
+
+
+def test_estimates_are_kept_per_agent():
+    llm_client._agent_stats_for("test-slow").record(30.0, ok=True)
+    for _ in range(5):
+        llm_client._agent_stats_for("test-fast").record(0.5, ok=True)
+        llm_client._agent_stats_for("test-slow").record(30.0, ok=True)
+    assert llm_client.estimate_call_seconds("test-fast") == 0.5
+    assert llm_client.estimate_call_seconds("test-slow") == 30.0
+
+
+def test_expired_deadline_degrades_every_stage():
+    quiz, validation, state = _run_with_stand_in(0.001)
+    assert state.degraded_stages == ["organizer", "generator", "ranker", "validator"]
+    assert len(quiz) == 1 and quiz[0]["ranked_by"] == "local"
+    assert [v["decision"] for v in validation] == ["Skipped"]
+
+
+if __name__ == "__main__":
+    test_instant_calls_do_not_break_deadline_planning()
+    test_estimates_are_kept_per_agent()
+    test_expired_deadline_degrades_every_stage()
+    print("Deadline tests passed.")
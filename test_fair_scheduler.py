@@ -0,0 +1,68 @@
+#!/usr/bin/env python3
+"""
+Tests for weighted fair queuing of LLM calls across tenants.
+"""
+
+import threading
+import time
+
+from src.utils.fair_scheduler import FairScheduler, job_weight, tenant_scope
+
+
+def _queue_call(scheduler, tenant_id, size_chars, order):
+    def run():
+        with tenant_scope(tenant_id, size_chars=size_chars):
+            with scheduler.slot():
+                order.append(tenant_id)
+    thread = threading.Thread(target=run)
+    thread.start()
+    return thread
+
+
+def _wait_until_queued(scheduler, count):
+    while scheduler.metrics()["queued"] < count:
+        time.sleep(0.001)
+
+
+def test_short_job_overtakes_queued_calls_of_a_large_job():
+    scheduler = FairScheduler(capacity=lambda: 1)
+    order = []
+    with tenant_scope("holder"):
+        holder = scheduler.acquire()
+
+    threads = []
+    for i in range(5):
+        threads.append(_queue_call(scheduler, "large", 1_000_000, order))
+        _wait_until_queued(scheduler, i + 1)
+    threads.append(_queue_call(scheduler, "small", 2_000, order))
+    _wait_until_queued(scheduler, 6)
+
+    scheduler.release(holder)
+    for thread in threads:
+        thread.join(timeout=5)
+    assert order == ["small"] + ["large"] * 5
+    assert job_weight(2_000) > job_weight(1_000_000) == 1.0
+
+
+def test_per_tenant_concurrency_cap_lets_others_through():
+    scheduler = FairScheduler(capacity=lambda: 4, max_concurrent_per_tenant=1)
+    order = []
+    with tenant_scope("busy"):
+        busy = scheduler.acquire()
+
+    blocked = _queue_call(scheduler, "busy", None, order)
+    _wait_until_queued(scheduler, 1)
+    other = _queue_call(scheduler, "other", None, order)
+    other.join(timeout=5)
+    assert order == ["other"]
+
+    scheduler.release(busy)
+    blocked.join(timeout=5)
+    assert order == ["other", "busy"]
+    assert scheduler.metrics()["tenants"] == {}
+
+
+if __name__ == "__main__":
+    test_short_job_overtakes_queued_calls_of_a_large_job()
+    test_per_tenant_concurrency_cap_lets_others_through()
+    print("Fair scheduler tests passed.")
@@ -0,0 +1,81 @@
+#!/usr/bin/env python3
+"""
+Tests for the question-id keyed fan-out and merge used by ranking and validation.
+"""
+
+import time
+
+from src.agents import ranker, validator
+from src.utils.deadline import Deadline
+from src.utils.fan_out import assign_question_ids, fan_out, merge_by_question_id
+
+QUESTIONS = [
+    {"concept": "Supervised Learning", "question": "What does a labelled dataset contain?"},
+    {"concept": "Clustering", "question": "What does k-means group?"},
+    {"concept": "Clustering", "question": "What does k-means group?"},
+]
+
+
+def test_ids_are_stable_and_unique():
+    first = assign_question_ids(QUESTIONS)
+    second = assign_question_ids(list(reversed(QUESTIONS)))
+    assert len({q["question_id"] for q in first}) == 3
+    assert first[0]["question_id"] == second[2]["question_id"]
+    assert assign_question_ids(first) == first
+
+
+def test_merge_tolerates_missing_reordered_and_unknown_results():
+    questions = assign_question_ids(QUESTIONS)
+    ids = [q["question_id"] for q in questions]
+    results = [
+        {"question_id": ids[2], "decision": "Reject"},
+        {"question_id": "unknown", "decision": "Approve"},
+        {"question_id": ids[0], "decision": "Approve"},
+        {"question_id": ids[0], "decision": "Reject"},
+    ]
+    merged = merge_by_question_id(questions, results, missing=lambda q: {"question_id": q["question_id"], "decision": "N/A"})
+    assert [v["decision"] for v in merged] == ["Approve", "N/A", "Reject"]
+    assert [v["question_id"] for v in merged] == ids
+
+
+def test_fan_out_drops_tasks_past_the_deadline():
+    results = fan_out(lambda delay: time.sleep(delay) or delay, [0, 0.5], key=lambda delay: delay,
+                      max_workers=2, deadline=Deadline(0.2))
+    assert results == {0: 0}
+
+
+def test_validations_follow_question_numbers_not_response_order():
+    questions = assign_question_ids(QUESTIONS[:2])
+    response = ('[{"question_number":2,"decision":"Reject","reason":"Ambiguous"},'
+                '{"question_number":1,"decision":"Approve","reason":"Clear"}]')
+    original = validator.call_gemini_api
+    validator.call_gemini_api = lambda prompt, agent=None: response
+    try:
+        results = validator.validate_questions(questions)
+    finally:
+        validator.call_gemini_api = original
+    merged = merge_by_question_id(questions, results, missing=lambda q: {})
+    assert [v["decision"] for v in merged] == ["Approve", "Reject"]
+
+
+def test_failed_rankings_fall_back_to_concept_depth():
+    questions = assign_question_ids(QUESTIONS[:2])
+    concept_map = {"concept_map": [{"concept": "Machine Learning", "children": [
+        {"concept": "Supervised Learning", "children": []}, {"concept": "Clustering", "children": []}]}]}
+    responses = {"Supervised Learning": '{"difficulty":"Easy","importance":"Supporting"}', "Clustering": ""}
+    original = ranker.call_gemini_api
+    ranker.call_gemini_api = lambda prompt, agent=None: responses[prompt.rsplit("CONCEPT:\n", 1)[1].strip()]
+    try:
+        ranked = ranker.rank_questions(questions, concept_map)
+    finally:
+        ranker.call_gemini_api = original
+    assert [(q["difficulty"], q["ranked_by"]) for q in ranked] == [("Easy", "llm"), ("Hard", "local")]
+
+
+if __name__ == "__main__":
+    test_ids_are_stable_and_unique()
+    test_merge_tolerates_missing_reordered_and_unknown_results()
+    test_fan_out_drops_tasks_past_the_deadline()
+    test_validations_follow_question_numbers_not_response_order()
+    test_failed_rankings_fall_back_to_concept_depth()
+    print("Fan-out tests passed.")
@@ -0,0 +1,149 @@
+#!/usr/bin/env python3
+"""
+Tests for hedged LLM requests.
+"""
+
+import os
+import threading
+import time
+
+from src.utils import llm_client
+from src.utils.llm_client import HedgePolicy
+
+MODEL = "hedge-test-model"
+ROUTE = {"model": MODEL, "agent": "hedge-test"}
+
+
+def _enable_hedging(fake_generate_once):
+    original = llm_client._generate_once
+    llm_client._generate_once = fake_generate_once
+    llm_client.configure_hedging(True, percentile=95, budget_ratio=1.0, max_tokens=10, min_samples=20)
+    for _ in range(20):
+        llm_client._agent_stats_for(ROUTE["agent"]).record(0.01, ok=True)
+    return original
+
+
+def _disable_hedging(original):
+    llm_client._generate_once = original
+    llm_client.configure_hedging(False)
+
+
+def test_budget_caps_hedges():
+    policy = HedgePolicy(enabled=True, budget_ratio=0.25, max_tokens=1)
+    for _ in range(4):
+        policy.earn()
+    assert policy.try_spend()
+    assert not policy.try_spend()
+    assert policy.metrics()["hedges"] == 1 and policy.metrics()["denied_by_budget"] == 1
+
+
+def test_slow_primary_loses_to_backup():
+    def fake(prompt, model_name, route, sent=None):
+        if sent is not None:
+            sent.set()
+            time.sleep(0.5)
+            return "primary"
+        return "backup"
+
+    original = _enable_hedging(fake)
+    try:
+        wins = llm_client.get_hedging_metrics()["hedge_wins"]
+        assert llm_client._generate_hedged("prompt", MODEL, ROUTE) == "backup"
+        assert llm_client.get_hedging_metrics()["hedge_wins"] == wins + 1
+    finally:
+        _disable_hedging(original)
+
+
+def test_hedge_delay_comes_from_the_agents_own_calls():
+    calls = []
+
+    def fake(prompt, model_name, route, sent=None):
+        calls.append(prompt)
+        if sent is not None:
+            sent.set()
+        time.sleep(0.2)
+        return "response"
+
+    original = _enable_hedging(fake)
+    for _ in range(20):
+        llm_client._stats_for(MODEL).record(0.01, ok=True)
+    try:
+        # The model has fast samples from another agent; this agent has none yet.
+        assert llm_client._generate_hedged("prompt", MODEL, {**ROUTE, "agent": "hedge-test-unseen"}) == "response"
+        assert calls == ["prompt"]
+    finally:
+        _disable_hedging(original)
+
+
+def test_time_before_sending_does_not_trigger_a_hedge():
+    backups = []
+
+    def fake(prompt, model_name, route, sent=None):
+        if sent is None:
+            backups.append(prompt)
+            return "backup"
+        # Waiting for the rate limiter or a concurrency slot, far beyond the hedge delay.
+        time.sleep(0.2)
+        sent.set()
+        return "primary"
+
+    original = _enable_hedging(fake)
+    try:
+        assert llm_client._generate_hedged("prompt", MODEL, ROUTE) == "primary"
+        assert backups == []
+    finally:
+        _disable_hedging(original)
+
+
+def test_primaries_are_not_capped_by_the_backup_pool():
+    calls = 20
+    everyone_sending = threading.Barrier(calls, timeout=5)
+
+    def fake(prompt, model_name, route, sent=None):
+        sent.set()
+        everyone_sending.wait()
+        return "primary"
+
+    original = _enable_hedging(fake)
+    # No hedge budget: only the primaries run, and all of them at once.
+    llm_client.configure_hedging(True, percentile=95, budget_ratio=0.0, max_tokens=0, min_samples=20)
+    try:
+        results = []
+        threads = [
+            threading.Thread(target=lambda: results.append(llm_client._generate_hedged("p", MODEL, ROUTE)))
+            for _ in range(calls)
+        ]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join(timeout=10)
+        assert results == ["primary"] * calls
+        assert not everyone_sending.broken
+    finally:
+        _disable_hedging(original)
+
+
+def test_hedging_is_read_from_the_environment_on_first_use():
+    original_env = os.environ.get("LLM_HEDGING")
+    os.environ["LLM_HEDGING"] = "1"
+    llm_client._env_loaded = False
+    llm_client._hedging_configured = False
+    try:
+        llm_client._load_env()
+        assert llm_client.get_hedging_metrics()["enabled"] is True
+    finally:
+        llm_client.configure_hedging(False)
+        if original_env is None:
+            os.environ.pop("LLM_HEDGING")
+        else:
+            os.environ["LLM_HEDGING"] = original_env
+
+
+if __name__ == "__main__":
+    test_budget_caps_hedges()
+    test_slow_primary_loses_to_backup()
+    test_hedge_delay_comes_from_the_agents_own_calls()
+    test_time_before_sending_does_not_trigger_a_hedge()
+    test_primaries_are_not_capped_by_the_backup_pool()
+    test_hedging_is_read_from_the_environment_on_first_use()
+    print("Hedging tests passed.")
@@ -0,0 +1,79 @@
+#!/usr/bin/env python3
+"""
+Cold-start guard: importing the entry-point modules must stay cheap and free
+of side effects. Uses `python -X importtime` in a fresh interpreter.
+"""
+
+import os
+import subprocess
+import sys
+
+REPO_ROOT = os.path.dirname(os.path.abspath(__file__))
+
+# Modules imported by the Streamlit server and by the batch/worker processes.
+STREAMLIT_MODULES = [
+    "src.run_pipeline", "src.worker", "src.warmup", "src.topics", "src.utils.db_manager",
+    "src.utils.documents", "src.utils.profiling", "src.utils.rendering",
+]
+BATCH_MODULES = ["src.batch", "src.worker"]
+
+# Heavy dependencies that must only be loaded on first use.
+LAZY_MODULES = ["pandas", "pypdf", "numpy", "dotenv", "google", "streamlit", "src.agents"]
+
+# Cumulative import budget for the modules above, in milliseconds.
+IMPORT_BUDGET_MS = 250
+
+
+def _import_profile(modules):
+    """
+    Imports `modules` in a fresh interpreter.
+    Returns ({module name: cumulative microseconds}, stdout, environ changed).
+    """
+    code = (
+        "import os, sys; before = dict(os.environ); "
+        f"import {', '.join(modules)}; "
+        "sys.stderr.write('ENV_CHANGED=%s\\n' % (dict(os.environ) != before))"
+    )
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", code],
+        cwd=REPO_ROOT, capture_output=True, text=True, check=True
+    )
+    timings = {}
+    env_changed = None
+    for line in result.stderr.splitlines():
+        if line.startswith("ENV_CHANGED="):
+            env_changed = line.split("=", 1)[1] == "True"
+        elif line.startswith("import time:") and "|" in line:
+            _, cumulative, name = line.split("|")
+            if cumulative.strip().isdigit():
+                timings[name.strip()] = int(cumulative)
+    return timings, result.stdout, env_changed
+
+
+def _check(modules):
+    timings, stdout, env_changed = _import_profile(modules)
+
+    loaded_lazy = sorted(
+        name for name in timings
+        if any(name == lazy or name.startswith(lazy + ".") for lazy in LAZY_MODULES)
+    )
+    assert not loaded_lazy, f"Imported eagerly: {loaded_lazy}"
+    assert stdout == "", f"Import printed output: {stdout!r}"
+    assert env_changed is False, "Import modified os.environ"
+
+    total_ms = sum(timings.get(name, 0) for name in modules) / 1000
+    assert total_ms < IMPORT_BUDGET_MS, f"Import took {total_ms:.1f} ms (budget {IMPORT_BUDGET_MS} ms)"
+
+
+def test_streamlit_server_import_budget():
+    _check(STREAMLIT_MODULES)
+
+
+def test_batch_and_worker_import_budget():
+    _check(BATCH_MODULES)
+
+
+if __name__ == "__main__":
+    test_streamlit_server_import_budget()
+    test_batch_and_worker_import_budget()
+    print("Import-time budget tests passed.")
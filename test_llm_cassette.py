@@ -0,0 +1,105 @@
+#!/usr/bin/env python3
+"""
+Tests for recording LLM calls to a cassette and replaying them offline.
+"""
+
+import json
+import os
+import tempfile
+import time
+from types import SimpleNamespace
+
+from src.utils import llm_client
+from src.utils.cassette import Cassette
+from testing_support import environment
+
+
+def _fake_generate(prompt, route):
+    return f"response to {prompt}"
+
+
+def _offline_generate(prompt, route):
+    raise AssertionError("Replay must not call the API")
+
+
+def test_record_then_replay():
+    original_generate = llm_client._generate
+    original_mode = os.environ.get("MODE")
+    os.environ["MODE"] = "live"
+    path = os.path.join(tempfile.mkdtemp(), "calls.jsonl")
+    try:
+        llm_client._generate = _fake_generate
+        llm_client.configure_cassette("record", path)
+        assert llm_client.call_gemini_api("first", agent="ranker") == "response to first"
+        assert llm_client.call_gemini_api("second", agent="generator") == "response to second"
+        assert llm_client.get_cassette_metrics()["recorded"] == 2
+
+        llm_client._generate = _offline_generate
+        llm_client.configure_cassette("replay", path, latency_scale=0)
+        assert llm_client.call_gemini_api("second", agent="generator") == "response to second"
+        assert llm_client.call_gemini_api("first", agent="ranker") == "response to first"
+        # Same prompt for a different model, and an unseen prompt, are misses.
+        assert llm_client.call_gemini_api("first", agent="generator") == ""
+        assert llm_client.call_gemini_api("third", agent="ranker") == ""
+
+        metrics = llm_client.get_cassette_metrics()
+        assert (metrics["entries"], metrics["hits"], metrics["misses"]) == (2, 2, 2)
+    finally:
+        llm_client._generate = original_generate
+        llm_client.configure_cassette(None)
+        if original_mode is None:
+            os.environ.pop("MODE", None)
+        else:
+            os.environ["MODE"] = original_mode
+
+
+def test_repeated_prompt_replays_in_recorded_order():
+    path = os.path.join(tempfile.mkdtemp(), "calls.jsonl")
+    recorder = Cassette(path, "record")
+    recorder.record("model", "prompt", "one", 0.5)
+    recorder.record("model", "prompt", "two", 1.5)
+
+    player = Cassette(path, "replay", latency_scale=2.0)
+    first, second, third = (player.lookup("model", "prompt") for _ in range(3))
+    assert [first["response"], second["response"], third["response"]] == ["one", "two", "one"]
+    assert player.replay_delay(second) == 3.0
+
+
+
+class _FlakyModels:
+    """Fails the first request slowly, then answers the retry quickly."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def generate_content(self, model, contents, config):
+        self.calls += 1
+        if self.calls == 1:
+            time.sleep(0.3)
+            raise ConnectionError("connection reset")
+        time.sleep(0.05)
+        return SimpleNamespace(text=f"response to {contents}")
+
+
+def test_recorded_latency_is_the_answering_call_only():
+    original_client = llm_client._get_client
+    models = _FlakyModels()
+    llm_client._get_client = lambda: SimpleNamespace(models=models)
+    path = os.path.join(tempfile.mkdtemp(), "calls.jsonl")
+    try:
+        with environment(MODE="live"):
+            llm_client.configure_cassette("record", path)
+            assert llm_client.call_gemini_api("retried prompt", agent="cassette-test") == "response to retried prompt"
+    finally:
+        llm_client._get_client = original_client
+        llm_client.configure_cassette(None)
+    with open(path, "r", encoding="utf-8") as f:
+        entry = json.loads(f.readline())
+    assert models.calls == 2 and 0.05 <= entry["latency_seconds"] < 0.25
+
+
+if __name__ == "__main__":
+    test_record_then_replay()
+    test_repeated_prompt_replays_in_recorded_order()
+    test_recorded_latency_is_the_answering_call_only()
+    print("Cassette tests passed.")
@@ -0,0 +1,66 @@
+#!/usr/bin/env python3
+"""
+Tests for per-agent model routing and failover to the fallback model.
+"""
+
+from src.utils import llm_client
+from testing_support import environment
+
+
+def _generate_with(models_that_fail, route):
+    """Runs _generate with the given models failing; returns (response, models tried)."""
+    tried = []
+
+    def fake(prompt, model_name, route):
+        tried.append(model_name)
+        if model_name in models_that_fail:
+            raise ConnectionError(f"{model_name} unavailable")
+        return f"{model_name} answer"
+
+    original = llm_client._generate_hedged
+    llm_client._generate_hedged = fake
+    try:
+        return llm_client._generate("prompt", route), tried
+    finally:
+        llm_client._generate_hedged = original
+
+
+def test_each_agent_has_its_own_route():
+    ranker = llm_client.get_route("ranker")
+    extractor = llm_client.get_route("extractor")
+    assert ranker["agent"] == "ranker" and ranker["model"] != extractor["model"]
+    assert ranker["max_output_tokens"] < llm_client.get_route("validator")["max_output_tokens"]
+    assert extractor["max_output_tokens"] is None
+    assert llm_client.get_route("unknown-agent")["model"] == llm_client.DEFAULT_ROUTE["model"]
+
+
+def test_model_can_be_overridden_per_agent():
+    with environment(LLM_MODEL_RANKER="override-model"):
+        assert llm_client.get_route("ranker")["model"] == "override-model"
+        assert llm_client.get_route("validator")["model"] != "override-model"
+
+
+def test_failed_primary_falls_back_to_the_secondary_model():
+    route = {"model": "routing-primary", "fallback_model": "routing-secondary", "agent": "routing-test"}
+    response, tried = _generate_with({"routing-primary"}, route)
+    assert response == "routing-secondary answer"
+    assert tried == ["routing-primary"] * llm_client.PRIMARY_ATTEMPTS + ["routing-secondary"]
+
+    response, tried = _generate_with({"routing-primary", "routing-secondary"}, route)
+    assert response == "" and tried[-1] == "routing-secondary"
+
+
+def test_primary_in_cooldown_is_skipped():
+    route = {"model": "routing-cooling", "fallback_model": "routing-secondary", "agent": "routing-test"}
+    for _ in range(llm_client.FAILOVER_THRESHOLD):
+        llm_client._stats_for("routing-cooling").record(1.0, ok=False)
+    response, tried = _generate_with(set(), route)
+    assert response == "routing-secondary answer" and tried == ["routing-secondary"]
+
+
+if __name__ == "__main__":
+    test_each_agent_has_its_own_route()
+    test_model_can_be_overridden_per_agent()
+    test_failed_primary_falls_back_to_the_secondary_model()
+    test_primary_in_cooldown_is_skipped()
+    print("LLM routing tests passed.")
@@ -75,7 +75,7 @@ if __name__ == "__main__":
         print("\n🎉 All tests passed! Mock mode should work correctly.")
         print("\nTo run the application:")
         print("1. Install dependencies: pip install -r requirements.txt")
-        print("2. Set MODE='mock' in src/run_pipeline.py (currently set)")
+        print("2. Set MODE=mock in your environment or .env file")
         print("3. Run: streamlit run streamlit_app.py")
     else:
         print("\n❌ Some tests failed. Please fix the issues above.")
@@ -0,0 +1,166 @@
+#!/usr/bin/env python3
+"""
+Tests for the concept organizer and how the pipeline handles its fallbacks.
+"""
+
+from src.agents import organizer
+from src.agents.organizer import organize_concepts_local, organize_concepts_partitioned
+from src.run_pipeline import run_full_pipeline
+from src.state import PipelineState
+from src.utils.cooccurrence import cluster_concepts
+from testing_support import SAMPLE_TEXT, stand_in_pipeline
+
+
+def test_failed_llm_tree_is_degraded_and_not_cached():
+    original_call = organizer.call_gemini_api
+    calls = []
+
+    def failing_call(prompt, agent=None):
+        calls.append(agent)
+        return ""
+
+    organizer.call_gemini_api = failing_call
+    try:
+        with stand_in_pipeline(ORGANIZER_MODE="single"):
+            for _ in range(2):
+                state = PipelineState()
+                concept_map, _, _ = run_full_pipeline(SAMPLE_TEXT, state=state)
+                assert concept_map["organized_by"] == "local" and concept_map["concept_map"]
+                assert "organizer" in state.degraded_stages
+    finally:
+        organizer.call_gemini_api = original_call
+    # The second run asked the LLM again instead of reusing the fallback tree.
+    assert calls == ["organizer", "organizer"]
+
+
+def _concepts(*names):
+    return [{"concept": name} for name in names]
+
+
+def _parents(concept_map):
+    """Maps every concept in the tree to its parent's name (None for roots)."""
+    parents = {}
+    stack = [(node, None) for node in concept_map["concept_map"]]
+    while stack:
+        node, parent = stack.pop()
+        assert node["concept"] not in parents, f"{node['concept']} appears twice"
+        parents[node["concept"]] = parent
+        stack.extend((child, node["concept"]) for child in node["children"])
+    return parents
+
+
+def test_local_tree_nests_by_cooccurrence_and_contains_each_concept_once():
+    text = (
+        "Photosynthesis happens in the Chloroplast. Photosynthesis needs Chlorophyll. "
+        "Photosynthesis uses the Chlorophyll pigment. Photosynthesis makes sugar. "
+        "The Chloroplast is an organelle. Photosynthesis in the Chloroplast releases oxygen."
+    )
+    names = ["Chlorophyll", "Photosynthesis", "Chloroplast", "Oxygen"]
+    parents = _parents(organize_concepts_local(_concepts(*names), text))
+    assert set(parents) == set(names)
+    assert parents["Chlorophyll"] == "Photosynthesis" and parents["Photosynthesis"] is None
+    for name in names:
+        seen, parent = {name}, parents[name]
+        while parent is not None:
+            assert parent not in seen, f"cycle through {parent}"
+            seen.add(parent)
+            parent = parents[parent]
+
+
+def test_name_containment_nests_without_cooccurrence():
+    concepts = _concepts("Convolutional Neural Network", "Neural Network", "Gradient Descent")
+    for text in ("", "A Neural Network learns. Gradient Descent trains it. A Convolutional Neural Network sees."):
+        parents = _parents(organize_concepts_local(concepts, text))
+        assert parents == {"Neural Network": None, "Convolutional Neural Network": "Neural Network", "Gradient Descent": None}
+
+
+def test_empty_input_gives_an_empty_map():
+    assert organize_concepts_local([], SAMPLE_TEXT) == {"concept_map": []}
+    assert organize_concepts_local([], "") == {"concept_map": []}
+
+
+def test_single_shared_sentence_is_not_a_hierarchy():
+    names = ["Supervised Learning", "Unsupervised Learning"]
+    once = "Supervised Learning uses labels. Supervised Learning, unlike Unsupervised Learning, needs labels."
+    assert _parents(organize_concepts_local(_concepts(*names), once))["Unsupervised Learning"] is None
+
+    twice = once + " Supervised Learning is compared with Unsupervised Learning in practice."
+    assert _parents(organize_concepts_local(_concepts(*names), twice))["Unsupervised Learning"] == "Supervised Learning"
+
+
+TOPICS_TEXT = (
+    "Cell Biology covers Mitochondria. Cell Biology covers Ribosome. "
+    "Plate Tectonics moves Continents. Plate Tectonics causes Earthquakes. "
+    "Music Theory covers Harmony. Music Theory covers Rhythm."
+)
+TOPICS = {
+    "Cell Biology": ["Mitochondria", "Ribosome"],
+    "Plate Tectonics": ["Continents", "Earthquakes"],
+    "Music Theory": ["Harmony", "Rhythm"],
+}
+TOPIC_CONCEPTS = _concepts(*[name for root, children in TOPICS.items() for name in [root, *children]])
+
+
+def _partition_with(answer):
+    """Runs the partitioned organizer with `answer(names)` standing in for the LLM request."""
+    original = organizer._request_concept_map
+    organizer._request_concept_map = answer
+    try:
+        return organize_concepts_partitioned(TOPIC_CONCEPTS, TOPICS_TEXT, max_cluster_size=3)
+    finally:
+        organizer._request_concept_map = original
+
+
+def _cluster_tree(names):
+    """The LLM's answer for one cluster: its first concept with the rest as children."""
+    return {"concept_map": [{"concept": names[0], "children": [{"concept": n, "children": []} for n in names[1:]]}]}
+
+
+def test_clusters_respect_the_size_cap():
+    names = [c["concept"] for c in TOPIC_CONCEPTS]
+    for cap in (1, 2, 3, 4):
+        clusters = cluster_concepts(names, TOPICS_TEXT, cap)
+        assert all(len(cluster) <= cap for cluster in clusters)
+        assert sorted(name for cluster in clusters for name in cluster) == sorted(names)
+    assert cluster_concepts(names, TOPICS_TEXT, 3) == [[root, *children] for root, children in TOPICS.items()]
+
+
+def test_stitching_keeps_dropped_roots_and_ignores_invented_ones():
+    def answer(names):
+        if names == list(TOPICS):
+            # Drops "Music Theory" and invents "Earth Science".
+            return {"concept_map": [{"concept": "Cell Biology", "children": [
+                {"concept": "Earth Science", "children": []},
+                {"concept": "Plate Tectonics", "children": []},
+            ]}]}
+        return _cluster_tree(names)
+
+    organized = _partition_with(answer)
+    parents = _parents(organized)
+    assert organized["organized_by"] == "llm"
+    assert set(parents) == {c["concept"] for c in TOPIC_CONCEPTS}
+    assert parents["Plate Tectonics"] == "Cell Biology" and parents["Earthquakes"] == "Plate Tectonics"
+    assert parents["Music Theory"] is None and parents["Harmony"] == "Music Theory"
+
+
+def test_failed_cluster_falls_back_locally_and_keeps_the_others():
+    def answer(names):
+        return None if "Plate Tectonics" in names and "Continents" in names else _cluster_tree(names)
+
+    organized = _partition_with(answer)
+    parents = _parents(organized)
+    assert organized["organized_by"] == "partial"
+    assert set(parents) == {c["concept"] for c in TOPIC_CONCEPTS}
+    assert parents["Mitochondria"] == "Cell Biology" and parents["Rhythm"] == "Music Theory"
+
+
+if __name__ == "__main__":
+    test_failed_llm_tree_is_degraded_and_not_cached()
+    test_local_tree_nests_by_cooccurrence_and_contains_each_concept_once()
+    test_name_containment_nests_without_cooccurrence()
+    test_empty_input_gives_an_empty_map()
+    test_single_shared_sentence_is_not_a_hierarchy()
+    test_clusters_respect_the_size_cap()
+    test_stitching_keeps_dropped_roots_and_ignores_invented_ones()
+    test_failed_cluster_falls_back_locally_and_keeps_the_others()
+    print("Organizer tests passed.")
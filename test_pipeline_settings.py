@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+"""
+Tests that pipeline settings from the environment (or .env, which is loaded
+on first use) are read per run rather than at import.
+"""
+
+from src import run_pipeline
+from src.utils import llm_client
+from testing_support import SAMPLE_TEXT, stand_in_pipeline
+
+
+def test_organizer_mode_set_after_import_is_used():
+    with stand_in_pipeline(ORGANIZER_MODE="local"):
+        run_pipeline.run_full_pipeline(SAMPLE_TEXT, use_cache=False)
+        calls = llm_client.get_stand_in_metrics()["calls"]
+    assert "organizer" not in calls and calls["generator"] > 0
+
+
+if __name__ == "__main__":
+    test_organizer_mode_set_after_import_is_used()
+    print("Pipeline settings tests passed.")
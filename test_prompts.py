@@ -0,0 +1,34 @@
+#!/usr/bin/env python3
+"""
+Tests for the shared prompt templates: stable prefixes and compact inputs.
+"""
+
+from src.agents.generator import GENERATOR_PROMPT
+from src.agents.ranker import RANKER_PROMPT
+from src.utils.prompts import get_prompt_stats
+
+CONCEPT_MAP = {"concept_map": [{"concept": "Internet", "children": [{"concept": "TCP/IP", "children": []}]}]}
+
+
+def test_calls_of_one_run_share_the_prompt_prefix():
+    first = GENERATOR_PROMPT.render(source_text="The ARPANET migrated to TCP/IP.", concept="ARPANET")
+    second = GENERATOR_PROMPT.render(source_text="The ARPANET migrated to TCP/IP.", concept="TCP/IP")
+    shared = first[:first.index("CONCEPT:\n")]
+    assert second.startswith(shared) and "The ARPANET migrated" in shared
+    assert first.startswith(GENERATOR_PROMPT.prefix)
+
+
+def test_structured_inputs_are_compact_json():
+    prompt = RANKER_PROMPT.render(concept_map=CONCEPT_MAP, concept="TCP/IP")
+    assert '{"concept_map":[{"concept":"Internet","children":[{"concept":"TCP/IP","children":[]}]}]}' in prompt
+    assert prompt.endswith("CONCEPT:\nTCP/IP\n")
+
+    stats = get_prompt_stats()["ranker"]
+    assert stats["renders"] >= 1
+    assert 0 < stats["prefix_tokens"] < stats["max_tokens"]
+
+
+if __name__ == "__main__":
+    test_calls_of_one_run_share_the_prompt_prefix()
+    test_structured_inputs_are_compact_json()
+    print("Prompt template tests passed.")
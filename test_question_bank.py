@@ -0,0 +1,63 @@
+#!/usr/bin/env python3
+"""
+Tests for the cross-document question bank and the generator's reuse mode.
+"""
+
+from src.agents import generator, validator
+from src.run_pipeline import _bank_approved_questions
+from src.utils import db_manager
+from testing_support import temp_database
+
+QUESTION = {
+    "concept": "TCP/IP",
+    "question": "Who developed the TCP/IP protocol suite?",
+    "options": ["Vint Cerf and Bob Kahn", "Tim Berners-Lee", "Charley Kline", "Alan Turing"],
+    "correct_answer": "Vint Cerf and Bob Kahn",
+    "difficulty": "Medium",
+}
+PASSAGE = "The development of the TCP/IP protocol suite in the 1970s by Vint Cerf and Bob Kahn was a pivotal moment."
+
+
+def test_bank_lookup_by_concept_and_passage():
+    with temp_database():
+        assert db_manager.bank_question(QUESTION, PASSAGE, "Approve", "Accurate", "doc one")
+        assert not db_manager.bank_question(QUESTION, PASSAGE, "Approve", "Accurate", "doc two")
+
+        hits = db_manager.find_banked_questions("tcp/ip", "Vint Cerf and Bob Kahn developed TCP/IP.")
+        assert [hit["question"]["question"] for hit in hits] == [QUESTION["question"]]
+        assert hits[0]["verdict"] == "Approve"
+        assert db_manager.find_banked_questions("ARPANET", "The ARPANET was a project.") == []
+
+
+def test_reuse_requires_a_supporting_passage():
+    with temp_database():
+        db_manager.bank_question(QUESTION, PASSAGE, "Approve", "Accurate")
+        same_material = "History of networks. " + PASSAGE + " In 1983, the ARPANET migrated to TCP/IP."
+        other_material = "TCP/IP headers carry ports. TCP/IP checksums detect corrupted segments."
+
+        reused = generator._reuse_banked_question("TCP/IP", same_material, generator._words(same_material))
+        assert reused["question"] == QUESTION["question"] and reused["generated_by"] == "bank"
+        assert generator._reuse_banked_question("TCP/IP", other_material, generator._words(other_material)) is None
+
+
+def test_fallback_approvals_are_not_banked():
+    original_call = validator.call_gemini_api
+    validator.call_gemini_api = lambda prompt, agent=None: ""
+    try:
+        with temp_database():
+            fallback = validator.validate_questions([QUESTION])
+            assert fallback[0]["decision"] == "Approve" and fallback[0]["validated"] is False
+            _bank_approved_questions([{**QUESTION, "decision": "Approve"}], fallback, PASSAGE)
+            assert db_manager.find_banked_questions("TCP/IP", PASSAGE) == []
+
+            _bank_approved_questions([{**QUESTION, "decision": "Approve"}], [{"decision": "Approve"}], PASSAGE)
+            assert len(db_manager.find_banked_questions("TCP/IP", PASSAGE)) == 1
+    finally:
+        validator.call_gemini_api = original_call
+
+
+if __name__ == "__main__":
+    test_bank_lookup_by_concept_and_passage()
+    test_reuse_requires_a_supporting_passage()
+    test_fallback_approvals_are_not_banked()
+    print("Question bank tests passed.")
@@ -0,0 +1,86 @@
+#!/usr/bin/env python3
+"""
+Tests for coalescing concurrent calls that share a key.
+"""
+
+import threading
+import time
+
+from src.utils.single_flight import SingleFlight
+
+
+def _call_concurrently(flight, key, fn, callers):
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(flight.do(key, fn))) for _ in range(callers)]
+    for thread in threads:
+        thread.start()
+    return threads, results
+
+
+def test_concurrent_calls_share_one_execution():
+    flight = SingleFlight()
+    release = threading.Event()
+    runs = []
+
+    def compute():
+        runs.append(1)
+        release.wait(5)
+        return {"questions": [1, 2]}
+
+    threads, results = _call_concurrently(flight, "doc", compute, 5)
+    # Give every caller time to join the leader's call.
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert len(runs) == 1 and len(results) == 5
+    assert all(result == {"questions": [1, 2]} for result in results)
+    # Every caller gets its own copy.
+    assert len({id(result) for result in results}) == 5
+    assert flight.in_flight() == 0
+
+
+def test_followers_get_the_leaders_exception_and_the_key_is_forgotten():
+    flight = SingleFlight()
+    started = threading.Event()
+    release = threading.Event()
+
+    def failing():
+        started.set()
+        release.wait(5)
+        raise ValueError("boom")
+
+    errors = []
+
+    def call():
+        try:
+            flight.do("doc", failing)
+        except ValueError as e:
+            errors.append(str(e))
+
+    threads = [threading.Thread(target=call) for _ in range(3)]
+    threads[0].start()
+    started.wait(5)
+    for thread in threads[1:]:
+        thread.start()
+    time.sleep(0.2)
+    release.set()
+    for thread in threads:
+        thread.join(timeout=5)
+
+    assert errors == ["boom"] * 3
+    assert flight.do("doc", lambda: "fresh") == "fresh"
+
+
+def test_different_keys_run_separately():
+    flight = SingleFlight()
+    assert flight.do("a", lambda: 1) == 1
+    assert flight.do("b", lambda: 2) == 2
+
+
+if __name__ == "__main__":
+    test_concurrent_calls_share_one_execution()
+    test_followers_get_the_leaders_exception_and_the_key_is_forgotten()
+    test_different_keys_run_separately()
+    print("Single-flight tests passed.")
@@ -0,0 +1,41 @@
+#!/usr/bin/env python3
+"""
+Tests for the text normalization applied before the extractor.
+"""
+
+from src.utils.text_normalization import normalize_text
+
+
+def _page(number, body):
+    return f"Intro to Networks   Chapter 2\n{body}\n\nPage {number} of 3"
+
+
+def test_repeated_headers_and_footers_are_stripped():
+    pages = [
+        _page(1, "The ARPANET was a ground-\nbreaking project."),
+        _page(2, "TCP/IP  was   developed\tin the 1970s."),
+        _page(3, "Tim Berners-Lee invented the Web."),
+    ]
+    text, report = normalize_text("\f".join(pages))
+
+    assert "Chapter 2" not in text and "Page" not in text
+    assert "groundbreaking project" in text
+    assert "TCP/IP was developed in the 1970s." in text
+    # Hyphens inside names are not line-break hyphenation.
+    assert "Berners-Lee" in text
+    assert report["repeated_lines_removed"] == 6
+    assert report["hyphenations_joined"] == 1
+    assert report["bytes_saved"] > 0 and report["tokens_saved"] > 0
+
+
+def test_plain_text_keeps_its_lines():
+    source = "Machine learning is a field of study.\n\n\n\nIt is part of AI.  "
+    text, report = normalize_text(source)
+    assert text == "Machine learning is a field of study.\n\nIt is part of AI."
+    assert report["pages"] == 1 and report["repeated_lines_removed"] == 0
+
+
+if __name__ == "__main__":
+    test_repeated_headers_and_footers_are_stripped()
+    test_plain_text_keeps_its_lines()
+    print("Text normalization tests passed.")
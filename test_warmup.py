@@ -0,0 +1,50 @@
+#!/usr/bin/env python3
+"""
+Tests for the cache warm-up, run against the local stand-in LLM.
+"""
+
+import os
+import tempfile
+
+from src import warmup
+from src.topics import CUSTOM_TEXT, PRE_CANNED_TEXT
+from src.utils import llm_client
+from testing_support import SAMPLE_TEXT, environment, stand_in_pipeline
+
+
+def _corpus():
+    directory = tempfile.mkdtemp()
+    for name, text in (("one.txt", SAMPLE_TEXT), ("two.md", "Osmosis. " + SAMPLE_TEXT), ("empty.txt", " ")):
+        with open(os.path.join(directory, name), "w", encoding="utf-8") as f:
+            f.write(text)
+    return directory
+
+
+def test_sources_are_the_topics_and_the_corpus():
+    names = [name for name, _ in warmup.warmup_sources(_corpus())]
+    topics = [name for name in PRE_CANNED_TEXT if name != CUSTOM_TEXT]
+    assert names[:len(topics)] == [f"topic: {name}" for name in topics]
+    assert sorted(os.path.basename(name) for name in names[len(topics):]) == ["empty.txt", "one.txt", "two.md"]
+
+
+def test_second_warm_up_is_served_from_the_cache():
+    corpus = _corpus()
+    with stand_in_pipeline():
+        assert warmup.warm_up(corpus, include_topics=False) == {"ok": 2, "error": 1}
+        calls = sum(llm_client.get_stand_in_metrics()["calls"].values())
+        assert calls > 0
+
+        assert warmup.warm_up(corpus, include_topics=False) == {"ok": 2, "error": 1}
+        assert sum(llm_client.get_stand_in_metrics()["calls"].values()) == calls
+
+
+def test_mock_mode_skips_the_warm_up():
+    with environment(MODE="mock"):
+        assert warmup.warm_up(_corpus()) == {"ok": 0, "error": 0}
+
+
+if __name__ == "__main__":
+    test_sources_are_the_topics_and_the_corpus()
+    test_second_warm_up_is_served_from_the_cache()
+    test_mock_mode_skips_the_warm_up()
+    print("Warm-up tests passed.")
@@ -0,0 +1,74 @@
+#!/usr/bin/env python3
+"""
+Tests for the job worker's heartbeat.
+"""
+
+import time
+
+from src import worker
+from src.utils import db_manager
+from testing_support import temp_database
+
+
+def test_long_stage_keeps_the_job_alive():
+    original_run, original_interval = worker.run_full_pipeline, worker.HEARTBEAT_INTERVAL_SECONDS
+    requeued = []
+
+    def slow_pipeline(source_text, progress_callback=None, state=None, **settings):
+        # One long stage with no progress events; another worker starts meanwhile.
+        time.sleep(2.5)
+        requeued.append(db_manager.requeue_stale_jobs(1))
+        return {"concept_map": []}, [], []
+
+    worker.run_full_pipeline = slow_pipeline
+    worker.HEARTBEAT_INTERVAL_SECONDS = 0.2
+    try:
+        with temp_database():
+            job_id = db_manager.create_job("Some text.")
+            job = db_manager.claim_next_job("test-worker")
+            assert job["id"] == job_id
+            worker.run_job(job)
+            assert requeued == [0]
+            assert db_manager.get_job(job_id)["status"] == "done"
+    finally:
+        worker.run_full_pipeline = original_run
+        worker.HEARTBEAT_INTERVAL_SECONDS = original_interval
+
+
+
+def _age_heartbeat(job_id, seconds):
+    with db_manager._get_db_connection() as conn:
+        conn.execute("UPDATE jobs SET heartbeat_at = datetime('now', ?) WHERE id = ?", (f"-{seconds} seconds", job_id))
+
+
+def test_stale_job_is_not_reused_and_is_requeued_while_running():
+    original_run, original_interval = worker.run_full_pipeline, worker.REQUEUE_INTERVAL_SECONDS
+    worker.run_full_pipeline = lambda source_text, progress_callback=None, state=None, **settings: ({"concept_map": []}, [], [])
+    worker.REQUEUE_INTERVAL_SECONDS = 0.1
+    try:
+        with temp_database():
+            job_id = db_manager.create_job("Some text.")
+            assert db_manager.claim_next_job("crashed-worker")["id"] == job_id
+            assert db_manager.create_job("Some text.") == job_id
+
+            pool = worker.WorkerPool(num_workers=1, poll_interval=0.05).start()
+            try:
+                # The worker that claimed the job dies after the pool started.
+                _age_heartbeat(job_id, db_manager.JOB_STALE_SECONDS + 60)
+                assert db_manager.create_job("Some text.") != job_id
+                for _ in range(100):
+                    if db_manager.get_job(job_id)["status"] == "done":
+                        break
+                    time.sleep(0.05)
+                assert db_manager.get_job(job_id)["status"] == "done"
+            finally:
+                pool.stop(timeout=5)
+    finally:
+        worker.run_full_pipeline = original_run
+        worker.REQUEUE_INTERVAL_SECONDS = original_interval
+
+
+if __name__ == "__main__":
+    test_long_stage_keeps_the_job_alive()
+    test_stale_job_is_not_reused_and_is_requeued_while_running()
+    print("Worker tests passed.")
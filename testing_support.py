@@ -0,0 +1,63 @@
+"""
+Shared set-up for the test scripts: a throwaway database, temporary
+environment variables and the local stand-in LLM.
+"""
+
+import os
+import tempfile
+from contextlib import contextmanager
+
+from src.utils import db_manager, llm_client
+
+
+@contextmanager
+def temp_database(name: str = "test.db"):
+    """Points db_manager at a fresh database in a temporary directory."""
+    original = db_manager.DB_PATH
+    db_manager.DB_PATH = os.path.join(tempfile.mkdtemp(), name)
+    db_manager.init_db()
+    try:
+        yield db_manager.DB_PATH
+    finally:
+        db_manager.DB_PATH = original
+
+
+@contextmanager
+def environment(**values):
+    """Sets environment variables (None unsets one) and restores them afterwards."""
+    saved = {name: os.environ.get(name) for name in values}
+    for name, value in values.items():
+        if value is None:
+            os.environ.pop(name, None)
+        else:
+            os.environ[name] = value
+    try:
+        yield
+    finally:
+        for name, value in saved.items():
+            if value is None:
+                os.environ.pop(name, None)
+            else:
+                os.environ[name] = value
+
+
+@contextmanager
+def stand_in_pipeline(latency_scale: float = 0, **env):
+    """
+    Live mode answered by the stand-in LLM, on a temporary database.
+    Extra keyword arguments are set as environment variables.
+    """
+    with temp_database(), environment(MODE="live", **env):
+        llm_client.configure_stand_in(True, latency_scale=latency_scale)
+        try:
+            yield
+        finally:
+            llm_client.configure_stand_in(False)
+
+
+# A short text the stand-in LLM turns into a few concepts and questions.
+SAMPLE_TEXT = (
+    "Photosynthesis converts light energy into chemical energy. Chlorophyll absorbs light in the "
+    "Chloroplast. The Calvin Cycle fixes carbon dioxide into sugars. Photosynthesis releases oxygen "
+    "as a by-product, and the Calvin Cycle depends on energy from the light reactions."
+)